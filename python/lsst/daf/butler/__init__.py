@@ -7,4 +7,5 @@ Data Access Butler
 
 from .core import *
 from .butler import *
+from .asyncButler import *
 from .version import *
@@ -0,0 +1,216 @@
+# This file is part of daf_butler.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Asynchronous interface to a Butler.
+"""
+
+__all__ = ("AsyncButler",)
+
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+log = logging.getLogger(__name__)
+
+
+class AsyncButler:
+    """An `asyncio` facade over a `Butler`.
+
+    Registry lookups and datastore reads are run on separate bounded thread
+    pools, so that a single process can have many reads in flight without
+    blocking its event loop.
+
+    Parameters
+    ----------
+    butler : `Butler`
+        Butler to wrap.  It must not be used directly by other threads while
+        the `AsyncButler` is in use.
+    registryWorkers : `int`, optional
+        Maximum number of threads used for `Registry` operations.
+    datastoreWorkers : `int`, optional
+        Maximum number of threads used for `Datastore` reads.  Defaults to
+        8 if the registry is thread-safe and 1 otherwise.
+
+    Raises
+    ------
+    ValueError
+        Raised if more than one worker of either kind is requested but the
+        registry is not thread-safe (see `Registry.threadSafe`).
+
+    Notes
+    -----
+    Calls to `put` are serialized, and each is run in a single thread within
+    a `Butler` transaction, so a failed write is rolled back in both the
+    registry and the datastore exactly as it would be by `Butler.put`.
+
+    Datastore reads also query the registry, so concurrent operations are
+    only possible if the registry is thread-safe (e.g. `SqlRegistry` with the
+    ``pool.enabled`` option).  Reads may then proceed while a write is in
+    progress, and the connection pool should be large enough for every
+    worker (``pool.size + pool.maxOverflow >= registryWorkers +
+    datastoreWorkers``); each worker returns its connection to the pool
+    after every call.  Otherwise all operations are run one at a time on a
+    single thread.
+
+    The wrapper should be closed with `close` (or used as an asynchronous
+    context manager) to shut down its threads.
+    """
+
+    def __init__(self, butler, *, registryWorkers=1, datastoreWorkers=None):
+        self.butler = butler
+        if butler.registry.threadSafe:
+            if datastoreWorkers is None:
+                datastoreWorkers = 8
+            self._registryExecutor = ThreadPoolExecutor(max_workers=registryWorkers,
+                                                        thread_name_prefix="AsyncButler-registry")
+            self._datastoreExecutor = ThreadPoolExecutor(max_workers=datastoreWorkers,
+                                                         thread_name_prefix="AsyncButler-datastore")
+        else:
+            if registryWorkers > 1 or (datastoreWorkers is not None and datastoreWorkers > 1):
+                raise ValueError(f"Registry {butler.registry} is not thread-safe; enable its connection "
+                                 "pool to use more than one worker.")
+            # Registry and datastore operations share one thread, because
+            # both use the registry's single database connection.
+            self._registryExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="AsyncButler")
+            self._datastoreExecutor = self._registryExecutor
+        self._writeLock = None
+
+    def __str__(self):
+        return f"AsyncButler({self.butler})"
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
+        return False
+
+    def close(self):
+        """Shut down the threads used by this object, waiting for any
+        operations in progress to finish.
+        """
+        self._registryExecutor.shutdown(wait=True)
+        if self._datastoreExecutor is not self._registryExecutor:
+            self._datastoreExecutor.shutdown(wait=True)
+
+    def _call(self, func, *args, **kwds):
+        """Call a function, then return the current thread's registry
+        connection to the pool.
+        """
+        try:
+            return func(*args, **kwds)
+        finally:
+            self.butler.registry.releaseConnection()
+
+    async def _run(self, executor, func, *args, **kwds):
+        """Run a function on one of our executors and await its result.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, functools.partial(self._call, func, *args, **kwds))
+
+    async def get(self, datasetRefOrType, dataId=None, parameters=None, **kwds):
+        """Retrieve a stored dataset.
+
+        Parameters are the same as those of `Butler.get`.
+
+        Returns
+        -------
+        obj : `object`
+            The dataset.
+        """
+        log.debug("AsyncButler get: %s, dataId=%s, parameters=%s", datasetRefOrType, dataId, parameters)
+        ref = await self._run(self._registryExecutor, self.butler._findDatasetRef, datasetRefOrType, dataId,
+                              **kwds)
+        return await self._run(self._datastoreExecutor, self.butler.getDirect, ref, parameters=parameters)
+
+    async def getMany(self, datasetRefOrType, dataIds=None, parameters=None):
+        """Retrieve multiple stored datasets concurrently.
+
+        Parameters
+        ----------
+        datasetRefOrType : iterable of `DatasetRef`, `DatasetType`, or `str`
+            If ``dataIds`` is `None`, the `DatasetRef` instances to retrieve.
+            Otherwise the `DatasetType` (or name thereof) of all datasets.
+        dataIds : iterable of `dict` or `DataId`, optional
+            Data IDs of the datasets to retrieve.
+        parameters : `dict`, optional
+            Additional StorageClass-defined options to control reading,
+            applied to all datasets.
+
+        Returns
+        -------
+        objs : `list`
+            The datasets, in the same order as the given refs or data IDs.
+
+        Raises
+        ------
+        LookupError
+            Raised (before any dataset is read) if any of the datasets could
+            not be found in the Butler's collection.
+
+        Notes
+        -----
+        All datasets are looked up with a single call to
+        `Registry.findMany` for each `DatasetType`.
+        """
+        # Consume iterables here rather than in another thread.
+        if dataIds is None:
+            datasetRefOrType = list(datasetRefOrType)
+        else:
+            dataIds = list(dataIds)
+        refs = await self._run(self._registryExecutor, self.butler._findDatasetRefs,
+                               datasetRefOrType, dataIds)
+        objs = await asyncio.gather(*[self._run(self._datastoreExecutor, self.butler.getDirect, ref,
+                                                parameters=parameters)
+                                      for ref in refs])
+        return list(objs)
+
+    async def exists(self, datasetRefOrType, dataId=None, **kwds):
+        """Return `True` if a dataset is actually present in the Datastore.
+
+        Parameters are the same as those of `Butler.datasetExists`.
+
+        Raises
+        ------
+        LookupError
+            Raised if the Dataset is not even present in the Registry.
+        """
+        ref = await self._run(self._registryExecutor, self.butler._findDatasetRef, datasetRefOrType, dataId,
+                              **kwds)
+        return await self._run(self._datastoreExecutor, self.butler.datastore.exists, ref)
+
+    async def put(self, obj, datasetRefOrType, dataId=None, producer=None, **kwds):
+        """Store and register a dataset.
+
+        Parameters are the same as those of `Butler.put`.
+
+        Returns
+        -------
+        ref : `DatasetRef`
+            A reference to the stored dataset.
+        """
+        if self._writeLock is None:
+            self._writeLock = asyncio.Lock()
+        async with self._writeLock:
+            return await self._run(self._registryExecutor, self.butler.put, obj, datasetRefOrType, dataId,
+                                   producer=producer, **kwds)
@@ -408,7 +408,67 @@ class Butler:
 
         return ref
 
-    def getDirect(self, ref, parameters=None):
+    @transactional
+    def putMany(self, items, producer=None):
+        """Store and register multiple datasets.
+
+        Parameters
+        ----------
+        items : iterable of `tuple`
+            Tuples of ``(obj, datasetRefOrType, dataId)``, with the same
+            meanings as the arguments to `put`.
+        producer : `Quantum`, optional
+            The producer of all datasets.
+
+        Returns
+        -------
+        refs : `list` of `DatasetRef`
+            References to the stored datasets, in the same order as
+            ``items``.
+
+        Raises
+        ------
+        TypeError
+            Raised if the butler was not constructed with a Run, and is hence
+            read-only.
+
+        Notes
+        -----
+        Datasets are registered with one `Registry.addDatasets` call for
+        each `DatasetType`, and written with `Datastore.putMany`, which may
+        write several concurrently and record them in bulk.  Everything is
+        done in a single transaction, so if any dataset cannot be stored
+        none are, and any files already written are removed.  Virtual
+        composites are stored one at a time with `put`.
+        """
+        log.debug("Butler putMany: producer=%s", producer)
+        if self.run is None:
+            raise TypeError("Butler is read-only.")
+        items = list(items)
+        refs = [None]*len(items)
+        byType = {}
+        for i, (obj, datasetRefOrType, dataId) in enumerate(items):
+            if isinstance(datasetRefOrType, DatasetRef):
+                if datasetRefOrType.id is not None:
+                    raise ValueError("DatasetRef must not be in registry, must have None id")
+                datasetType, dataId = self._standardizeArgs(datasetRefOrType)
+            else:
+                datasetType, dataId = self._standardizeArgs(datasetRefOrType, dataId)
+            if self.composites.shouldBeDisassembled(datasetType):
+                refs[i] = self.put(obj, datasetType, dataId, producer=producer)
+            else:
+                byType.setdefault(datasetType, []).append((i, dataId))
+        toStore = []
+        for datasetType, entries in byType.items():
+            added = self.registry.addDatasets(datasetType, [dataId for _, dataId in entries],
+                                              run=self.run, producer=producer, recursive=True)
+            for (i, _), ref in zip(entries, added):
+                refs[i] = ref
+                toStore.append((items[i][0], ref))
+        self.datastore.putMany(toStore)
+        return refs
+
+    def getDirect(self, ref, parameters=None, *, checkSize=True):
         """Retrieve a stored dataset.
 
         Unlike `Butler.get`, this method allows datasets outside the Butler's
@@ -422,41 +482,47 @@ class Butler:
         parameters : `dict`
             Additional StorageClass-defined options to control reading,
             typically used to efficiently read only a subset of the dataset.
+        checkSize : `bool`, optional
+            If `False`, do not check that the size of the stored dataset
+            matches the size recorded when it was written.  This can save a
+            file system call per read for some datastores.
 
         Returns
         -------
         obj : `object`
             The dataset.
         """
-        # if the ref exists in the store we return it directly
-        if self.datastore.exists(ref):
-            return self.datastore.get(ref, parameters=parameters)
-        elif ref.isComposite():
-            # Check that we haven't got any unknown parameters
-            ref.datasetType.storageClass.validateParameters(parameters)
-            # Reconstruct the composite
-            usedParams = set()
-            components = {}
-            for compName, compRef in ref.components.items():
-                # make a dictionary of parameters containing only the subset
-                # supported by the StorageClass of the components
-                compParams = compRef.datasetType.storageClass.filterParameters(parameters)
-                usedParams.update(set(compParams))
-                components[compName] = self.datastore.get(compRef, parameters=compParams)
-
-            # Any unused parameters will have to be passed to the assembler
-            if parameters:
-                unusedParams = {k: v for k, v in parameters.items() if k not in usedParams}
-            else:
-                unusedParams = {}
-
-            # Assemble the components
-            inMemoryDataset = ref.datasetType.storageClass.assembler().assemble(components)
-            return ref.datasetType.storageClass.assembler().handleParameters(inMemoryDataset,
-                                                                             parameters=unusedParams)
+        # If the ref exists in the store we return it directly; trying to read
+        # it is cheaper than checking whether it exists first.
+        try:
+            return self.datastore.get(ref, parameters=parameters, checkSize=checkSize)
+        except FileNotFoundError as err:
+            if not ref.isComposite():
+                # single entity in datastore
+                raise FileNotFoundError(f"Unable to locate dataset '{ref}' in datastore "
+                                        f"{self.datastore.name}") from err
+        # Check that we haven't got any unknown parameters
+        ref.datasetType.storageClass.validateParameters(parameters)
+        # Reconstruct the composite
+        usedParams = set()
+        components = {}
+        for compName, compRef in ref.components.items():
+            # make a dictionary of parameters containing only the subset
+            # supported by the StorageClass of the components
+            compParams = compRef.datasetType.storageClass.filterParameters(parameters)
+            usedParams.update(set(compParams))
+            components[compName] = self.datastore.get(compRef, parameters=compParams, checkSize=checkSize)
+
+        # Any unused parameters will have to be passed to the assembler
+        if parameters:
+            unusedParams = {k: v for k, v in parameters.items() if k not in usedParams}
         else:
-            # single entity in datastore
-            raise FileNotFoundError(f"Unable to locate dataset '{ref}' in datastore {self.datastore.name}")
+            unusedParams = {}
+
+        # Assemble the components
+        inMemoryDataset = ref.datasetType.storageClass.assembler().assemble(components)
+        return ref.datasetType.storageClass.assembler().handleParameters(inMemoryDataset,
+                                                                         parameters=unusedParams)
 
     def getDeferred(self, datasetRefOrType: typing.Union[DatasetRef, DatasetType, str],
                     dataId: typing.Union[dict, DataId] = None, parameters: typing.Union[dict, None] = None,
@@ -486,7 +552,7 @@ class Butler:
         """
         return dDH.DeferredDatasetHandle(self, datasetRefOrType, dataId, parameters, kwds)
 
-    def get(self, datasetRefOrType, dataId=None, parameters=None, **kwds):
+    def get(self, datasetRefOrType, dataId=None, parameters=None, *, checkSize=True, **kwds):
         """Retrieve a stored dataset.
 
         Parameters
@@ -501,6 +567,10 @@ class Butler:
         parameters : `dict`
             Additional StorageClass-defined options to control reading,
             typically used to efficiently read only a subset of the dataset.
+        checkSize : `bool`, optional
+            If `False`, do not check that the size of the stored dataset
+            matches the size recorded when it was written.  This can save a
+            file system call per read for some datastores.
         kwds
             Additional keyword arguments used to augment or construct a
             `DataId`.  See `DataId` parameters.
@@ -511,20 +581,149 @@ class Butler:
             The dataset.
         """
         log.debug("Butler get: %s, dataId=%s, parameters=%s", datasetRefOrType, dataId, parameters)
+        ref = self._findDatasetRef(datasetRefOrType, dataId, **kwds)
+        return self.getDirect(ref, parameters=parameters, checkSize=checkSize)
+
+    def _findDatasetRef(self, datasetRefOrType, dataId=None, **kwds):
+        """Look up a dataset in the Butler's collection.
+
+        The `DatasetRef` is always looked up, even if one is given, to ensure
+        it is present in the current collection.
+
+        Parameters are the same as those of `get`.
+
+        Returns
+        -------
+        ref : `DatasetRef`
+            Reference to the dataset, as found in the Butler's collection.
+
+        Raises
+        ------
+        LookupError
+            Raised if the dataset could not be found.
+        ValueError
+            Raised if a `DatasetRef` is given whose ID does not match the
+            one found.
+        """
         datasetType, dataId = self._standardizeArgs(datasetRefOrType, dataId, **kwds)
         if isinstance(datasetRefOrType, DatasetRef):
             idNumber = datasetRefOrType.id
         else:
             idNumber = None
-        # Always lookup the DatasetRef, even if one is given, to ensure it is
-        # present in the current collection.
         ref = self.registry.find(self.collection, datasetType, dataId, **kwds)
         if ref is None:
             raise LookupError("Dataset {} with data ID {} could not be found in {}".format(
                               datasetType.name, dataId, self.collection))
         if idNumber is not None and idNumber != ref.id:
             raise ValueError("DatasetRef.id does not match id in registry")
-        return self.getDirect(ref, parameters=parameters)
+        return ref
+
+    def _findDatasetRefs(self, datasetRefOrType, dataIds=None):
+        """Look up multiple datasets in the Butler's collection, with one call
+        to `Registry.findMany` for each `DatasetType`.
+
+        Parameters are the same as those of `getMany`.
+
+        Returns
+        -------
+        refs : `list` of `DatasetRef`
+            References to the datasets, as found in the Butler's collection,
+            in the order they were given.
+
+        Raises
+        ------
+        LookupError
+            Raised if any of the datasets could not be found.
+        ValueError
+            Raised if a `DatasetRef` is given whose ID does not match the
+            one found.
+        """
+        if dataIds is None:
+            given = list(datasetRefOrType)
+            refs = [None]*len(given)
+            byType = {}
+            for i, ref in enumerate(given):
+                byType.setdefault(ref.datasetType, []).append(i)
+            for datasetType, indices in byType.items():
+                found = self.registry.findMany(self.collection, datasetType,
+                                               [given[i].dataId for i in indices])
+                for i in indices:
+                    ref = found.get(given[i].dataId)
+                    if ref is None:
+                        raise LookupError("Dataset {} with data ID {} could not be found in {}".format(
+                                          datasetType.name, given[i].dataId, self.collection))
+                    if given[i].id is not None and given[i].id != ref.id:
+                        raise ValueError("DatasetRef.id does not match id in registry")
+                    refs[i] = ref
+        else:
+            datasetType, _ = self._standardizeArgs(datasetRefOrType)
+            dataIds = [DataId(dataId, dimensions=datasetType.dimensions, universe=self.registry.dimensions)
+                       for dataId in dataIds]
+            found = self.registry.findMany(self.collection, datasetType, dataIds)
+            refs = []
+            for dataId in dataIds:
+                ref = found.get(dataId)
+                if ref is None:
+                    raise LookupError("Dataset {} with data ID {} could not be found in {}".format(
+                                      datasetType.name, dataId, self.collection))
+                refs.append(ref)
+        return refs
+
+    def getMany(self, datasetRefOrType, dataIds=None, parameters=None, *, ordered=True):
+        """Retrieve multiple stored datasets.
+
+        Parameters
+        ----------
+        datasetRefOrType : iterable of `DatasetRef`, `DatasetType`, or `str`
+            If ``dataIds`` is `None`, the `DatasetRef` instances to retrieve.
+            Otherwise the `DatasetType` (or name thereof) of all datasets.
+        dataIds : iterable of `dict` or `DataId`, optional
+            Data IDs of the datasets to retrieve.
+        parameters : `dict`, optional
+            Additional StorageClass-defined options to control reading,
+            applied to all datasets.
+        ordered : `bool`, optional
+            If `True` (default), yield datasets in the order in which they
+            were given; otherwise yield them as they are read.
+
+        Yields
+        ------
+        ref : `DatasetRef`
+            Reference to the dataset, as found in the Butler's collection.
+        obj : `object`
+            The dataset.
+
+        Raises
+        ------
+        LookupError
+            Raised (before any dataset is read) if any of the datasets could
+            not be found in the Butler's collection.
+
+        Notes
+        -----
+        All datasets are looked up with a single call to
+        `Registry.findMany` for each `DatasetType`, and read with
+        `Datastore.getMany`, which may read several concurrently (see the
+        datastore's ``readThreads`` configuration option).  Only a bounded
+        number of datasets are read ahead of the caller.
+        """
+        refs = self._findDatasetRefs(datasetRefOrType, dataIds)
+        # Virtual composites are not in the datastore as a whole, so they are
+        # assembled from their components by getDirect.
+        isVirtual = [self.composites.shouldBeDisassembled(ref.datasetType) for ref in refs]
+        stored = self.datastore.getMany([ref for ref, virtual in zip(refs, isVirtual) if not virtual],
+                                        parameters=parameters, ordered=ordered)
+        if ordered:
+            for ref, virtual in zip(refs, isVirtual):
+                if virtual:
+                    yield ref, self.getDirect(ref, parameters=parameters)
+                else:
+                    yield next(stored)
+        else:
+            yield from stored
+            for ref, virtual in zip(refs, isVirtual):
+                if virtual:
+                    yield ref, self.getDirect(ref, parameters=parameters)
 
     def getUri(self, datasetRefOrType, dataId=None, predict=False, **kwds):
         """Return the URI to the Dataset.
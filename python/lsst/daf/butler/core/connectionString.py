@@ -46,7 +46,7 @@ class ConnectionStringFactory:
     keys = ('username', 'password', 'host', 'port', 'database')
 
     @classmethod
-    def fromConfig(cls, registryConfig):
+    def fromConfig(cls, registryConfig, db=None):
         """Parses the 'db' key in the config, and if they exist username,
         password, host, port and database keys, and returns an connection
         string object.
@@ -59,6 +59,10 @@ class ConnectionStringFactory:
         ----------
         config : `ButlerConfig`, `RegistryConfig`, `Config` or `str`
             Registry configuration
+        db : `str`, optional
+            Connection string to parse instead of the 'db' key, such as an
+            entry of the 'readOnlyDb' list.  Other keys from the config are
+            still used to fill in missing values.
 
         Returns
         -------
@@ -74,7 +78,7 @@ class ConnectionStringFactory:
         # this import can not live on the top because of circular import issue
         from lsst.daf.butler.core.registryConfig import RegistryConfig
         regConf = RegistryConfig(registryConfig)
-        conStr = url.make_url(regConf['db'])
+        conStr = url.make_url(regConf['db'] if db is None else db)
 
         for key in cls.keys:
             if getattr(conStr, key) is None:
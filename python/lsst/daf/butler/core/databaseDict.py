@@ -23,7 +23,7 @@ __all__ = ("DatabaseDict", "DatabaseDictRecordBase")
 
 from dataclasses import fields, asdict
 from collections.abc import MutableMapping
-from typing import Dict, Type, Any, ClassVar, Optional, Sequence
+from typing import Dict, Type, Any, ClassVar, Iterable, Mapping, Optional, Sequence
 
 from lsst.utils import doImport
 from .config import Config
@@ -153,3 +153,45 @@ class DatabaseDict(MutableMapping):
         # This constructor is currently defined just to clearly document the
         # interface subclasses should conform to.
         pass
+
+    def getMany(self, keys: Iterable[Any]) -> Dict[Any, Any]:
+        """Retrieve the values for multiple keys.
+
+        Subclasses should override this to use as few database queries as
+        possible; the default implementation calls ``__getitem__`` for each
+        key.
+
+        Parameters
+        ----------
+        keys : iterable
+            Keys to look up.
+
+        Returns
+        -------
+        values : `dict`
+            Mapping from key to value.  Keys that are not present are
+            omitted.
+        """
+        result = {}
+        for key in keys:
+            try:
+                result[key] = self[key]
+            except KeyError:
+                pass
+        return result
+
+    def setMany(self, mapping: Mapping[Any, Any]):
+        """Set the values for multiple keys, replacing any existing values.
+
+        Subclasses should override this to use as few database statements as
+        possible; the default implementation calls ``__setitem__`` for each
+        key.
+
+        Parameters
+        ----------
+        mapping : `~collections.abc.Mapping` or iterable of `tuple`
+            Mapping from key to value, or an iterable of ``(key, value)``
+            pairs.
+        """
+        for key, value in dict(mapping).items():
+            self[key] = value
@@ -183,6 +183,21 @@ class Datastore(metaclass=ABCMeta):
     constraints: Constraints
     """Constraints to apply when putting datasets into the datastore."""
 
+    readThreads: int
+    """Maximum number of threads used to read datasets concurrently in
+    `getMany`, from the ``readThreads`` configuration option (default 1).
+    Implementations are not required to use more than one."""
+
+    writeThreads: int
+    """Maximum number of threads used to write datasets concurrently in
+    `putMany`, from the ``writeThreads`` configuration option (default 1).
+    Implementations are not required to use more than one."""
+
+    ingestThreads: int
+    """Maximum number of threads used to transfer files concurrently in
+    `ingestMany`, from the ``ingestThreads`` configuration option (default
+    1).  Implementations are not required to use more than one."""
+
     @classmethod
     @abstractmethod
     def setConfigRoot(cls, root: str, config: Config, full: Config, overwrite: bool = True):
@@ -246,6 +261,10 @@ class Datastore(metaclass=ABCMeta):
         constraintsConfig = self.config.get("constraints")
         self.constraints = Constraints(constraintsConfig, universe=self.registry.dimensions)
 
+        self.readThreads = self.config.get("readThreads", 1)
+        self.writeThreads = self.config.get("writeThreads", 1)
+        self.ingestThreads = self.config.get("ingestThreads", 1)
+
     def __str__(self):
         return self.name
 
@@ -286,7 +305,7 @@ class Datastore(metaclass=ABCMeta):
         raise NotImplementedError("Must be implemented by subclass")
 
     @abstractmethod
-    def get(self, datasetRef, parameters=None):
+    def get(self, datasetRef, parameters=None, *, checkSize=True):
         """Load an `InMemoryDataset` from the store.
 
         Parameters
@@ -296,6 +315,10 @@ class Datastore(metaclass=ABCMeta):
         parameters : `dict`
             `StorageClass`-specific parameters that specify a slice of the
             Dataset to be loaded.
+        checkSize : `bool`, optional
+            If `False`, do not check that the size of the stored artifact
+            matches the size recorded when it was written, which saves a
+            file system call for some datastores.
 
         Returns
         -------
@@ -304,6 +327,37 @@ class Datastore(metaclass=ABCMeta):
         """
         raise NotImplementedError("Must be implemented by subclass")
 
+    def getMany(self, datasetRefs, parameters=None, ordered=True):
+        """Load multiple InMemoryDatasets from the store.
+
+        Parameters
+        ----------
+        datasetRefs : iterable of `DatasetRef`
+            References to the required Datasets.
+        parameters : `dict`, optional
+            `StorageClass`-specific parameters that specify a slice of each
+            Dataset to be loaded.
+        ordered : `bool`, optional
+            If `True` (default), yield datasets in the order of
+            ``datasetRefs``; otherwise in the order in which they are read.
+
+        Yields
+        ------
+        ref : `DatasetRef`
+            Reference to the Dataset.
+        inMemoryDataset : `object`
+            Requested Dataset or slice thereof as an InMemoryDataset.
+
+        Notes
+        -----
+        The default implementation calls `get` for each dataset in turn.
+        Subclasses may read datasets concurrently, using up to
+        `readThreads` threads, but must limit the number of datasets that
+        have been read but not yet yielded.
+        """
+        for ref in datasetRefs:
+            yield ref, self.get(ref, parameters=parameters)
+
     @abstractmethod
     def put(self, inMemoryDataset, datasetRef):
         """Write a `InMemoryDataset` with a given `DatasetRef` to the store.
@@ -317,6 +371,27 @@ class Datastore(metaclass=ABCMeta):
         """
         raise NotImplementedError("Must be implemented by subclass")
 
+    def putMany(self, items):
+        """Write multiple InMemoryDatasets to the store.
+
+        Parameters
+        ----------
+        items : iterable of `tuple`
+            Pairs of the `InMemoryDataset` to store and the `DatasetRef`
+            associated with it.
+
+        Notes
+        -----
+        All datasets are written within a single transaction, so if any
+        write fails none of the datasets are stored.  The default
+        implementation calls `put` for each dataset in turn; subclasses may
+        write datasets concurrently, using up to `writeThreads` threads, and
+        record them with bulk operations.
+        """
+        with self.transaction():
+            for inMemoryDataset, ref in items:
+                self.put(inMemoryDataset, ref)
+
     def ingest(self, path, ref, formatter=None, transfer=None):
         """Add an on-disk file with the given `DatasetRef` to the store,
         possibly transferring it.
@@ -363,6 +438,48 @@ class Datastore(metaclass=ABCMeta):
             "Datastore does not support direct file-based ingest."
         )
 
+    def ingestMany(self, paths, refs, formatter=None, transfer=None):
+        """Add multiple on-disk files to the store, possibly transferring
+        them.
+
+        Parameters
+        ----------
+        paths : iterable of `str`
+            File paths, relative to the repository root.
+        refs : iterable of `DatasetRef`
+            References to the associated Datasets, in the same order as
+            ``paths``.
+        formatter : `Formatter` (optional)
+            Formatter that should be used to retrieve all of the Datasets.
+            If not provided, a formatter will be constructed for each
+            according to Datastore configuration.
+        transfer : str (optional)
+            Transfer mode for all files, as for `ingest`.
+
+        Raises
+        ------
+        NotImplementedError
+            Raised if the given transfer mode is not supported.
+        DatasetTypeNotSupportedError
+            One of the associated `DatasetType` is not handled by this
+            datastore.
+
+        Notes
+        -----
+        All files are ingested within a single transaction, so if any
+        ingest fails none of the datasets are stored.  The default
+        implementation calls `ingest` for each file in turn; subclasses may
+        transfer files concurrently, using up to `ingestThreads` threads,
+        and record them with bulk operations.
+        """
+        paths = list(paths)
+        refs = list(refs)
+        if len(paths) != len(refs):
+            raise ValueError(f"Got {len(paths)} paths but {len(refs)} refs to ingest.")
+        with self.transaction():
+            for path, ref in zip(paths, refs):
+                self.ingest(path, ref, formatter=formatter, transfer=transfer)
+
     @abstractmethod
     def getUri(self, datasetRef):
         """URI to the Dataset.
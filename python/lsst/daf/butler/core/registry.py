@@ -31,7 +31,8 @@ from lsst.utils import doImport
 from .config import Config
 from .dimensions import DimensionConfig, DimensionUniverse, DataId, DimensionKeyDict
 from .schema import SchemaConfig
-from .utils import transactional
+from .utils import transactional, iterable
+from .datasets import DatasetType
 from .dataIdPacker import DataIdPackerFactory
 from .registryConfig import RegistryConfig
 
@@ -122,7 +123,8 @@ class Registry(metaclass=ABCMeta):
         This allows explicit values set in external configs to be retained.
         """
         Config.updateParameters(RegistryConfig, config, full,
-                                toCopy=(("skypix", "cls"), ("skypix", "level")), overwrite=overwrite)
+                                toCopy=(("skypix", "cls"), ("skypix", "level"), ("skypix", "ranges")),
+                                overwrite=overwrite)
 
     @staticmethod
     def fromConfig(registryConfig, schemaConfig=None, dimensionConfig=None, create=False, butlerRoot=None):
@@ -205,6 +207,25 @@ class Registry(metaclass=ABCMeta):
         relationships (`bool`)."""
         return self.config.get("limited", False)
 
+    @property
+    def threadSafe(self):
+        """If True, this Registry may be used concurrently from multiple
+        threads, each with its own database connection (`bool`).
+
+        Threads should call `releaseConnection` when they no longer need the
+        registry.
+        """
+        return False
+
+    def releaseConnection(self):
+        """Release any database connection held by the current thread.
+
+        This is a hook provided for `Registry` subclasses that can be used
+        concurrently (see `threadSafe`); the default implementation does
+        nothing.
+        """
+        pass
+
     @contextlib.contextmanager
     def transaction(self):
         """Optionally implemented in `Registry` subclasses to provide exception
@@ -317,6 +338,48 @@ class Registry(metaclass=ABCMeta):
         """
         raise NotImplementedError("Must be implemented by subclass")
 
+    def findMany(self, collections, datasetType, dataIds):
+        """Lookup many datasets of the same `DatasetType`.
+
+        This is equivalent to calling `find` for each data ID, but subclasses
+        may implement it with a small number of bulk queries.
+
+        Parameters
+        ----------
+        collections : `str` or iterable of `str`
+            The collection or collections to search, in order.  For each data
+            ID, the dataset from the first collection in which it is found is
+            returned.
+        datasetType : `DatasetType` or `str`
+            A `DatasetType` or the name of one.
+        dataIds : iterable of `dict` or `DataId`
+            `dict`-like objects containing the `Dimension` links that identify
+            the datasets within a collection.
+
+        Returns
+        -------
+        refs : `dict`
+            A dictionary mapping `DataId` to `DatasetRef`.  Data IDs for which
+            no dataset was found are not included.
+
+        Raises
+        ------
+        LookupError
+            If one or more data ID keys are missing.
+        """
+        if not isinstance(datasetType, DatasetType):
+            datasetType = self.getDatasetType(datasetType)
+        collections = list(iterable(collections))
+        refs = {}
+        for dataId in dataIds:
+            dataId = DataId(dataId, dimensions=datasetType.dimensions, universe=self.dimensions)
+            for collection in collections:
+                ref = self.find(collection, datasetType, dataId)
+                if ref is not None:
+                    refs[dataId] = ref
+                    break
+        return refs
+
     @abstractmethod
     @transactional
     def registerDatasetType(self, datasetType):
@@ -427,6 +490,50 @@ class Registry(metaclass=ABCMeta):
         """
         raise NotImplementedError("Must be implemented by subclass")
 
+    @transactional
+    def addDatasets(self, datasetType, dataIds, run, producer=None, recursive=True):
+        """Add many Dataset entries of the same `DatasetType` to the
+        `Registry`.
+
+        This is equivalent to calling `addDataset` for each element of
+        ``dataIds`` within a single transaction, but subclasses may implement
+        it with bulk database operations.
+
+        Parameters
+        ----------
+        datasetType : `DatasetType` or `str`
+            A `DatasetType` or the name of one.
+        dataIds : iterable of `dict` or `DataId`
+            `dict`-like objects containing the `Dimension` links that identify
+            each dataset within a collection.
+        run : `Run`
+            The `Run` instance that produced the Datasets.
+        producer : `Quantum`
+            Unit of work that produced the Datasets.  May be `None` to store
+            no provenance information, but if present the `Quantum` must
+            already have been added to the Registry.
+        recursive : `bool`
+            If True, recursively add Dataset and attach entries for component
+            Datasets as well.
+
+        Returns
+        -------
+        refs : `list` of `DatasetRef`
+            Newly-created `DatasetRef` instances, in the same order as
+            ``dataIds``.
+
+        Raises
+        ------
+        ConflictingDefinitionError
+            If a Dataset with one of the given data IDs already exists in the
+            given collection, or if ``dataIds`` contains duplicates.
+
+        Exception
+            If a data ID contains unknown or invalid `Dimension` entries.
+        """
+        return [self.addDataset(datasetType, dataId, run=run, producer=producer, recursive=recursive)
+                for dataId in dataIds]
+
     @abstractmethod
     def getDataset(self, id, datasetType=None, dataId=None):
         """Retrieve a Dataset entry.
@@ -576,6 +683,28 @@ class Registry(metaclass=ABCMeta):
         # `dataset_id`?
         raise NotImplementedError("Must be implemented by subclass")
 
+    @transactional
+    def addDatasetLocations(self, refs, datastoreName):
+        """Add datastore name locating multiple datasets.
+
+        This is equivalent to calling `addDatasetLocation` for each dataset,
+        but subclasses may implement it with a single bulk insert.
+
+        Parameters
+        ----------
+        refs : iterable of `DatasetRef`
+            References to the datasets for which to add storage information.
+        datastoreName : `str`
+            Name of the datastore holding these datasets.
+
+        Raises
+        ------
+        AmbiguousDatasetError
+            Raised if ``ref.id`` is `None` for any dataset.
+        """
+        for ref in refs:
+            self.addDatasetLocation(ref, datastoreName)
+
     @abstractmethod
     def getDatasetLocations(self, ref):
         """Retrieve datastore locations for a given dataset.
@@ -980,8 +1109,73 @@ class Registry(metaclass=ABCMeta):
             Raised if `limited` is `True`.
         """
         dataId = DataId(dataId, dimension=dimension, universe=self.dimensions, **kwds)
+        self._expandDataIdGroup([dataId], dimension=dimension, metadata=metadata, region=region,
+                                update=update)
+        return dataId
+
+    @disableWhenLimited
+    def expandDataIds(self, dataIds, *, dimension=None, metadata=None, region=False, update=False):
+        """Expand many data IDs to include additional information.
+
+        This is equivalent to calling `expandDataId` on each data ID, but
+        metadata for each `DimensionElement` is retrieved for all data IDs
+        at once (see `_queryMetadataMany`).
+
+        Parameters
+        ----------
+        dataIds : iterable of `dict` or `DataId`
+            `dict`-like objects containing the `Dimension` links that include
+            the primary keys of the rows to query.  True `DataId` instances
+            are updated in-place.
+        dimension : `Dimension` or `str`
+            A dimension passed to the `DataId` constructor to create true
+            `DataId` objects or augment existing ones.
+        metadata : `collections.abc.Mapping`, optional
+            A mapping from `Dimension` or `str` name to column name, indicating
+            fields to read into ``dataId.entries``.
+            If ``dimension`` is provided, may instead be a sequence of column
+            names for that dimension.
+        region : `bool`
+            If `True`, obtain the regions associated with the data IDs from
+            the `Registry` and attach them as ``dataId.region``.
+        update : `bool`
+            If `True`, assume existing entries and regions in the given
+            data IDs are out-of-date and should be updated by values in the
+            database.
+
+        Returns
+        -------
+        dataIds : `list` of `DataId`
+            Data IDs with all requested data populated, in the same order as
+            the given ones.
+
+        Raises
+        ------
+        NotImplementedError
+            Raised if `limited` is `True`.
+        """
+        dataIds = [DataId(dataId, dimension=dimension, universe=self.dimensions) for dataId in dataIds]
+        # The traversal below requires all data IDs in a batch to have the
+        # same dimensions.
+        groups = {}
+        for dataId in dataIds:
+            groups.setdefault(dataId.dimensions(), []).append(dataId)
+        for group in groups.values():
+            self._expandDataIdGroup(group, dimension=dimension, metadata=metadata, region=region,
+                                    update=update)
+        return dataIds
+
+    def _expandDataIdGroup(self, dataIds, *, dimension=None, metadata=None, region=False, update=False):
+        """Implementation of `expandDataId` and `expandDataIds` for a list of
+        true `DataId` objects that all have the same dimensions.
+
+        Arguments are the same as those of `expandDataIds`, except that
+        ``dataIds`` must be a non-empty `list` of `DataId`, which are updated
+        in-place.
+        """
+        graph = dataIds[0].dimensions()
 
-        fieldsToGet = DimensionKeyDict(keys=dataId.dimensions(implied=True).elements, factory=set)
+        fieldsToGet = DimensionKeyDict(keys=dataIds[0].dimensions(implied=True).elements, factory=set)
         fieldsToGet.updateValues(self._fieldsToAlwaysGet)
 
         # Interpret the 'metadata' argument and initialize the 'fieldsToGet'
@@ -996,25 +1190,30 @@ class Registry(metaclass=ABCMeta):
             else:
                 fieldsToGet.updateValues(metadata)
 
-        # If 'region' was passed, add a query for that to fieldsToGet as well.
-        if region and (update or dataId.region is None):
-            holder = dataId.dimensions().getRegionHolder()
-            if holder is not None:
-                if holder.name == "skypix":
-                    # skypix is special; we always obtain those regions from
-                    # self.pixelization
-                    dataId.region = self.pixelization.pixel(dataId["skypix"])
-                else:
-                    fieldsToGet[holder].add("region")
-
-        # We now process fieldsToGet with calls to _queryMetadata via a
-        # depth-first traversal of the dependency graph.  As we traverse, we
-        # update...
-
-        # A dictionary containing all link values.  This starts with the given
-        # dataId, but we'll update it to include links for optional
+        # If 'region' was passed, note which data IDs need a query for the
+        # region of the holder element.
+        regionHolder = None
+        regionNeeded = [False]*len(dataIds)
+        if region:
+            holder = graph.getRegionHolder()
+            for i, dataId in enumerate(dataIds):
+                if holder is not None and (update or dataId.region is None):
+                    if holder.name == "skypix":
+                        # skypix is special; we always obtain those regions
+                        # from self.pixelization
+                        dataId.region = self.pixelization.pixel(dataId["skypix"])
+                    else:
+                        regionHolder = holder
+                        regionNeeded[i] = True
+
+        # We now process fieldsToGet with calls to _queryMetadataMany via a
+        # depth-first traversal of the dependency graph, which is the same
+        # for all data IDs.  As we traverse, we update...
+
+        # Dictionaries containing all link values.  These start with the
+        # given data IDs, but we'll update them to include links for optional
         # dependencies.
-        allLinks = dict(dataId)
+        allLinks = [dict(dataId) for dataId in dataIds]
 
         # A set of DimensionElement names recording the vertices we've
         # processed:
@@ -1023,34 +1222,48 @@ class Registry(metaclass=ABCMeta):
         def visit(element):
             if element.name in visited:
                 return
-            assert element.links() <= allLinks.keys()
-            entries = dataId.entries[element]
             dependencies = element.dependencies(implied=True)
-            # Get the set of fields we want to retrieve.
-            fieldsToGetNow = fieldsToGet[element]
-            # Note which links to dependencies we need to query for and which
-            # we already know.  Make sure the ones we know are in the entries
-            # dict for this element.
-            linksWeKnow = dependencies.links().intersection(allLinks.keys())
-            linksWeNeed = dependencies.links() - linksWeKnow
-            fieldsToGetNow |= linksWeNeed
-            entries.update((link, allLinks[link]) for link in linksWeKnow)
-            # Remove fields that are already present in the dataId.
-            if not update:
-                fieldsToGetNow -= entries.keys()
-            # Remove fields that are part of the primary key of this element;
-            # we have to already know those if the query is going to work.
-            # (and we asserted that we do know them up at the top).
-            fieldsToGetNow -= element.links()
+            # For each data ID, the set of fields we want to retrieve.
+            toQuery = []
+            for i, dataId in enumerate(dataIds):
+                links = allLinks[i]
+                assert element.links() <= links.keys()
+                entries = dataId.entries[element]
+                fieldsToGetNow = set(fieldsToGet[element])
+                if element == regionHolder and regionNeeded[i]:
+                    fieldsToGetNow.add("region")
+                # Note which links to dependencies we need to query for and
+                # which we already know.  Make sure the ones we know are in
+                # the entries dict for this element.
+                linksWeKnow = dependencies.links().intersection(links.keys())
+                linksWeNeed = dependencies.links() - linksWeKnow
+                fieldsToGetNow |= linksWeNeed
+                entries.update((link, links[link]) for link in linksWeKnow)
+                # Remove fields that are already present in the dataId.
+                if not update:
+                    fieldsToGetNow -= entries.keys()
+                # Remove fields that are part of the primary key of this
+                # element; we have to already know those if the query is going
+                # to work (and we asserted that we do know them up at the
+                # top).
+                fieldsToGetNow -= element.links()
+                if fieldsToGetNow:
+                    toQuery.append((i, fieldsToGetNow))
             # Actually do the query - only if there's actually anything left
-            # to query.  Put the results in the entries dict.
-            if fieldsToGetNow:
-                result = self._queryMetadata(element, allLinks, fieldsToGetNow)
-                if "region" in result:
-                    dataId.region = result.pop("region")
-                entries.update(result)
-            # Update the running dictionary of link values and the marker set.
-            allLinks.update((link, entries[link]) for link in dependencies.links())
+            # to query.  Put the results in the entries dicts.
+            if toQuery:
+                columns = set().union(*(fields for _, fields in toQuery))
+                results = self._queryMetadataMany(element, [allLinks[i] for i, _ in toQuery], columns)
+                for (i, fields), result in zip(toQuery, results):
+                    result = {field: result[field] for field in fields}
+                    if "region" in result:
+                        dataIds[i].region = result.pop("region")
+                    dataIds[i].entries[element].update(result)
+            # Update the running dictionaries of link values and the marker
+            # set.
+            for dataId, links in zip(dataIds, allLinks):
+                entries = dataId.entries[element]
+                links.update((link, entries[link]) for link in dependencies.links())
             visited.add(element.name)
             # Recurse to dependencies.  Note that at this point we know that
             # allLinks has all of the links for any element we're recursing to,
@@ -1061,16 +1274,14 @@ class Registry(metaclass=ABCMeta):
 
         # Kick off the traversal with joins, which are never dependencies of
         # any other elements.
-        for join in dataId.dimensions().joins():
+        for join in graph.joins():
             visit(join)
 
         # Now traverse over the dimensions that are not dependencies of any
         # other dependencies in this particular graph.
-        for dim in dataId.dimensions().leaves:
+        for dim in graph.leaves:
             visit(dim)
 
-        return dataId
-
     @abstractmethod
     @disableWhenLimited
     def _queryMetadata(self, element, dataId, columns):
@@ -1106,6 +1317,40 @@ class Registry(metaclass=ABCMeta):
         """
         raise NotImplementedError("Must be implemented by subclass")
 
+    @disableWhenLimited
+    def _queryMetadataMany(self, element, dataIds, columns):
+        """Get metadata associated with many data IDs.
+
+        This is conceptually a "protected" method that may be overridden by
+        subclasses to retrieve metadata in bulk; the default implementation
+        calls `_queryMetadata` for each data ID.
+
+        Parameters
+        ----------
+        element : `DimensionElement`
+            The `Dimension` or `DimensionJoin` to query for column values.
+        dataIds : `list` of `dict` or `DataId`
+            `dict`-like objects containing the `Dimension` links that include
+            the primary keys of the rows to query.  May include link fields
+            beyond those required to identify ``element``.
+        columns : iterable of `str`
+            String column names to query values for.
+
+        Returns
+        -------
+        metadata : `list` of `dict`
+            Dictionaries that map column name to value, in the same order as
+            ``dataIds``.
+
+        Raises
+        ------
+        LookupError
+            Raised if no entry for one of the given data IDs exists.
+        NotImplementedError
+            Raised if `limited` is `True`.
+        """
+        return [self._queryMetadata(element, dataId, columns) for dataId in dataIds]
+
     def makeDataIdPacker(self, name, dataId=None, **kwds):
         """Create an object that can pack certain data IDs into integers.
 
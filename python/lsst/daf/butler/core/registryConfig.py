@@ -70,3 +70,11 @@ class RegistryConfig(ConfigSubset):
         (`sqlalchemy.engine.url.URL`).
         """
         return ConnectionStringFactory.fromConfig(self)
+
+    @property
+    def readOnlyConnectionStrings(self):
+        """Return the connection strings to the read-only replicas of the
+        database listed in the `readOnlyDb` key (`list` of
+        `sqlalchemy.engine.url.URL`).
+        """
+        return [ConnectionStringFactory.fromConfig(self, db=db) for db in (self.get("readOnlyDb") or ())]
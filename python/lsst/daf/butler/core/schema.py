@@ -21,7 +21,10 @@
 
 __all__ = ("SchemaConfig", "Schema", "SchemaBuilder")
 
+import hashlib
+import threading
 from base64 import b64encode, b64decode
+from collections import OrderedDict
 from math import ceil
 
 from .utils import iterable, stripIfNotNone
@@ -29,7 +32,7 @@ from .views import View
 from .config import ConfigSubset
 from sqlalchemy import Column, String, Integer, Boolean, LargeBinary, DateTime,\
     Float, ForeignKeyConstraint, Table, MetaData, TypeDecorator, UniqueConstraint,\
-    Sequence
+    Sequence, Index
 
 from lsst.sphgeom import ConvexPolygon
 
@@ -74,13 +77,85 @@ class Base64Region(TypeDecorator):
 
     impl = LargeBinary
 
+    cacheSize = 10000
+    """Maximum number of decoded regions kept in the cache shared by all
+    instances (`int`); ``0`` disables the cache.
+    """
+
+    _cache = OrderedDict()
+    _cacheLock = threading.Lock()
+    hits = 0
+    misses = 0
+
+    @staticmethod
+    def _makeCacheKey(encoded):
+        return hashlib.blake2b(encoded, digest_size=16).digest()
+
+    @classmethod
+    def _remember(cls, key, region):
+        # Must be called with _cacheLock held.
+        cls._cache[key] = region
+        cls._cache.move_to_end(key)
+        while len(cls._cache) > cls.cacheSize:
+            cls._cache.popitem(last=False)
+
+    @classmethod
+    def decode(cls, encoded):
+        """Decode a region as stored in the database.
+
+        The same region is read again by most spatial queries and data ID
+        expansions, so decoded regions are kept in a bounded
+        least-recently-used cache keyed by a digest of the encoded value.
+
+        Parameters
+        ----------
+        encoded : `bytes` or `None`
+            Base64-encoded region.
+
+        Returns
+        -------
+        region : `lsst.sphgeom.ConvexPolygon` or `None`
+            Decoded region (possibly shared with other callers), or `None` if
+            ``encoded`` is `None`.
+        """
+        if encoded is None:
+            return None
+        if cls.cacheSize == 0:
+            return ConvexPolygon.decode(b64decode(encoded))
+        key = cls._makeCacheKey(encoded)
+        with cls._cacheLock:
+            region = cls._cache.get(key)
+            if region is not None:
+                cls.hits += 1
+                cls._cache.move_to_end(key)
+                return region
+            cls.misses += 1
+        region = ConvexPolygon.decode(b64decode(encoded))
+        with cls._cacheLock:
+            cls._remember(key, region)
+        return region
+
+    @classmethod
+    def clearCache(cls):
+        """Remove all regions from the decoded-region cache.
+        """
+        with cls._cacheLock:
+            cls._cache.clear()
+
     def process_bind_param(self, value, dialect):
         if value is None:
             return None
-        return b64encode(value.encode())
+        encoded = b64encode(value.encode())
+        if self.cacheSize != 0:
+            # Regions are usually read back soon after being written, e.g.
+            # by spatial queries; save decoding them again.
+            key = self._makeCacheKey(encoded)
+            with self._cacheLock:
+                self._remember(key, value)
+        return encoded
 
     def process_result_value(self, value, dialect):
-        return ConvexPolygon.decode(b64decode(value)) if value is not None else None
+        return self.decode(value)
 
 
 class SchemaConfig(ConfigSubset):
@@ -212,6 +287,10 @@ class SchemaBuilder:
             - columns, a list of column descriptions
             - foreignKeys, a list of foreign-key constraint descriptions
 
+            Optional:
+            - unique, a list of lists of column names with unique values
+            - indexes, a list of lists of column names to index
+
         Raises
         ------
         ValueError
@@ -244,6 +323,9 @@ class SchemaBuilder:
         if "unique" in tableDescription:
             for columns in tableDescription["unique"]:
                 table.append_constraint(UniqueConstraint(*columns))
+        if "indexes" in tableDescription and not self.isView(tableName):
+            for columns in tableDescription["indexes"]:
+                Index("{}_{}_idx".format(tableName, "_".join(columns)), *[table.columns[c] for c in columns])
         return table
 
     def addColumn(self, table, columnDescription):
@@ -22,11 +22,12 @@
 __all__ = ("iterable", "allSlots", "slotValuesAreEqual", "slotValuesToHash",
            "getFullTypeName", "getInstanceOf", "Singleton", "transactional",
            "getObjectSize", "stripIfNotNone", "PrivateConstructorMeta",
-           "NamedKeyDict")
+           "NamedKeyDict", "chunked")
 
 import builtins
 import sys
 import functools
+import itertools
 from collections.abc import MutableMapping
 
 from lsst.utils import doImport
@@ -61,6 +62,31 @@ def iterable(a):
         yield a
 
 
+def chunked(iterable, size):
+    """Split an iterable into lists of at most ``size`` elements.
+
+    Parameters
+    ----------
+    iterable : iterable
+        Elements to be split.
+    size : `int`
+        Maximum number of elements in each chunk.  Must be positive.
+
+    Yields
+    ------
+    chunk : `list`
+        The next group of (at most ``size``) consecutive elements.
+    """
+    if size < 1:
+        raise ValueError(f"Chunk size must be positive, not {size}.")
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
 def allSlots(self):
     """
     Return combined ``__slots__`` for all classes in objects mro.
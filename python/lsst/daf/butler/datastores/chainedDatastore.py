@@ -204,7 +204,7 @@ class ChainedDatastore(Datastore):
                 return True
         return False
 
-    def get(self, ref, parameters=None):
+    def get(self, ref, parameters=None, *, checkSize=True):
         """Load an InMemoryDataset from the store.
 
         The dataset is returned from the first datastore that has
@@ -217,6 +217,10 @@ class ChainedDatastore(Datastore):
         parameters : `dict`
             `StorageClass`-specific parameters that specify, for example,
             a slice of the Dataset to be loaded.
+        checkSize : `bool`, optional
+            If `False`, do not check that the size of the stored artifact
+            matches the size recorded when it was written, which saves a
+            file system call for some datastores.
 
         Returns
         -------
@@ -235,7 +239,7 @@ class ChainedDatastore(Datastore):
 
         for datastore in self.datastores:
             try:
-                inMemoryObject = datastore.get(ref, parameters)
+                inMemoryObject = datastore.get(ref, parameters, checkSize=checkSize)
                 log.debug("Found Dataset %s in datastore %s", ref, datastore.name)
                 return inMemoryObject
             except FileNotFoundError:
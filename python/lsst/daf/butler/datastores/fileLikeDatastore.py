@@ -23,7 +23,11 @@
 
 __all__ = ("FileLikeDatastore", )
 
+import itertools
 import logging
+import threading
+from collections import deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 from dataclasses import dataclass
 from typing import ClassVar, Type, Optional
@@ -67,7 +71,7 @@ class DatastoreRecord(DatabaseDictRecordBase):
     file_size: int
     checksum: str
 
-    lengths = {"path": 256, "formatter": 128, "storage_class": 64, "checksum": 128}
+    lengths = {"path": 256, "formatter": 128, "storage_class": 64, "checksum": 160}
     """Lengths of string fields."""
 
 
@@ -136,6 +140,14 @@ class FileLikeDatastore(GenericBaseDatastore):
     records: DatabaseDict
     """Place to store internal records about datasets."""
 
+    defaultRecordCacheSize: ClassVar[int] = 10000
+    """Default maximum number of `StoredFileInfo` records cached in memory,
+    if not set by the ``recordCacheSize`` configuration option."""
+
+    prefetchBatchSize: ClassVar[int] = 100
+    """Number of datasets whose `StoredFileInfo` records are looked up
+    together by `getMany`."""
+
     @classmethod
     def setConfigRoot(cls, root, config, full, overwrite=True):
         """Set any filesystem-dependent config options for this Datastore to
@@ -206,6 +218,12 @@ class FileLikeDatastore(GenericBaseDatastore):
                                                value=self.Record, key="dataset_id",
                                                registry=registry)
 
+        # Least-recently-used cache of StoredFileInfo, keyed by dataset ID,
+        # to avoid a database query for every read of the same dataset.
+        self._recordCacheSize = self.config.get("recordCacheSize", self.defaultRecordCacheSize)
+        self._recordCache = OrderedDict()
+        self._recordCacheLock = threading.Lock()
+
     def __str__(self):
         return self.root
 
@@ -248,6 +266,77 @@ class FileLikeDatastore(GenericBaseDatastore):
                               checksum=record.checksum,
                               file_size=record.file_size)
 
+    def _cacheStoredItemInfo(self, datasetId, info):
+        """Add stored file information to the in-memory cache, evicting the
+        least recently used entry if it is full.
+
+        If a transaction is in progress, the entry is removed again if the
+        transaction is rolled back, since the dataset ID may then be reused.
+        """
+        if self._recordCacheSize == 0:
+            return
+        with self._recordCacheLock:
+            self._recordCache[datasetId] = info
+            self._recordCache.move_to_end(datasetId)
+            while len(self._recordCache) > self._recordCacheSize:
+                self._recordCache.popitem(last=False)
+        if self._transaction is not None:
+            self._transaction.registerUndo("cache", self._uncacheStoredItemInfo, datasetId)
+
+    def _uncacheStoredItemInfo(self, datasetId):
+        """Remove stored file information from the in-memory cache, if
+        present.
+        """
+        with self._recordCacheLock:
+            self._recordCache.pop(datasetId, None)
+
+    def addStoredItemInfo(self, ref, info):
+        # Docstring inherited from GenericBaseDatastore.addStoredItemInfo.
+        super().addStoredItemInfo(ref, info)
+        self._cacheStoredItemInfo(ref.id, info)
+
+    def getStoredItemInfo(self, ref):
+        # Docstring inherited from GenericBaseDatastore.getStoredItemInfo.
+        with self._recordCacheLock:
+            info = self._recordCache.get(ref.id)
+            if info is not None:
+                self._recordCache.move_to_end(ref.id)
+                return info
+        info = super().getStoredItemInfo(ref)
+        self._cacheStoredItemInfo(ref.id, info)
+        return info
+
+    def removeStoredItemInfo(self, ref):
+        # Docstring inherited from GenericBaseDatastore.removeStoredItemInfo.
+        self._uncacheStoredItemInfo(ref.id)
+        super().removeStoredItemInfo(ref)
+
+    def _register_datasets(self, refsAndInfos):
+        # Docstring inherited from GenericBaseDatastore._register_datasets.
+        super()._register_datasets(refsAndInfos)
+        for ref, info in refsAndInfos:
+            self._cacheStoredItemInfo(ref.id, info)
+            for compRef in ref.components.values():
+                self._cacheStoredItemInfo(compRef.id, info)
+
+    def _prefetchStoredItemInfo(self, refs):
+        """Load stored file information for multiple datasets into the cache
+        using bulk queries.
+
+        Parameters
+        ----------
+        refs : iterable of `DatasetRef`
+            Datasets whose information will be needed soon.
+        """
+        if self._recordCacheSize == 0 or not isinstance(self.records, DatabaseDict):
+            return
+        with self._recordCacheLock:
+            missing = {ref.id for ref in refs if ref.id not in self._recordCache}
+        if not missing:
+            return
+        for datasetId, record in self.records.getMany(missing).items():
+            self._cacheStoredItemInfo(datasetId, self._record_to_info(record))
+
     def _get_dataset_location_info(self, ref):
         """Find the `Location` of the requested dataset in the
         `Datastore` and the associated stored file information.
@@ -319,6 +408,110 @@ class FileLikeDatastore(GenericBaseDatastore):
         return DatastoreFileGetInformation(location, formatter, storedFileInfo,
                                            assemblerParams, component, readStorageClass)
 
+    def _read_prepared(self, ref, getInfo, checkSize=True):
+        """Read a dataset whose location and formatter have already been
+        obtained with `_prepare_for_get`.
+
+        This does not use the registry, so it may be called from threads
+        other than the one that owns the registry connection.
+
+        Parameters
+        ----------
+        ref : `DatasetRef`
+            Reference to the required Dataset.
+        getInfo : `DatastoreFileGetInformation`
+            Parameters needed to retrieve the file.
+        checkSize : `bool`, optional
+            If `False`, do not check that the size of the file matches the
+            size recorded when it was written.
+
+        Returns
+        -------
+        inMemoryDataset : `object`
+            Requested Dataset or slice thereof as an InMemoryDataset.
+        """
+        raise NotImplementedError("Must be implemented by subclass")
+
+    def get(self, ref, parameters=None, *, checkSize=True):
+        """Load an InMemoryDataset from the store.
+
+        Parameters
+        ----------
+        ref : `DatasetRef`
+            Reference to the required Dataset.
+        parameters : `dict`
+            `StorageClass`-specific parameters that specify, for example,
+            a slice of the Dataset to be loaded.
+        checkSize : `bool`, optional
+            If `False`, do not check that the size of the stored artifact
+            matches the size recorded when it was written, which saves a
+            file system call for some datastores.
+
+        Returns
+        -------
+        inMemoryDataset : `object`
+            Requested Dataset or slice thereof as an InMemoryDataset.
+
+        Raises
+        ------
+        FileNotFoundError
+            Requested dataset can not be retrieved.
+        TypeError
+            Return value from formatter has unexpected type.
+        ValueError
+            Formatter failed to process the dataset.
+        """
+        getInfo = self._prepare_for_get(ref, parameters)
+        return self._read_prepared(ref, getInfo, checkSize=checkSize)
+
+    def getMany(self, datasetRefs, parameters=None, ordered=True):
+        # Docstring inherited from Datastore.getMany.
+        if self.readThreads <= 1:
+            yield from super().getMany(datasetRefs, parameters=parameters, ordered=ordered)
+            return
+        # Stored file information is looked up in this thread, because the
+        # registry connection may not be usable from others; only the reads
+        # themselves are done concurrently.  At most maxPending datasets are
+        # read ahead of the caller.
+        maxPending = 2*self.readThreads
+        # Map from future to ref if unordered, otherwise a queue of
+        # (ref, future) in the order they were given.
+        pending = deque() if ordered else {}
+
+        def drain(limit):
+            while len(pending) > limit:
+                if ordered:
+                    ref, future = pending.popleft()
+                    yield ref, future.result()
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield pending.pop(future), future.result()
+
+        datasetRefs = iter(datasetRefs)
+        with ThreadPoolExecutor(max_workers=self.readThreads) as executor:
+            try:
+                while True:
+                    # Look up stored file information in batches, so most
+                    # of it comes from the cache.
+                    batch = list(itertools.islice(datasetRefs, self.prefetchBatchSize))
+                    if not batch:
+                        break
+                    self._prefetchStoredItemInfo(batch)
+                    for ref in batch:
+                        getInfo = self._prepare_for_get(ref, parameters)
+                        future = executor.submit(self._read_prepared, ref, getInfo)
+                        if ordered:
+                            pending.append((ref, future))
+                        else:
+                            pending[future] = ref
+                        yield from drain(maxPending - 1)
+                yield from drain(0)
+            finally:
+                # Don't start reads whose results will never be used.
+                for future in ([future for _, future in pending] if ordered else pending):
+                    future.cancel()
+
     def _prepare_for_put(self, inMemoryDataset, ref):
         """Check the arguments for ``put`` and obtain formatter and
         location.
@@ -145,6 +145,30 @@ class GenericBaseDatastore(Datastore):
             self.registry.addDatasetLocation(compRef, self.name)
             self.addStoredItemInfo(compRef, itemInfo)
 
+    def _register_datasets(self, refsAndInfos):
+        """Update registry to indicate that multiple datasets have been
+        stored, using bulk operations where possible.
+
+        Parameters
+        ----------
+        refsAndInfos : `list` of `tuple`
+            Pairs of `DatasetRef` to register and the internal datastore
+            metadata (`StoredDatastoreItemInfo`) associated with it.
+
+        Notes
+        -----
+        Unlike `_register_dataset`, this does not check that no information
+        is already stored for each dataset ID; it should only be used for
+        datasets that have just been added to the registry.
+        """
+        expanded = []
+        for ref, itemInfo in refsAndInfos:
+            expanded.append((ref, itemInfo))
+            # Register all components with same information
+            expanded.extend((compRef, itemInfo) for compRef in ref.components.values())
+        self.registry.addDatasetLocations([ref for ref, _ in expanded], self.name)
+        self.records.update((ref.id, self._info_to_record(itemInfo)) for ref, itemInfo in expanded)
+
     def _remove_from_registry(self, ref):
         """Remove rows from registry.
 
@@ -197,7 +197,7 @@ class InMemoryDatastore(GenericBaseDatastore):
             thisref = storedItemInfo.parentID
         return thisref in self.datasets
 
-    def get(self, ref, parameters=None):
+    def get(self, ref, parameters=None, *, checkSize=True):
         """Load an InMemoryDataset from the store.
 
         Parameters
@@ -207,6 +207,8 @@ class InMemoryDatastore(GenericBaseDatastore):
         parameters : `dict`
             `StorageClass`-specific parameters that specify, for example,
             a slice of the Dataset to be loaded.
+        checkSize : `bool`, optional
+            Ignored; datasets in memory have no stored size.
 
         Returns
         -------
@@ -23,12 +23,15 @@
 
 __all__ = ("PosixDatastore", )
 
+import dataclasses
 import hashlib
 import logging
 import os
 import shutil
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 
-from lsst.daf.butler import DatasetTypeNotSupportedError
+from lsst.daf.butler import DatabaseDict, DatasetTypeNotSupportedError, StoredFileInfo
 
 from .fileLikeDatastore import FileLikeDatastore
 from lsst.daf.butler.core.safeFileIo import safeMakeDir
@@ -36,6 +39,32 @@ from lsst.daf.butler.core.utils import transactional
 
 log = logging.getLogger(__name__)
 
+_ZLIB_CHECKSUMS = {"adler32": zlib.adler32, "crc32": zlib.crc32}
+"""Fast non-cryptographic checksums that may be used instead of a `hashlib`
+algorithm.
+"""
+
+_LEGACY_CHECKSUM_ALGORITHM = "blake2b"
+"""Algorithm of recorded checksums that do not name one; the only algorithm
+used before it became configurable.
+"""
+
+
+class _ZlibChecksum:
+    """Adapter giving a `zlib` checksum function the interface of a
+    `hashlib` hash object.
+    """
+
+    def __init__(self, func):
+        self._func = func
+        self._value = func(b"")
+
+    def update(self, data):
+        self._value = self._func(data, self._value)
+
+    def hexdigest(self):
+        return f"{self._value:08x}"
+
 
 class PosixDatastore(FileLikeDatastore):
     """Basic POSIX filesystem backed Datastore.
@@ -61,9 +90,26 @@ class PosixDatastore(FileLikeDatastore):
     absolute path. Can be None if no defaults specified.
     """
 
+    _transferModes = ("move", "copy", "hardlink", "symlink")
+    """Transfer modes supported by `ingest`."""
+
+    checksumAlgorithm: str
+    """Algorithm used to compute file checksums, from the
+    ``checksum.algorithm`` configuration option (default "blake2b")."""
+
+    deferChecksums: bool
+    """If `True`, checksums are not computed when datasets are stored, and
+    must be filled in later by `verifyChecksums`; from the
+    ``checksum.deferred`` configuration option (default `False`)."""
+
     def __init__(self, config, registry, butlerRoot=None):
         super().__init__(config, registry, butlerRoot)
 
+        self.checksumAlgorithm = self.config.get(("checksum", "algorithm"), "blake2b")
+        self.deferChecksums = self.config.get(("checksum", "deferred"), False)
+        # Check the algorithm now rather than on the first put
+        self._makeHasher(self.checksumAlgorithm)
+
         if not os.path.isdir(self.root):
             if "create" not in self.config or not self.config["create"]:
                 raise ValueError(f"No valid root at: {self.root}")
@@ -87,54 +133,73 @@ class PosixDatastore(FileLikeDatastore):
             return False
         return os.path.exists(location.path)
 
-    def get(self, ref, parameters=None):
-        """Load an InMemoryDataset from the store.
+    def _read_prepared(self, ref, getInfo, checkSize=True):
+        # Docstring inherited from FileLikeDatastore._read_prepared.
+        location = getInfo.location
+
+        # Too expensive to recalculate the checksum on fetch
+        # but we can check size and existence
+        if checkSize:
+            try:
+                size = os.stat(location.path).st_size
+            except FileNotFoundError:
+                raise FileNotFoundError("Dataset with Id {} does not seem to exist at"
+                                        " expected location of {}".format(ref.id, location.path)) from None
+            storedFileInfo = getInfo.info
+            if size != storedFileInfo.file_size:
+                raise RuntimeError("Integrity failure in Datastore. Size of file {} ({}) does not"
+                                   " match recorded size of {}".format(location.path, size,
+                                                                       storedFileInfo.file_size))
+
+        formatter = getInfo.formatter
+        try:
+            result = formatter.read(component=getInfo.component)
+        except Exception as e:
+            if not checkSize and not os.path.exists(location.path):
+                raise FileNotFoundError("Dataset with Id {} does not seem to exist at"
+                                        " expected location of {}".format(ref.id, location.path)) from e
+            raise ValueError(f"Failure from formatter '{formatter.name()}' for Dataset {ref.id}") from e
+
+        return self._post_process_get(result, getInfo.readStorageClass, getInfo.assemblerParams)
+
+    def _prepare_for_write(self, inMemoryDataset, ref, pending=()):
+        """Check that a dataset can be written and create the directory it
+        will be written to.
 
         Parameters
         ----------
+        inMemoryDataset : `object`
+            The Dataset to store.
         ref : `DatasetRef`
-            Reference to the required Dataset.
-        parameters : `dict`
-            `StorageClass`-specific parameters that specify, for example,
-            a slice of the Dataset to be loaded.
+            Reference to the associated Dataset.
+        pending : `set` of `str`, optional
+            Full paths of files that are about to be written by the same
+            operation, which are treated as if they already exist.
 
         Returns
         -------
-        inMemoryDataset : `object`
-            Requested Dataset or slice thereof as an InMemoryDataset.
+        formatter : `Formatter`
+            The `Formatter` to use to write the dataset.
+        predictedFullPath : `str`
+            Full path of the file the formatter will write.
 
         Raises
         ------
-        FileNotFoundError
-            Requested dataset can not be retrieved.
-        TypeError
-            Return value from formatter has unexpected type.
-        ValueError
-            Formatter failed to process the dataset.
+        FileExistsError
+            The file the dataset would be written to already exists.
         """
-        getInfo = self._prepare_for_get(ref, parameters)
-        location = getInfo.location
-
-        # Too expensive to recalculate the checksum on fetch
-        # but we can check size and existence
-        if not os.path.exists(location.path):
-            raise FileNotFoundError("Dataset with Id {} does not seem to exist at"
-                                    " expected location of {}".format(ref.id, location.path))
-        stat = os.stat(location.path)
-        size = stat.st_size
-        storedFileInfo = getInfo.info
-        if size != storedFileInfo.file_size:
-            raise RuntimeError("Integrity failure in Datastore. Size of file {} ({}) does not"
-                               " match recorded size of {}".format(location.path, size,
-                                                                   storedFileInfo.file_size))
+        location, formatter = self._prepare_for_put(inMemoryDataset, ref)
 
-        formatter = getInfo.formatter
-        try:
-            result = formatter.read(component=getInfo.component)
-        except Exception as e:
-            raise ValueError(f"Failure from formatter '{formatter.name()}' for Dataset {ref.id}") from e
+        storageDir = os.path.dirname(location.path)
+        if not os.path.isdir(storageDir):
+            with self._transaction.undoWith("mkdir", os.rmdir, storageDir):
+                safeMakeDir(storageDir)
 
-        return self._post_process_get(result, getInfo.readStorageClass, getInfo.assemblerParams)
+        predictedFullPath = os.path.join(self.root, formatter.predictPath())
+        if os.path.exists(predictedFullPath) or predictedFullPath in pending:
+            raise FileExistsError(f"Cannot write file for ref {ref} as "
+                                  f"output file {predictedFullPath} already exists")
+        return formatter, predictedFullPath
 
     @transactional
     def put(self, inMemoryDataset, ref):
@@ -162,20 +227,9 @@ class PosixDatastore(FileLikeDatastore):
         allow `ChainedDatastore` to put to multiple datastores without
         requiring that every datastore accepts the dataset.
         """
-        location, formatter = self._prepare_for_put(inMemoryDataset, ref)
-
-        storageDir = os.path.dirname(location.path)
-        if not os.path.isdir(storageDir):
-            with self._transaction.undoWith("mkdir", os.rmdir, storageDir):
-                safeMakeDir(storageDir)
+        formatter, predictedFullPath = self._prepare_for_write(inMemoryDataset, ref)
 
         # Write the file
-        predictedFullPath = os.path.join(self.root, formatter.predictPath())
-
-        if os.path.exists(predictedFullPath):
-            raise FileExistsError(f"Cannot write file for ref {ref} as "
-                                  f"output file {predictedFullPath} already exists")
-
         with self._transaction.undoWith("write", os.remove, predictedFullPath):
             path = formatter.write(inMemoryDataset)
             assert predictedFullPath == os.path.join(self.root, path)
@@ -183,6 +237,47 @@ class PosixDatastore(FileLikeDatastore):
 
         self.ingest(path, ref, formatter=formatter)
 
+    @transactional
+    def putMany(self, items):
+        # Docstring inherited from Datastore.putMany.
+        prepared = []
+        predictedFullPaths = set()
+        for inMemoryDataset, ref in items:
+            formatter, predictedFullPath = self._prepare_for_write(inMemoryDataset, ref,
+                                                                   pending=predictedFullPaths)
+            predictedFullPaths.add(predictedFullPath)
+            prepared.append((inMemoryDataset, ref, formatter, predictedFullPath))
+
+        def write(inMemoryDataset, formatter):
+            path = formatter.write(inMemoryDataset)
+            fullPath = os.path.join(self.root, path)
+            return path, os.stat(fullPath).st_size, self._computeChecksum(fullPath)
+
+        # Leaving the with block waits for all writes to finish, so we can
+        # arrange for every file that was written to be removed on rollback.
+        with ThreadPoolExecutor(max_workers=max(self.writeThreads, 1)) as executor:
+            futures = [executor.submit(write, inMemoryDataset, formatter)
+                       for inMemoryDataset, _, formatter, _ in prepared]
+        error = None
+        refsAndInfos = []
+        for (_, ref, formatter, predictedFullPath), future in zip(prepared, futures):
+            if os.path.exists(predictedFullPath):
+                self._transaction.registerUndo("write", os.remove, predictedFullPath)
+            try:
+                path, size, checksum = future.result()
+            except Exception as e:
+                if error is None:
+                    error = e
+                continue
+            assert predictedFullPath == os.path.join(self.root, path)
+            log.debug("Wrote file to %s", path)
+            refsAndInfos.append((ref, StoredFileInfo(formatter, path, ref.datasetType.storageClass,
+                                                     file_size=size, checksum=checksum)))
+        if error is not None:
+            raise error
+
+        self._register_datasets(refsAndInfos)
+
     @transactional
     def ingest(self, path, ref, formatter=None, transfer=None):
         """Add an on-disk file with the given `DatasetRef` to the store,
@@ -227,6 +322,108 @@ class PosixDatastore(FileLikeDatastore):
             The associated `DatasetType` is not handled by this datastore.
         """
 
+        formatter, sourcePath, path, fullPath = self._prepare_for_ingest(path, ref, formatter, transfer)
+        checksum = None
+        if transfer is not None:
+            with self._transaction.undoWith(transfer, self._undoTransfer, sourcePath, fullPath, transfer):
+                checksum = self._transferFile(sourcePath, fullPath, transfer)
+
+        # Create Storage information in the registry
+        if checksum is None:
+            checksum = self._computeChecksum(fullPath)
+        stat = os.stat(fullPath)
+        size = stat.st_size
+
+        # Update the registry
+        self._register_dataset_file(ref, formatter, path, size, checksum)
+
+    @transactional
+    def ingestMany(self, paths, refs, formatter=None, transfer=None):
+        # Docstring inherited from Datastore.ingestMany.
+        paths = list(paths)
+        refs = list(refs)
+        if len(paths) != len(refs):
+            raise ValueError(f"Got {len(paths)} paths but {len(refs)} refs to ingest.")
+        prepared = []
+        newFullPaths = set()
+        for path, ref in zip(paths, refs):
+            prepared.append(self._prepare_for_ingest(path, ref, formatter, transfer))
+            fullPath = prepared[-1][3]
+            if transfer is not None:
+                if fullPath in newFullPaths:
+                    raise FileExistsError("File '{}' already exists".format(fullPath))
+                newFullPaths.add(fullPath)
+
+        def transferAndChecksum(sourcePath, fullPath):
+            checksum = None
+            if transfer is not None:
+                checksum = self._transferFile(sourcePath, fullPath, transfer)
+            try:
+                if checksum is None:
+                    checksum = self._computeChecksum(fullPath)
+                return os.stat(fullPath).st_size, checksum
+            except BaseException:
+                # Only successful transfers have their undo registered below.
+                if transfer is not None:
+                    self._undoTransfer(sourcePath, fullPath, transfer)
+                raise
+
+        # Leaving the with block waits for all transfers to finish, so we can
+        # arrange for every file that was transferred to be put back on
+        # rollback.
+        with ThreadPoolExecutor(max_workers=max(self.ingestThreads, 1)) as executor:
+            futures = [executor.submit(transferAndChecksum, sourcePath, fullPath)
+                       for _, sourcePath, _, fullPath in prepared]
+        error = None
+        refsAndInfos = []
+        for ref, (fileFormatter, sourcePath, path, fullPath), future in zip(refs, prepared, futures):
+            try:
+                size, checksum = future.result()
+            except Exception as e:
+                if error is None:
+                    error = e
+                continue
+            if transfer is not None:
+                self._transaction.registerUndo(transfer, self._undoTransfer, sourcePath, fullPath, transfer)
+            refsAndInfos.append((ref, StoredFileInfo(fileFormatter, path, ref.datasetType.storageClass,
+                                                     file_size=size, checksum=checksum)))
+        if error is not None:
+            raise error
+
+        self._register_datasets(refsAndInfos)
+
+    def _prepare_for_ingest(self, path, ref, formatter=None, transfer=None):
+        """Check the arguments for ``ingest`` and work out where the file
+        will be stored.
+
+        If the file is to be transferred, the directory it will be
+        transferred to is created (and its removal registered with the
+        current transaction), but the file itself is not transferred.
+
+        Parameters
+        ----------
+        path : `str`
+            File path.  Treated as relative to the repository root if not
+            absolute.
+        ref : `DatasetRef`
+            Reference to the associated Dataset.
+        formatter : `Formatter`, optional
+            Formatter that should be used to retreive the Dataset.
+        transfer : str (optional)
+            Transfer mode, as for ``ingest``.
+
+        Returns
+        -------
+        formatter : `Formatter`
+            The formatter to record for the dataset.
+        sourcePath : `str`
+            Full path to the file to ingest.
+        path : `str`
+            Path of the ingested file relative to the datastore root.
+        fullPath : `str`
+            Full path of the ingested file; the same as ``sourcePath`` if
+            ``transfer`` is `None`.
+        """
         # Confirm that we can accept this dataset
         if not self.constraints.isAcceptable(ref):
             # Raise rather than use boolean return value.
@@ -250,41 +447,74 @@ class PosixDatastore(FileLikeDatastore):
                 path = os.path.relpath(path, absRoot)
             elif path.startswith(os.path.pardir):
                 raise RuntimeError(f"'{path}' is outside repository root '{self.root}'")
-        else:
-            template = self.templates.getTemplate(ref)
-            location = self.locationFactory.fromPath(template.format(ref))
-            newPath = formatter.predictPathFromLocation(location)
-            newFullPath = os.path.join(self.root, newPath)
-            if os.path.exists(newFullPath):
-                raise FileExistsError("File '{}' already exists".format(newFullPath))
-            storageDir = os.path.dirname(newFullPath)
-            if not os.path.isdir(storageDir):
-                with self._transaction.undoWith("mkdir", os.rmdir, storageDir):
-                    safeMakeDir(storageDir)
+            return formatter, fullPath, path, fullPath
+
+        if transfer not in self._transferModes:
+            raise NotImplementedError("Transfer type '{}' not supported.".format(transfer))
+        template = self.templates.getTemplate(ref)
+        location = self.locationFactory.fromPath(template.format(ref))
+        newPath = formatter.predictPathFromLocation(location)
+        newFullPath = os.path.join(self.root, newPath)
+        if os.path.exists(newFullPath):
+            raise FileExistsError("File '{}' already exists".format(newFullPath))
+        storageDir = os.path.dirname(newFullPath)
+        if not os.path.isdir(storageDir):
+            with self._transaction.undoWith("mkdir", os.rmdir, storageDir):
+                safeMakeDir(storageDir)
+        return formatter, fullPath, newPath, newFullPath
+
+    def _transferFile(self, sourcePath, newFullPath, transfer):
+        """Transfer a file into the datastore.
+
+        Parameters
+        ----------
+        sourcePath : `str`
+            Full path to the file to transfer.
+        newFullPath : `str`
+            Full path to transfer it to.
+        transfer : `str`
+            One of 'move', 'copy', 'hardlink', or 'symlink'.
+
+        Returns
+        -------
+        checksum : `str` or `None`
+            Checksum of the file if it was computed while copying it, to
+            avoid reading it twice.
+
+        Notes
+        -----
+        If the transfer fails, any partially written file at ``newFullPath``
+        is removed, and the source file is left where it was.
+        """
+        try:
             if transfer == "move":
-                with self._transaction.undoWith("move", shutil.move, newFullPath, fullPath):
-                    shutil.move(fullPath, newFullPath)
+                shutil.move(sourcePath, newFullPath)
             elif transfer == "copy":
-                with self._transaction.undoWith("copy", os.remove, newFullPath):
-                    shutil.copy(fullPath, newFullPath)
+                if not self.deferChecksums:
+                    return self._formatChecksum(
+                        self.checksumAlgorithm,
+                        self.copyWithChecksum(sourcePath, newFullPath, algorithm=self.checksumAlgorithm)
+                    )
+                shutil.copy(sourcePath, newFullPath)
             elif transfer == "hardlink":
-                with self._transaction.undoWith("hardlink", os.unlink, newFullPath):
-                    os.link(fullPath, newFullPath)
+                os.link(sourcePath, newFullPath)
             elif transfer == "symlink":
-                with self._transaction.undoWith("symlink", os.unlink, newFullPath):
-                    os.symlink(fullPath, newFullPath)
+                os.symlink(sourcePath, newFullPath)
             else:
                 raise NotImplementedError("Transfer type '{}' not supported.".format(transfer))
-            path = newPath
-            fullPath = newFullPath
+        except BaseException:
+            # Never remove the only remaining copy of a moved file.
+            if os.path.lexists(newFullPath) and os.path.lexists(sourcePath):
+                os.remove(newFullPath)
+            raise
 
-        # Create Storage information in the registry
-        checksum = self.computeChecksum(fullPath)
-        stat = os.stat(fullPath)
-        size = stat.st_size
-
-        # Update the registry
-        self._register_dataset_file(ref, formatter, path, size, checksum)
+    @staticmethod
+    def _undoTransfer(sourcePath, newFullPath, transfer):
+        """Undo `_transferFile`, with the same arguments."""
+        if transfer == "move":
+            shutil.move(newFullPath, sourcePath)
+        else:
+            os.remove(newFullPath)
 
     def remove(self, ref):
         """Indicate to the Datastore that a Dataset can be removed.
@@ -319,7 +549,30 @@ class PosixDatastore(FileLikeDatastore):
         self._remove_from_registry(ref)
 
     @staticmethod
-    def computeChecksum(filename, algorithm="blake2b", block_size=8192):
+    def _makeHasher(algorithm):
+        """Return an object with ``update`` and ``hexdigest`` methods that
+        computes a checksum with the given algorithm.
+
+        Parameters
+        ----------
+        algorithm : `str`
+            Name of the algorithm: one of the algorithms supported by
+            :py:class`hashlib`, or one of the non-cryptographic checksums
+            in `_ZLIB_CHECKSUMS`.
+
+        Raises
+        ------
+        NameError
+            Raised if the algorithm is not supported.
+        """
+        if algorithm in _ZLIB_CHECKSUMS:
+            return _ZlibChecksum(_ZLIB_CHECKSUMS[algorithm])
+        if algorithm not in hashlib.algorithms_guaranteed:
+            raise NameError("The specified algorithm '{}' is not supported by hashlib".format(algorithm))
+        return hashlib.new(algorithm)
+
+    @classmethod
+    def computeChecksum(cls, filename, algorithm="blake2b", block_size=1 << 20):
         """Compute the checksum of the supplied file.
 
         Parameters
@@ -328,7 +581,8 @@ class PosixDatastore(FileLikeDatastore):
             Name of file to calculate checksum from.
         algorithm : `str`, optional
             Name of algorithm to use. Must be one of the algorithms supported
-            by :py:class`hashlib`.
+            by :py:class`hashlib`, or "adler32" or "crc32" for a fast
+            non-cryptographic checksum.
         block_size : `int`
             Number of bytes to read from file at one time.
 
@@ -337,13 +591,174 @@ class PosixDatastore(FileLikeDatastore):
         hexdigest : `str`
             Hex digest of the file.
         """
-        if algorithm not in hashlib.algorithms_guaranteed:
-            raise NameError("The specified algorithm '{}' is not supported by hashlib".format(algorithm))
+        hasher = cls._makeHasher(algorithm)
 
-        hasher = hashlib.new(algorithm)
+        # Read into a single reusable buffer rather than allocating a new
+        # bytes object for every block.
+        buffer = bytearray(block_size)
+        view = memoryview(buffer)
+        with open(filename, "rb", buffering=0) as f:
+            for n in iter(lambda: f.readinto(buffer), 0):
+                hasher.update(view[:n])
 
-        with open(filename, "rb") as f:
-            for chunk in iter(lambda: f.read(block_size), b""):
-                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    @classmethod
+    def copyWithChecksum(cls, sourcePath, newFullPath, algorithm="blake2b", block_size=1 << 20):
+        """Copy a file, computing the checksum of its contents in the same
+        pass.
+
+        Permission bits are copied as by `shutil.copy`.
+
+        Parameters
+        ----------
+        sourcePath : `str`
+            Name of the file to copy.
+        newFullPath : `str`
+            Name of the file to create.
+        algorithm : `str`, optional
+            Name of algorithm to use, as for `computeChecksum`.
+        block_size : `int`
+            Number of bytes to read from file at one time.
 
+        Returns
+        -------
+        hexdigest : `str`
+            Hex digest of the file.
+        """
+        hasher = cls._makeHasher(algorithm)
+        buffer = bytearray(block_size)
+        view = memoryview(buffer)
+        with open(sourcePath, "rb", buffering=0) as src, open(newFullPath, "wb", buffering=0) as dst:
+            for n in iter(lambda: src.readinto(buffer), 0):
+                chunk = view[:n]
+                hasher.update(chunk)
+                while chunk:
+                    chunk = chunk[dst.write(chunk):]
+        shutil.copymode(sourcePath, newFullPath)
         return hasher.hexdigest()
+
+    @staticmethod
+    def _formatChecksum(algorithm, hexdigest):
+        """Combine a checksum with the name of its algorithm, for recording
+        in the datastore records.
+
+        Parameters
+        ----------
+        algorithm : `str`
+            Name of the algorithm used to compute the checksum.
+        hexdigest : `str`
+            Hex digest of the file.
+
+        Returns
+        -------
+        checksum : `str`
+            The recorded form of the checksum, ``algorithm:hexdigest``, or
+            just ``hexdigest`` for the legacy algorithm.
+        """
+        if algorithm == _LEGACY_CHECKSUM_ALGORITHM:
+            return hexdigest
+        return f"{algorithm}:{hexdigest}"
+
+    @staticmethod
+    def _parseChecksum(checksum):
+        """Split a recorded checksum into its algorithm and hex digest.
+
+        Parameters
+        ----------
+        checksum : `str`
+            Checksum as returned by `_formatChecksum`.
+
+        Returns
+        -------
+        algorithm : `str`
+            Name of the algorithm used to compute the checksum.
+        hexdigest : `str`
+            Hex digest of the file.
+        """
+        algorithm, sep, hexdigest = checksum.rpartition(":")
+        if not sep:
+            return _LEGACY_CHECKSUM_ALGORITHM, hexdigest
+        return algorithm, hexdigest
+
+    def _computeChecksum(self, fullPath):
+        """Compute the checksum of a file with the configured algorithm, in
+        the form it is recorded in.
+
+        Returns `None` if checksums are deferred.
+        """
+        if self.deferChecksums:
+            return None
+        return self._formatChecksum(self.checksumAlgorithm,
+                                    self.computeChecksum(fullPath, algorithm=self.checksumAlgorithm))
+
+    def verifyChecksums(self, refs=None):
+        """Compute any checksums that were deferred when datasets were
+        stored, and check the others.
+
+        This is intended to be run separately from the processes that
+        store datasets (e.g. periodically, or in a background thread with its
+        own registry connection) when the ``checksum.deferred`` option is
+        used.
+
+        Parameters
+        ----------
+        refs : iterable of `DatasetRef`, optional
+            Datasets to verify.  If `None`, all datasets in this datastore
+            are verified.
+
+        Returns
+        -------
+        failed : `list` of `int`
+            IDs of datasets whose file is missing or does not match the
+            recorded checksum.
+
+        Notes
+        -----
+        Each recorded checksum is checked with the algorithm it was computed
+        with, so changing ``checksum.algorithm`` does not invalidate existing
+        checksums.  Missing checksums are computed with the currently
+        configured algorithm.
+        """
+        if refs is None:
+            records = dict(self.records.items())
+        elif isinstance(self.records, DatabaseDict):
+            records = self.records.getMany(ref.id for ref in refs)
+        else:
+            records = {ref.id: self.records[ref.id] for ref in refs if ref.id in self.records}
+
+        def algorithmOf(record):
+            if record.checksum is None:
+                return self.checksumAlgorithm
+            return self._parseChecksum(record.checksum)[0]
+
+        # Components share their parent's file, so each file is only read
+        # once (per algorithm).
+        keys = {(record.path, algorithmOf(record)) for record in records.values()}
+
+        def checksum(key):
+            path, algorithm = key
+            try:
+                return self._formatChecksum(algorithm,
+                                            self.computeChecksum(os.path.join(self.root, path),
+                                                                 algorithm=algorithm))
+            except FileNotFoundError:
+                return None
+
+        with ThreadPoolExecutor(max_workers=max(self.ingestThreads, 1)) as executor:
+            checksums = dict(zip(keys, executor.map(checksum, keys)))
+
+        failed = []
+        updates = {}
+        for datasetId, record in records.items():
+            actual = checksums[record.path, algorithmOf(record)]
+            if actual is None or (record.checksum is not None and record.checksum != actual):
+                log.warning("Checksum verification failed for dataset %s at %s", datasetId, record.path)
+                failed.append(datasetId)
+            elif record.checksum is None:
+                updates[datasetId] = dataclasses.replace(record, checksum=actual)
+        if updates:
+            self.records.update(updates)
+            for datasetId in updates:
+                self._uncacheStoredItemInfo(datasetId)
+        return failed
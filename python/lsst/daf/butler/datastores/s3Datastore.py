@@ -96,32 +96,8 @@ class S3Datastore(FileLikeDatastore):
             return False
         return s3CheckFileExists(location, client=self.client)[0]
 
-    def get(self, ref, parameters=None):
-        """Load an InMemoryDataset from the store.
-
-        Parameters
-        ----------
-        ref : `DatasetRef`
-            Reference to the required Dataset.
-        parameters : `dict`
-            `StorageClass`-specific parameters that specify, for example,
-            a slice of the Dataset to be loaded.
-
-        Returns
-        -------
-        inMemoryDataset : `object`
-            Requested Dataset or slice thereof as an InMemoryDataset.
-
-        Raises
-        ------
-        FileNotFoundError
-            Requested dataset can not be retrieved.
-        TypeError
-            Return value from formatter has unexpected type.
-        ValueError
-            Formatter failed to process the dataset.
-        """
-        getInfo = self._prepare_for_get(ref, parameters)
+    def _read_prepared(self, ref, getInfo, checkSize=True):
+        # Docstring inherited from FileLikeDatastore._read_prepared.
         location = getInfo.location
 
         # since we have to make a GET request to S3 anyhow (for download) we
@@ -153,7 +129,7 @@ class S3Datastore(FileLikeDatastore):
             raise err
 
         storedFileInfo = getInfo.info
-        if response["ContentLength"] != storedFileInfo.file_size:
+        if checkSize and response["ContentLength"] != storedFileInfo.file_size:
             raise RuntimeError("Integrity failure in Datastore. Size of file {} ({}) does not"
                                " match recorded size of {}".format(location.path, response["ContentLength"],
                                                                    storedFileInfo.file_size))
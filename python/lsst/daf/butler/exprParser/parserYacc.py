@@ -22,11 +22,14 @@
 """Syntax definition for user expression parser.
 """
 
-__all__ = ["ParserYacc", "ParserYaccError", "ParseError", "ParserEOFError"]
+__all__ = ["ParserYacc", "ParserYaccError", "ParseError", "ParserEOFError",
+           "getParser", "parseExpression"]
 
 # -------------------------------
 #  Imports of standard modules --
 # -------------------------------
+import functools
+import threading
 
 # -----------------------------
 #  Imports for other modules --
@@ -40,6 +43,11 @@ from .parserLex import ParserLex
 #  Local non-exported definitions --
 # ----------------------------------
 
+# Per-thread storage for the shared parser; PLY parsers and lexers keep
+# parsing state in instance attributes so they cannot be shared between
+# threads.
+_threadLocal = threading.local()
+
 # ------------------------
 #  Exported definitions --
 # ------------------------
@@ -271,3 +279,49 @@ class ParserYacc:
             raise ParserEOFError()
         else:
             raise ParseError(p.lexer.lexdata, p.value, p.lexpos, p.lineno)
+
+
+def getParser():
+    """Return a parser shared by all callers in the current thread.
+
+    Building the LALR tables for the grammar is much more expensive than
+    parsing a typical expression, so the parser (and a prototype lexer) is
+    constructed only once per thread and reused for all later calls.
+
+    Returns
+    -------
+    parser : `ParserYacc`
+        Parser instance; it must not be passed to other threads.
+    """
+    parser = getattr(_threadLocal, "parser", None)
+    if parser is None:
+        parser = ParserYacc()
+        _threadLocal.parser = parser
+        _threadLocal.lexer = ParserLex.make_lexer()
+    return parser
+
+
+@functools.lru_cache(maxsize=256)
+def parseExpression(expression):
+    """Parse an expression using a shared parser, caching the result.
+
+    Parameters
+    ----------
+    expression : `str`
+        Expression to parse.
+
+    Returns
+    -------
+    tree : `Node` or `None`
+        Parsed tree, or `None` for an empty expression.  Trees are cached
+        and shared between callers that parse the same string, so they must
+        not be modified.
+
+    Raises
+    ------
+    ParserYaccError
+        Raised if the expression cannot be parsed.  Failures are not cached.
+    """
+    parser = getParser()
+    # Cloning the prototype lexer is cheap and gives it fresh position state.
+    return parser.parse(expression, lexer=_threadLocal.lexer.clone())
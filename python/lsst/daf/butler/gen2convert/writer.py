@@ -365,6 +365,9 @@ class ConversionWriter:
                     registry.ensureRun(repo.run)
                     run = repo.run
                 translator = repo.translators[datasetTypeName]
+                # Datasets to add, grouped by Run so they can be inserted in
+                # bulk; values are (run, [(gen3id, dataset, formatter), ...]).
+                pending = {}
                 for dataset in datasets.values():
                     try:
                         gen3id = translator(dataset.dataId)
@@ -394,18 +397,16 @@ class ConversionWriter:
                             instrument = factory()
                             instrumentCache[gen3id["instrument"]] = instrument
                         formatter = instrument.getRawFormatter(gen3id)
-                    log.debug("Adding Dataset %s as %s in %s", dataset.filePath, gen3id, repo.run)
-                    ref = registry.addDataset(datasetType, gen3id, run)
-                    refs.append(ref)
-                    for component in datasetType.storageClass.components:
-                        compTypeName = datasetType.componentTypeName(component)
-                        log.debug("  ...adding component dataset %s", compTypeName)
-                        compDatasetType = registry.getDatasetType(compTypeName)
-                        compRef = registry.addDataset(compDatasetType, gen3id, run=run)
-                        registry.attachComponent(component, ref, compRef)
-                        refs.append(compRef)
-                    datastore.ingest(path=os.path.relpath(dataset.fullPath, start=datastore.root), ref=ref,
-                                     formatter=formatter)
+                    pending.setdefault(run.collection, (run, []))[1].append((gen3id, dataset, formatter))
+                for run, toAdd in pending.values():
+                    log.debug("Adding %d '%s' Datasets in %s", len(toAdd), datasetTypeName, run)
+                    newRefs = registry.addDatasets(datasetType, [gen3id for gen3id, _, _ in toAdd], run,
+                                                   recursive=True)
+                    for ref, (gen3id, dataset, formatter) in zip(newRefs, toAdd):
+                        refs.append(ref)
+                        refs.extend(ref.components.values())
+                        datastore.ingest(path=os.path.relpath(dataset.fullPath, start=datastore.root),
+                                         ref=ref, formatter=formatter)
 
             # Add Datasets to collections associated with any child repos to
             # simulate Gen2 parent lookups.
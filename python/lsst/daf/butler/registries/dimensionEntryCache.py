@@ -0,0 +1,220 @@
+# This file is part of daf_butler.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+__all__ = ("DimensionEntryCache",)
+
+import threading
+from collections import Counter, OrderedDict
+
+
+class DimensionEntryCache:
+    """A least-recently-used cache of rows from `DimensionElement` tables,
+    keyed by element and primary key.
+
+    Parameters
+    ----------
+    config : `Config` or `dict`, optional
+        Cache configuration, typically the ``dimensionCache`` section of a
+        `RegistryConfig`.  Recognized keys are:
+
+        ``size``
+            Default maximum number of rows cached for each element; `None`
+            for no limit, and ``0`` to disable caching.
+        ``elements``
+            Mapping from element name to a mapping with optional ``size``
+            (overriding the default) and ``preload`` keys.  If ``preload`` is
+            `True` the entire table is loaded the first time any row is
+            needed, and the default size for that element is unlimited.
+
+    Notes
+    -----
+    Each cached row is a `dict` holding all columns of the table, so any
+    subset of columns can be served from it.  The cache does not know when
+    the database changes; `SqlRegistry` is responsible for calling
+    `invalidate` when it modifies dimension tables, and for only adding rows
+    that have been committed.
+
+    All methods may be called concurrently from multiple threads.
+    """
+
+    defaultSize = 1000
+    """Default maximum number of rows cached per element when not set in
+    configuration (`int`).
+    """
+
+    def __init__(self, config=None):
+        if config is None:
+            config = {}
+        self._defaultSize = config.get("size", self.defaultSize)
+        self._sizes = {}
+        self._preload = set()
+        for name, elementConfig in (config.get("elements") or {}).items():
+            preload = elementConfig.get("preload", False)
+            if preload:
+                self._preload.add(name)
+            self._sizes[name] = elementConfig.get("size", None if preload else self._defaultSize)
+        self._rows = {}
+        self._preloaded = set()
+        self._lock = threading.RLock()
+        self.hits = Counter()
+        """Number of successful lookups, keyed by element name
+        (`collections.Counter`).
+        """
+        self.misses = Counter()
+        """Number of unsuccessful lookups, keyed by element name
+        (`collections.Counter`).
+        """
+
+    def getMaxSize(self, element):
+        """Return the maximum number of rows cached for an element.
+
+        Parameters
+        ----------
+        element : `DimensionElement`
+            Element to query.
+
+        Returns
+        -------
+        size : `int` or `None`
+            Maximum number of rows, or `None` if there is no limit.
+        """
+        return self._sizes.get(element.name, self._defaultSize)
+
+    def needsPreload(self, element):
+        """Return `True` if the full table for an element should be loaded
+        into the cache and has not been yet.
+
+        Parameters
+        ----------
+        element : `DimensionElement`
+            Element to query.
+        """
+        return element.name in self._preload and element.name not in self._preloaded
+
+    @staticmethod
+    def _makeKey(element, dataId):
+        return tuple(dataId[link] for link in sorted(element.links()))
+
+    def get(self, element, dataId):
+        """Return a cached row.
+
+        Parameters
+        ----------
+        element : `DimensionElement`
+            Element whose table the row is from.
+        dataId : `dict` or `DataId`
+            A `dict`-like object containing (at least) the links that
+            identify a row of ``element``'s table.
+
+        Returns
+        -------
+        row : `dict` or `None`
+            Mapping from column name to value, or `None` if the row is not
+            cached.
+        """
+        key = self._makeKey(element, dataId)
+        with self._lock:
+            rows = self._rows.get(element.name)
+            if rows is None or key not in rows:
+                self.misses[element.name] += 1
+                return None
+            self.hits[element.name] += 1
+            rows.move_to_end(key)
+            return rows[key]
+
+    def put(self, element, row):
+        """Add a row to the cache, evicting the least recently used row for
+        the same element if the cache for it is full.
+
+        Parameters
+        ----------
+        element : `DimensionElement`
+            Element whose table the row is from.
+        row : `dict`
+            Mapping from column name to value; must contain all links of
+            ``element``.
+        """
+        maxSize = self.getMaxSize(element)
+        if maxSize == 0:
+            return
+        key = self._makeKey(element, row)
+        with self._lock:
+            rows = self._rows.setdefault(element.name, OrderedDict())
+            rows[key] = row
+            rows.move_to_end(key)
+            if maxSize is not None:
+                while len(rows) > maxSize:
+                    rows.popitem(last=False)
+
+    def putAll(self, element, rows):
+        """Add all rows of an element's table to the cache.
+
+        Parameters
+        ----------
+        element : `DimensionElement`
+            Element whose table the rows are from.
+        rows : iterable of `dict`
+            All rows in the table.
+        """
+        with self._lock:
+            for row in rows:
+                self.put(element, row)
+            self._preloaded.add(element.name)
+
+    def invalidate(self, element, dataId):
+        """Remove a row from the cache, if present.
+
+        Parameters
+        ----------
+        element : `DimensionElement`
+            Element whose table the row is from.
+        dataId : `dict` or `DataId`
+            A `dict`-like object containing (at least) the links that
+            identify a row of ``element``'s table.
+        """
+        with self._lock:
+            rows = self._rows.get(element.name)
+            if rows is not None:
+                rows.pop(self._makeKey(element, dataId), None)
+
+    def clear(self):
+        """Remove all rows from the cache.
+
+        Hit and miss counts are not reset.
+        """
+        with self._lock:
+            self._rows.clear()
+            self._preloaded.clear()
+
+    def getStatistics(self):
+        """Return cache usage statistics.
+
+        Returns
+        -------
+        statistics : `dict`
+            Mapping from element name to a `dict` with ``hits``, ``misses``
+            and ``size`` (the number of rows currently cached) keys.
+        """
+        with self._lock:
+            names = set(self.hits) | set(self.misses) | set(self._rows)
+            return {name: dict(hits=self.hits[name], misses=self.misses[name],
+                               size=len(self._rows.get(name, ())))
+                    for name in names}
@@ -22,7 +22,7 @@
 __all__ = ("OracleRegistry", )
 
 from sqlalchemy import create_engine
-
+from sqlalchemy.sql import text, bindparam
 
 from lsst.daf.butler.core.config import Config
 from lsst.daf.butler.core.registryConfig import RegistryConfig
@@ -78,5 +78,42 @@ class OracleRegistry(SqlRegistry):
         super().__init__(registryConfig, schemaConfig, dimensionConfig, create,
                          butlerRoot=butlerRoot)
 
-    def _createEngine(self):
-        return create_engine(self.config.connectionString, pool_size=1)
+    def _createEngine(self, connectionString=None):
+        return create_engine(connectionString or self.config.connectionString,
+                             **(self._getPoolOptions() or dict(pool_size=1)))
+
+    def _insertOrIgnore(self, table, rows, keys):
+        # Docstring inherited from SqlRegistry._insertOrIgnore.
+        # Oracle has no INSERT ... ON CONFLICT, but a MERGE with only a
+        # WHEN NOT MATCHED clause has the same effect.
+        if not rows:
+            return
+        columns = list(rows[0].keys())
+        sql = (
+            f"MERGE INTO {table.name} t "
+            f"USING (SELECT {', '.join(f':{c} AS {c}' for c in columns)} FROM dual) s "
+            f"ON ({' AND '.join(f't.{k} = s.{k}' for k in keys)}) "
+            f"WHEN NOT MATCHED THEN INSERT ({', '.join(columns)}) "
+            f"VALUES ({', '.join(f's.{c}' for c in columns)})"
+        )
+        query = text(sql).bindparams(*[bindparam(c, type_=table.c[c].type) for c in columns])
+        self._connection.execute(query, rows)
+
+    def _upsert(self, table, rows, keys):
+        # Docstring inherited from SqlRegistry._upsert.
+        if not rows:
+            return
+        columns = list(rows[0].keys())
+        updates = [c for c in columns if c not in keys]
+        whenMatched = (f"WHEN MATCHED THEN UPDATE SET {', '.join(f't.{c} = s.{c}' for c in updates)} "
+                       if updates else "")
+        sql = (
+            f"MERGE INTO {table.name} t "
+            f"USING (SELECT {', '.join(f':{c} AS {c}' for c in columns)} FROM dual) s "
+            f"ON ({' AND '.join(f't.{k} = s.{k}' for k in keys)}) "
+            f"{whenMatched}"
+            f"WHEN NOT MATCHED THEN INSERT ({', '.join(columns)}) "
+            f"VALUES ({', '.join(f's.{c}' for c in columns)})"
+        )
+        query = text(sql).bindparams(*[bindparam(c, type_=table.c[c].type) for c in columns])
+        self._connection.execute(query, rows)
@@ -22,6 +22,7 @@
 __all__ = ("PostgreSqlRegistry", )
 
 from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import insert
 
 from lsst.daf.butler.core.config import Config
 from lsst.daf.butler.core.registryConfig import RegistryConfig
@@ -77,5 +78,23 @@ class PostgreSqlRegistry(SqlRegistry):
         super().__init__(registryConfig, schemaConfig, dimensionConfig, create,
                          butlerRoot=butlerRoot)
 
-    def _createEngine(self):
-        return create_engine(self.config.connectionString, pool_size=1)
+    def _createEngine(self, connectionString=None):
+        return create_engine(connectionString or self.config.connectionString,
+                             **(self._getPoolOptions() or dict(pool_size=1)))
+
+    def _insertOrIgnore(self, table, rows, keys):
+        # Docstring inherited from SqlRegistry._insertOrIgnore.
+        if rows:
+            self._connection.execute(insert(table).on_conflict_do_nothing(), rows)
+
+    def _upsert(self, table, rows, keys):
+        # Docstring inherited from SqlRegistry._upsert.
+        if not rows:
+            return
+        query = insert(table)
+        updates = {c: query.excluded[c] for c in rows[0].keys() if c not in keys}
+        if updates:
+            query = query.on_conflict_do_update(index_elements=list(keys), set_=updates)
+        else:
+            query = query.on_conflict_do_nothing(index_elements=list(keys))
+        self._connection.execute(query, rows)
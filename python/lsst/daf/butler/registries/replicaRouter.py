@@ -0,0 +1,178 @@
+# This file is part of daf_butler.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+__all__ = ("ReplicaRouter",)
+
+import contextlib
+import itertools
+import threading
+import time
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.sql import select, literal
+
+
+class ReplicaRouter:
+    """Round-robin selection of connections to read-only database replicas.
+
+    Parameters
+    ----------
+    engines : `list` of `sqlalchemy.engine.Engine`
+        Engines connected to the replicas.
+    perThread : `bool`
+        If `True`, each thread uses its own connection to each replica (as
+        when connection pooling is enabled); otherwise all threads share a
+        single connection to each replica.
+    retryInterval : `float`
+        Seconds after a failed health check before a replica is tried again.
+    checkInterval : `float`
+        Seconds after a successful health check before an open connection to
+        a replica is checked again.
+
+    Notes
+    -----
+    A replica is healthy if a connection to it can be opened and it answers a
+    trivial query.  Unhealthy replicas are skipped until ``retryInterval``
+    has passed; if no replica is healthy, `getConnection` returns `None` and
+    the caller should use the primary database instead.  Because a replica
+    may fail between checks, callers should also call `markUnhealthy` when
+    a query on one of its connections fails.
+
+    All methods may be called concurrently from multiple threads.  If
+    ``perThread`` is `False`, however, the connections returned are shared,
+    and (like any single `sqlalchemy.engine.Connection`) must not be used
+    by more than one thread at a time.
+    """
+
+    def __init__(self, engines, perThread=False, retryInterval=30.0, checkInterval=10.0):
+        self._engines = list(engines)
+        self._threadLocal = threading.local() if perThread else None
+        self._sharedConnections = {}
+        self._retryInterval = retryInterval
+        self._checkInterval = checkInterval
+        self._unhealthyUntil = {}
+        self._cycle = itertools.cycle(range(len(self._engines)))
+        self._lock = threading.Lock()
+        # Guards the shared connections, which all threads modify.
+        self._sharedLock = None if perThread else threading.RLock()
+
+    def _lockConnections(self):
+        """Return a context manager that must be held while the current
+        thread's connections are modified.
+        """
+        if self._sharedLock is None:
+            return contextlib.nullcontext()
+        return self._sharedLock
+
+    def __len__(self):
+        return len(self._engines)
+
+    def _getConnections(self):
+        """Return the mapping from replica index to the open connection used
+        by the current thread and the time it was last checked.
+        """
+        if self._threadLocal is None:
+            return self._sharedConnections
+        connections = getattr(self._threadLocal, "connections", None)
+        if connections is None:
+            connections = {}
+            self._threadLocal.connections = connections
+        return connections
+
+    def isHealthy(self, index):
+        """Return `False` if a replica has failed a health check within the
+        last ``retryInterval`` seconds.
+
+        Parameters
+        ----------
+        index : `int`
+            Index of the replica in the list of engines.
+        """
+        with self._lock:
+            return self._unhealthyUntil.get(index, 0.0) <= time.monotonic()
+
+    def markUnhealthy(self, index):
+        """Skip a replica until ``retryInterval`` seconds have passed, and
+        close the current thread's connection to it.
+
+        Parameters
+        ----------
+        index : `int`
+            Index of the replica in the list of engines.
+        """
+        with self._lock:
+            self._unhealthyUntil[index] = time.monotonic() + self._retryInterval
+        with self._lockConnections():
+            connection, _ = self._getConnections().pop(index, (None, None))
+            if connection is not None:
+                try:
+                    connection.close()
+                except DBAPIError:
+                    pass
+
+    def _connect(self, index):
+        """Return a checked connection to a replica, or `None` if the replica
+        is not healthy.
+        """
+        with self._lockConnections():
+            connections = self._getConnections()
+            connection, checked = connections.get(index, (None, None))
+            now = time.monotonic()
+            if connection is not None and now - checked < self._checkInterval:
+                return connection
+            try:
+                if connection is None:
+                    connection = self._engines[index].connect()
+                connections[index] = (connection, now)
+                connection.execute(select([literal(1)])).scalar()
+            except DBAPIError:
+                self.markUnhealthy(index)
+                return None
+            return connection
+
+    def getConnection(self):
+        """Return a connection to the next healthy replica.
+
+        Returns
+        -------
+        index : `int` or `None`
+            Index of the replica in the list of engines, or `None` if no
+            replica is healthy.
+        connection : `sqlalchemy.engine.Connection` or `None`
+            Connection to the replica, or `None` if no replica is healthy.
+        """
+        for _ in range(len(self._engines)):
+            with self._lock:
+                index = next(self._cycle)
+            if not self.isHealthy(index):
+                continue
+            connection = self._connect(index)
+            if connection is not None:
+                return index, connection
+        return None, None
+
+    def release(self):
+        """Close the current thread's connections to all replicas."""
+        with self._lockConnections():
+            connections = self._getConnections()
+            while connections:
+                _, (connection, _) = connections.popitem()
+                connection.close()
@@ -22,14 +22,17 @@
 __all__ = ("SqlRegistryConfig", "SqlRegistry")
 
 import contextlib
+import logging
+import threading
 import warnings
+from collections import defaultdict
 
 from sqlalchemy import create_engine, text, func
-from sqlalchemy.pool import NullPool
-from sqlalchemy.sql import select, and_, bindparam, union
-from sqlalchemy.exc import IntegrityError, SADeprecationWarning
+from sqlalchemy.pool import NullPool, QueuePool
+from sqlalchemy.sql import select, and_, union, tuple_, bindparam
+from sqlalchemy.exc import DBAPIError, IntegrityError, SADeprecationWarning
 
-from ..core.utils import transactional
+from ..core.utils import transactional, chunked, iterable, doImport
 
 from ..core.datasets import DatasetType, DatasetRef
 from ..core.registryConfig import RegistryConfig
@@ -41,13 +44,37 @@ from ..core.run import Run
 from ..core.storageClass import StorageClassFactory
 from ..core.config import Config
 from ..core.dimensions import DataId, Dimension
+from ..sql.skyPixRanges import (getSkyPixRangeTableName, isMaterializedSkyPixJoin, collapseSkyPixRanges,
+                                makeAdaptiveSkyPixRanges)
 from .sqlRegistryDatabaseDict import SqlRegistryDatabaseDict
+from .dimensionEntryCache import DimensionEntryCache
+from .replicaRouter import ReplicaRouter
+
+log = logging.getLogger(__name__)
 
 
 class SqlRegistryConfig(RegistryConfig):
     pass
 
 
+class _TransactionChanges:
+    """Cache updates made within one level of a `SqlRegistry` transaction.
+
+    These are only visible to the thread that made them until the outermost
+    transaction commits, and are discarded if it is rolled back.
+    """
+
+    def __init__(self):
+        self.datasetTypes = {}
+        """Newly registered `DatasetType` instances, keyed by name (`dict`).
+        """
+
+        self.invalidated = []
+        """``(element, dataId)`` pairs for dimension entries modified in the
+        transaction (`list` of `tuple`).
+        """
+
+
 class SqlRegistry(Registry):
     """Registry backed by a SQL database.
 
@@ -68,19 +95,47 @@ class SqlRegistry(Registry):
     absolute path. Can be None if no defaults specified.
     """
 
+    _maxBindParams = 500
+    """Maximum number of values bound in a single ``IN`` clause by bulk
+    operations (`int`).  Kept well below SQLite's default limit of 999.
+    """
+
     def __init__(self, registryConfig, schemaConfig, dimensionConfig, create=False, butlerRoot=None):
         registryConfig = SqlRegistryConfig(registryConfig)
         super().__init__(registryConfig, dimensionConfig=dimensionConfig)
         self.storageClasses = StorageClassFactory()
         self._schema = self._createSchema(schemaConfig)
         self._datasetTypes = {}
+        self._componentDatasetTypes = {}  # keyed by (parent DatasetType, component name)
+        poolConfig = self.config.get("pool")
+        self._poolConfig = poolConfig if poolConfig is not None and poolConfig.get("enabled", False) else None
         self._engine = self._createEngine()
-        self._connection = self._createConnection(self._engine)
+        if self._poolConfig is not None:
+            self._threadLocal = threading.local()
+            self._sharedConnection = None
+        else:
+            self._threadLocal = None
+            self._sharedConnection = self._createConnection(self._engine)
+            self._sharedTransactionChanges = []
+        self._replicaRouter = None
+        replicas = self.config.readOnlyConnectionStrings
+        if replicas:
+            self._replicaRouter = ReplicaRouter(
+                [self._createEngine(connectionString) for connectionString in replicas],
+                perThread=self._poolConfig is not None,
+                retryInterval=self.config.get(("replicas", "retryInterval"), 30.0),
+                checkInterval=self.config.get(("replicas", "checkInterval"), 10.0),
+            )
         self._cachedRuns = {}   # Run objects, keyed by id or collection
-        # TODO: Hard-coding of instrument and skymap as the dimensions to cache
-        # here is a bit ugly; should be fixed on DM-17023.
-        self._cachedInstrumentEntries = {}
-        self._cachedSkyMapEntries = {}
+        self._dimensionEntryCache = DimensionEntryCache(self.config.get("dimensionCache"))
+        self._skyPixRanges = self.config.get(("skypix", "ranges"), False)
+        self._skyPixMinLevel = self.config.get(("skypix", "adaptive", "minLevel"))
+        self._skyPixMaxFalsePositiveFraction = self.config.get(
+            ("skypix", "adaptive", "maxFalsePositiveFraction"), 0.0
+        )
+        if self._skyPixMinLevel is not None and not self._skyPixRanges:
+            raise ValueError("skypix.adaptive.minLevel requires skypix.ranges to be true.")
+        self._coarserPixelizations = None
         if create:
             # In our tables we have columns that make use of sqlalchemy
             # Sequence objects. There is currently a bug in sqlalchmey
@@ -95,6 +150,147 @@ class SqlRegistry(Registry):
     def __str__(self):
         return self.config["db"]
 
+    @property
+    def _connection(self):
+        """The `sqlalchemy.engine.Connection` used by the current thread.
+
+        Unless pooling is enabled by the ``pool.enabled`` configuration
+        option, this is a single connection shared by all threads.  With
+        pooling, each thread checks out its own connection from the pool the
+        first time it needs one, and keeps it until `releaseConnection` is
+        called or the thread ends; transactions started with `transaction`
+        check out a connection only for their duration if the thread did not
+        already have one.
+        """
+        if self._threadLocal is None:
+            return self._sharedConnection
+        connection = getattr(self._threadLocal, "connection", None)
+        if connection is None:
+            connection = self._createConnection(self._engine)
+            self._threadLocal.connection = connection
+        return connection
+
+    def _getReadConnection(self):
+        """Return the `sqlalchemy.engine.Connection` the current thread
+        should use for a read-only query.
+
+        If read-only replicas are configured with the ``readOnlyDb`` option,
+        this is a connection to the next healthy replica, chosen round-robin,
+        unless the current thread's connection to the primary database is in
+        a transaction (so queries see the transaction's own changes) or no
+        replica is healthy.  Otherwise it is the same as `_connection`.
+
+        Returns
+        -------
+        index : `int` or `None`
+            Index of the replica, or `None` for the primary database.
+        connection : `sqlalchemy.engine.Connection`
+            The connection to use.
+        """
+        if self._replicaRouter is None:
+            return None, self._connection
+        if self._threadLocal is None:
+            primary = self._sharedConnection
+        else:
+            primary = getattr(self._threadLocal, "connection", None)
+        if primary is not None and primary.in_transaction():
+            return None, primary
+        index, connection = self._replicaRouter.getConnection()
+        if connection is None:
+            return None, self._connection
+        return index, connection
+
+    def _executeRead(self, query, *args, executionOptions=None, **kwds):
+        """Execute a read-only query, on a replica if possible.
+
+        If the query fails on a replica because the connection to it has
+        been lost, the replica is marked unhealthy and the query is run again
+        on the next healthy replica or the primary database.
+
+        Parameters
+        ----------
+        query
+            Query to execute, as accepted by
+            `sqlalchemy.engine.Connection.execute`.
+        *args, **kwds
+            Additional arguments forwarded to
+            `sqlalchemy.engine.Connection.execute`.
+        executionOptions : `dict`, optional
+            Options for `sqlalchemy.engine.Connection.execution_options`.
+
+        Returns
+        -------
+        result : `sqlalchemy.engine.ResultProxy`
+            Result of the query.
+        """
+        _, result = self._executeReadRouted(query, *args, executionOptions=executionOptions, **kwds)
+        return result
+
+    def _executeReadRouted(self, query, *args, executionOptions=None, **kwds):
+        """Execute a read-only query as `_executeRead` does, and report where
+        it was run.
+
+        Parameters
+        ----------
+        query
+            Query to execute, as accepted by
+            `sqlalchemy.engine.Connection.execute`.
+        *args, **kwds
+            Additional arguments forwarded to
+            `sqlalchemy.engine.Connection.execute`.
+        executionOptions : `dict`, optional
+            Options for `sqlalchemy.engine.Connection.execution_options`.
+
+        Returns
+        -------
+        index : `int` or `None`
+            Index of the replica the query was run on, or `None` for the
+            primary database.
+        result : `sqlalchemy.engine.ResultProxy`
+            Result of the query.
+        """
+        while True:
+            index, connection = self._getReadConnection()
+            if executionOptions:
+                connection = connection.execution_options(**executionOptions)
+            try:
+                return index, connection.execute(query, *args, **kwds)
+            except DBAPIError as err:
+                # Only a lost connection says anything about the replica;
+                # errors in the query itself (e.g. syntax errors or
+                # timeouts) would just fail again elsewhere.
+                if index is None or not err.connection_invalidated:
+                    raise
+                log.warning("Query on read-only replica %d failed; retrying elsewhere: %s", index, err)
+                self._replicaRouter.markUnhealthy(index)
+
+    @property
+    def threadSafe(self):
+        # Docstring inherited from Registry.threadSafe.
+        return self._threadLocal is not None
+
+    def releaseConnection(self):
+        """Return the current thread's connections to the pool.
+
+        This does nothing unless pooling is enabled, or if the current thread
+        does not have a connection.
+
+        Raises
+        ------
+        RuntimeError
+            Raised if the connection is in use by a transaction.
+        """
+        if self._threadLocal is None:
+            return
+        connection = getattr(self._threadLocal, "connection", None)
+        if connection is not None:
+            if connection.in_transaction():
+                raise RuntimeError("Cannot release a connection with a transaction in progress.")
+            del self._threadLocal.connection
+            connection.close()
+        if self._replicaRouter is not None:
+            self._replicaRouter.release()
+
     @contextlib.contextmanager
     def transaction(self):
         """Context manager that implements SQL transactions.
@@ -104,13 +300,103 @@ class SqlRegistry(Registry):
 
         This context manager may be nested.
         """
+        release = self._threadLocal is not None and getattr(self._threadLocal, "connection", None) is None
+        changesStack = self._getTransactionChanges()
         trans = self._connection.begin_nested()
+        changesStack.append(_TransactionChanges())
         try:
             yield
             trans.commit()
         except BaseException:
             trans.rollback()
+            # Nothing the transaction did reached the shared caches, so
+            # dropping its changes is enough.
+            changesStack.pop()
             raise
+        else:
+            changes = changesStack.pop()
+            if changesStack:
+                changesStack[-1].datasetTypes.update(changes.datasetTypes)
+                changesStack[-1].invalidated.extend(changes.invalidated)
+            else:
+                self._datasetTypes.update(changes.datasetTypes)
+                # Other threads may have cached the old rows since they were
+                # first invalidated.
+                for element, dataId in changes.invalidated:
+                    self._dimensionEntryCache.invalidate(element, dataId)
+        finally:
+            if release:
+                self.releaseConnection()
+
+    def _getTransactionChanges(self):
+        """Return the cache updates made by the current thread's open
+        transactions.
+
+        Returns
+        -------
+        changesStack : `list` of `_TransactionChanges`
+            One entry for each level of nested transaction, outermost first;
+            empty if no transaction is in progress.
+        """
+        if self._threadLocal is None:
+            return self._sharedTransactionChanges
+        changesStack = getattr(self._threadLocal, "transactionChanges", None)
+        if changesStack is None:
+            changesStack = self._threadLocal.transactionChanges = []
+        return changesStack
+
+    def _getPendingDatasetTypes(self):
+        """Return the `DatasetType` instances registered in the current
+        thread's open transactions.
+
+        Returns
+        -------
+        datasetTypes : `dict`
+            Mapping from name to `DatasetType`.
+        """
+        pending = {}
+        for changes in self._getTransactionChanges():
+            pending.update(changes.datasetTypes)
+        return pending
+
+    def _findCachedDatasetType(self, name):
+        """Return a cached `DatasetType`, including those registered in the
+        current thread's open transactions.
+
+        Parameters
+        ----------
+        name : `str`
+            Name of the `DatasetType`.
+
+        Returns
+        -------
+        datasetType : `DatasetType` or `None`
+            The cached `DatasetType`, or `None` if it is not cached.
+        """
+        for changes in reversed(self._getTransactionChanges()):
+            datasetType = changes.datasetTypes.get(name)
+            if datasetType is not None:
+                return datasetType
+        return self._datasetTypes.get(name)
+
+    def _invalidateDimensionEntry(self, element, dataId):
+        """Remove a dimension entry that is being modified from the cache.
+
+        The entry is invalidated again when the outermost transaction
+        commits, in case another thread has cached the old row in the
+        meantime.
+
+        Parameters
+        ----------
+        element : `DimensionElement`
+            Element whose table is being modified.
+        dataId : `dict` or `DataId`
+            Links identifying the row being modified.
+        """
+        self._dimensionEntryCache.invalidate(element, dataId)
+        changesStack = self._getTransactionChanges()
+        if changesStack:
+            changesStack[-1].invalidated.append((element, dataId))
 
     def _createSchema(self, schemaConfig):
         """Create and return an `lsst.daf.butler.Schema` object containing
@@ -127,11 +413,17 @@ class SqlRegistry(Registry):
         """
         return Schema(config=schemaConfig, limited=self.limited)
 
-    def _createEngine(self):
+    def _createEngine(self, connectionString=None):
         """Create and return a `sqlalchemy.Engine` for this `Registry`.
 
         This is a hook provided for customization by subclasses.
 
+        Parameters
+        ----------
+        connectionString : `sqlalchemy.engine.url.URL`, optional
+            Database to connect to, if not the one given by the ``db``
+            configuration option (e.g. a read-only replica).
+
         SQLAlchemy generally expects engines to be created at module scope,
         with a pool of connections used by different parts of an application.
         Because our `Registry` instances don't know what database they'll
@@ -142,9 +434,29 @@ class SqlRegistry(Registry):
         implementation of this function uses `sqlalchemy.pool.NullPool` to
         associate just a single connection with the engine.  Unless they
         have a very good reason not to, subclasses that override this method
-        should do the same.
+        should do the same, unless pooling is enabled in the configuration
+        (see `_getPoolOptions`).
+        """
+        return create_engine(connectionString or self.config.connectionString,
+                             **(self._getPoolOptions() or dict(poolclass=NullPool)))
+
+    def _getPoolOptions(self):
+        """Return keyword arguments for `sqlalchemy.create_engine` that
+        configure a connection pool, as set by the ``pool`` configuration
+        section.
+
+        Returns
+        -------
+        options : `dict`
+            Keyword arguments, or an empty `dict` if pooling is not enabled.
         """
-        return create_engine(self.config.connectionString, poolclass=NullPool)
+        if self._poolConfig is None:
+            return {}
+        return dict(poolclass=QueuePool,
+                    pool_size=self._poolConfig.get("size", 5),
+                    max_overflow=self._poolConfig.get("maxOverflow", 10),
+                    pool_recycle=self._poolConfig.get("recycle", -1),
+                    pool_timeout=self._poolConfig.get("timeout", 30))
 
     def _createConnection(self, engine):
         """Create and return a `sqlalchemy.Connection` for this `Registry`.
@@ -232,23 +544,81 @@ class SqlRegistry(Registry):
         ref : `DatasetRef`.
             A new `DatasetRef` instance.
         """
-        if datasetType is None:
-            datasetType = self.getDatasetType(row["dataset_type_name"])
-        run = self.getRun(id=row.run_id)
-        datasetRefHash = row["dataset_ref_hash"]
-        if dataId is None:
-            dataId = DataId({link: row[self._schema.tables["dataset"].c[link]]
-                             for link in datasetType.dimensions.links()},
-                            dimensions=datasetType.dimensions,
-                            universe=self.dimensions)
-        # Get components (if present)
-        components = {}
-        if datasetType.storageClass.isComposite():
-            datasetCompositionTable = self._schema.tables["dataset_composition"]
-            datasetTable = self._schema.tables["dataset"]
-            columns = list(datasetTable.c)
-            columns.append(datasetCompositionTable.c.component_name)
-            results = self._connection.execute(
+        ref, = self._makeDatasetRefsFromRows([row], datasetTypes=[datasetType], dataIds=[dataId])
+        return ref
+
+    def _makeDatasetRefsFromRows(self, rows, datasetTypes=None, dataIds=None):
+        """Construct DatasetRefs from the results of a query on the Dataset
+        table.
+
+        This is the bulk version of `_makeDatasetRefFromRow`; components of
+        all composite datasets are retrieved with a single query (per
+        `_maxBindParams` parents and level of composition).
+
+        Parameters
+        ----------
+        rows : `list` of `sqlalchemy.engine.RowProxy`.
+            Rows of a query that contains all columns from the `Dataset`
+            table.  May include additional fields (which will be ignored).
+        datasetTypes : `list` of `DatasetType` or `None`, optional
+            `DatasetType` associated with each row.  Any that are `None` (or
+            all, if the list itself is `None`) will be retrieved.  If
+            provided, the caller guarantees that they are already consistent
+            with what would have been retrieved from the database.
+        dataIds : `list` of `DataId` or `None`, optional
+            `DataId` associated with each row.  Any that are `None` (or all,
+            if the list itself is `None`) will be retrieved.  If provided, the
+            caller guarantees that they are already consistent with what would
+            have been retrieved from the database.
+
+        Returns
+        -------
+        refs : `list` of `DatasetRef`.
+            New `DatasetRef` instances, in the same order as ``rows``.
+        """
+        datasetTable = self._schema.tables["dataset"]
+        if datasetTypes is None:
+            datasetTypes = [None]*len(rows)
+        if dataIds is None:
+            dataIds = [None]*len(rows)
+        refs = []
+        composites = {}
+        for row, datasetType, dataId in zip(rows, datasetTypes, dataIds):
+            if datasetType is None:
+                datasetType = self.getDatasetType(row["dataset_type_name"])
+            run = self.getRun(id=row["run_id"])
+            if dataId is None:
+                dataId = DataId({link: row[datasetTable.c[link]]
+                                 for link in datasetType.dimensions.links()},
+                                dimensions=datasetType.dimensions,
+                                universe=self.dimensions)
+            ref = DatasetRef(datasetType=datasetType, dataId=dataId, id=row["dataset_id"], run=run,
+                             hash=row["dataset_ref_hash"])
+            if datasetType.storageClass.isComposite():
+                composites[ref.id] = ref
+            refs.append(ref)
+        if composites:
+            self._attachComponentRefs(composites)
+        return refs
+
+    def _attachComponentRefs(self, parents):
+        """Retrieve the components of many composite datasets and attach them
+        to their parent `DatasetRef`.
+
+        Parameters
+        ----------
+        parents : `dict`
+            Mapping from dataset ID to composite `DatasetRef`.  Components are
+            added to each ref in-place.
+        """
+        datasetCompositionTable = self._schema.tables["dataset_composition"]
+        datasetTable = self._schema.tables["dataset"]
+        columns = list(datasetTable.c)
+        columns.append(datasetCompositionTable.c.component_name)
+        columns.append(datasetCompositionTable.c.parent_dataset_id)
+        rows = []
+        for chunk in chunked(parents.keys(), self._maxBindParams):
+            rows.extend(self._executeRead(
                 select(
                     columns
                 ).select_from(
@@ -257,32 +627,62 @@ class SqlRegistry(Registry):
                         datasetTable.c.dataset_id == datasetCompositionTable.c.component_dataset_id
                     )
                 ).where(
-                    datasetCompositionTable.c.parent_dataset_id == row["dataset_id"]
+                    datasetCompositionTable.c.parent_dataset_id.in_(chunk)
                 )
-            ).fetchall()
-            for result in results:
-                componentName = result["component_name"]
-                componentDatasetType = DatasetType(
-                    DatasetType.nameWithComponent(datasetType.name, componentName),
-                    dimensions=datasetType.dimensions,
-                    storageClass=datasetType.storageClass.components[componentName]
-                )
-                components[componentName] = self._makeDatasetRefFromRow(result, dataId=dataId,
-                                                                        datasetType=componentDatasetType)
-            if not components.keys() <= datasetType.storageClass.components.keys():
+            ).fetchall())
+        parentRefs = [parents[row["parent_dataset_id"]] for row in rows]
+        componentDatasetTypes = [self._getComponentDatasetType(parentRef.datasetType, row["component_name"])
+                                 for row, parentRef in zip(rows, parentRefs)]
+        componentRefs = self._makeDatasetRefsFromRows(rows, datasetTypes=componentDatasetTypes,
+                                                      dataIds=[ref.dataId for ref in parentRefs])
+        for row, parentRef, componentRef in zip(rows, parentRefs, componentRefs):
+            parentRef._components[row["component_name"]] = componentRef
+        for parentRef in parents.values():
+            storageClass = parentRef.datasetType.storageClass
+            if not parentRef.components.keys() <= storageClass.components.keys():
                 raise RuntimeError(
                     f"Inconsistency detected between dataset and storage class definitions: "
-                    f"{datasetType.storageClass.name} has components "
-                    f"{set(datasetType.storageClass.components.keys())}, "
-                    f"but dataset has components {set(components.keys())}"
+                    f"{storageClass.name} has components "
+                    f"{set(storageClass.components.keys())}, "
+                    f"but dataset has components {set(parentRef.components.keys())}"
                 )
-        return DatasetRef(datasetType=datasetType, dataId=dataId, id=row["dataset_id"], run=run,
-                          hash=datasetRefHash, components=components)
+
+    def _getComponentDatasetType(self, datasetType, componentName):
+        """Return the `DatasetType` for a component of a composite
+        `DatasetType`.
+
+        Results are memoized, as the same component types are needed for
+        every composite dataset retrieved.
+
+        Parameters
+        ----------
+        datasetType : `DatasetType`
+            Composite `DatasetType`.
+        componentName : `str`
+            Name of the component.
+
+        Returns
+        -------
+        componentDatasetType : `DatasetType`
+            `DatasetType` of the component.
+        """
+        key = (datasetType, componentName)
+        componentDatasetType = self._componentDatasetTypes.get(key)
+        if componentDatasetType is None:
+            componentDatasetType = DatasetType(
+                DatasetType.nameWithComponent(datasetType.name, componentName),
+                dimensions=datasetType.dimensions,
+                storageClass=datasetType.storageClass.components[componentName]
+            )
+            self._componentDatasetTypes[key] = componentDatasetType
+        return componentDatasetType
 
     def getAllCollections(self):
         # Docstring inherited from Registry.getAllCollections
         datasetCollectionTable = self._schema.tables["dataset_collection"]
-        result = self._connection.execute(select([datasetCollectionTable.c.collection]).distinct()).fetchall()
+        result = self._executeRead(
+            select([datasetCollectionTable.c.collection]).distinct()
+        ).fetchall()
         if result is None:
             return set()
         return {r[0] for r in result}
@@ -296,7 +696,7 @@ class SqlRegistry(Registry):
         datasetCollectionTable = self._schema.tables["dataset_collection"]
         dataIdExpression = and_(self._schema.tables["dataset"].c[name] == dataId[name]
                                 for name in dataId.dimensions().links())
-        result = self._connection.execute(
+        result = self._executeRead(
             datasetTable.select().select_from(
                 datasetTable.join(datasetCollectionTable)
             ).where(
@@ -312,6 +712,55 @@ class SqlRegistry(Registry):
             return None
         return self._makeDatasetRefFromRow(result, datasetType=datasetType, dataId=dataId)
 
+    def findMany(self, collections, datasetType, dataIds):
+        # Docstring inherited from Registry.findMany
+        if not isinstance(datasetType, DatasetType):
+            datasetType = self.getDatasetType(datasetType)
+        collections = list(iterable(collections))
+        links = sorted(datasetType.dimensions.links())
+        # Map from the tuple of link values to the DataId it came from.
+        dataIds = {
+            tuple(dataId[link] for link in links): dataId
+            for dataId in (DataId(dataId, dimensions=datasetType.dimensions, universe=self.dimensions)
+                           for dataId in dataIds)
+        }
+        if not dataIds:
+            return {}
+        datasetTable = self._schema.tables["dataset"]
+        datasetCollectionTable = self._schema.tables["dataset_collection"]
+        where = [datasetTable.c.dataset_type_name == datasetType.name,
+                 datasetCollectionTable.c.collection.in_(collections)]
+        if len(links) == 1:
+            linkColumn = datasetTable.c[links[0]]
+        elif links:
+            linkColumn = tuple_(*[datasetTable.c[link] for link in links])
+        # For each data ID, the best row found so far and the rank of its
+        # collection in the search order.
+        found = {}
+        for chunk in chunked(dataIds.keys(), max(self._maxBindParams//max(len(links), 1), 1)):
+            if len(links) == 1:
+                dataIdExpression = [linkColumn.in_([key[0] for key in chunk])]
+            elif links:
+                dataIdExpression = [linkColumn.in_(chunk)]
+            else:
+                dataIdExpression = []
+            query = select(
+                list(datasetTable.c) + [datasetCollectionTable.c.collection]
+            ).select_from(
+                datasetTable.join(datasetCollectionTable)
+            ).where(
+                and_(*where, *dataIdExpression)
+            )
+            for row in self._executeRead(query):
+                key = tuple(row[datasetTable.c[link]] for link in links)
+                rank = collections.index(row["collection"])
+                if key not in found or rank < found[key][0]:
+                    found[key] = (rank, row)
+        rows = [row for _, row in found.values()]
+        refs = self._makeDatasetRefsFromRows(rows, datasetTypes=[datasetType]*len(rows),
+                                             dataIds=[dataIds[key] for key in found.keys()])
+        return {ref.dataId: ref for ref in refs}
+
     def query(self, sql, **params):
         """Execute a SQL SELECT statement directly.
 
@@ -337,7 +786,7 @@ class SqlRegistry(Registry):
         """
         # TODO: make this guard against non-SELECT queries.
         t = text(sql)
-        for row in self._connection.execute(t, **params):
+        for row in self._executeRead(t, **params):
             yield dict(row)
 
     @transactional
@@ -346,7 +795,7 @@ class SqlRegistry(Registry):
         # If the DatasetType is already in the cache, we assume it's already in
         # the DB (note that we don't actually provide a way to remove them from
         # the DB).
-        existingDatasetType = self._datasetTypes.get(datasetType.name, None)
+        existingDatasetType = self._findCachedDatasetType(datasetType.name)
         # If it's not in the cache, try to insert it.
         if existingDatasetType is None:
             try:
@@ -373,6 +822,9 @@ class SqlRegistry(Registry):
                           "dimension_name": dimensionName}
                          for dimensionName in datasetType.dimensions.names]
                     )
+                # Other threads only see the new DatasetType once the
+                # transaction commits.
+                self._getTransactionChanges()[-1].datasetTypes[datasetType.name] = datasetType
                 # Also register component DatasetTypes (if any).
                 for compName, compStorageClass in datasetType.storageClass.components.items():
                     compType = DatasetType(datasetType.componentTypeName(compName),
@@ -387,37 +839,64 @@ class SqlRegistry(Registry):
         else:
             raise ConflictingDefinitionError(f"DatasetType: {datasetType} != existing {existingDatasetType}")
 
+    def _refreshDatasetTypes(self):
+        """Load all `DatasetType` definitions into the in-memory cache with a
+        single query.
+
+        Storage classes are referred to by name, so `DatasetType` definitions
+        may be loaded before their `StorageClass` is registered.
+        """
+        datasetTypeTable = self._schema.tables["dataset_type"]
+        datasetTypeDimensionsTable = self._schema.tables["dataset_type_dimensions"]
+        result = self._connection.execute(
+            select(
+                [datasetTypeTable.c.dataset_type_name,
+                 datasetTypeTable.c.storage_class,
+                 datasetTypeDimensionsTable.c.dimension_name]
+            ).select_from(
+                datasetTypeTable.outerjoin(
+                    datasetTypeDimensionsTable,
+                    datasetTypeTable.c.dataset_type_name == datasetTypeDimensionsTable.c.dataset_type_name
+                )
+            )
+        )
+        storageClasses = {}
+        dimensionNames = defaultdict(list)
+        for name, storageClass, dimensionName in result:
+            storageClasses[name] = storageClass
+            if dimensionName is not None:
+                dimensionNames[name].append(dimensionName)
+        # Our own connection also sees DatasetTypes registered in the current
+        # thread's open transactions, which must not be shared yet.
+        pending = self._getPendingDatasetTypes()
+        self._datasetTypes = {
+            name: DatasetType(name=name, storageClass=storageClass,
+                              dimensions=self.dimensions.extract(dimensionNames[name]))
+            for name, storageClass in storageClasses.items() if name not in pending
+        }
+
     def getAllDatasetTypes(self):
         # Docstring inherited from Registry.getAllDatasetTypes.
+        # DatasetTypes are never removed or modified, so the number of rows in
+        # the dataset_type table is enough to tell whether another client has
+        # registered new ones since the cache was loaded.
         datasetTypeTable = self._schema.tables["dataset_type"]
-
-        # Get all the registered names
-        result = self._connection.execute(select([datasetTypeTable.c.dataset_type_name])).fetchall()
-        if result is None:
-            return frozenset()
-
-        datasetTypeNames = [r[0] for r in result]
-        return frozenset(self.getDatasetType(name) for name in datasetTypeNames)
+        count = self._connection.execute(select([func.count()]).select_from(datasetTypeTable)).scalar()
+        pending = self._getPendingDatasetTypes()
+        if count != len(self._datasetTypes) + len(pending):
+            self._refreshDatasetTypes()
+        return frozenset(self._datasetTypes.values()) | frozenset(pending.values())
 
     def getDatasetType(self, name):
         # Docstring inherited from Registry.getDatasetType.
-        datasetTypeTable = self._schema.tables["dataset_type"]
-        datasetTypeDimensionsTable = self._schema.tables["dataset_type_dimensions"]
-        # Get StorageClass from DatasetType table
-        result = self._connection.execute(select([datasetTypeTable.c.storage_class]).where(
-            datasetTypeTable.c.dataset_type_name == name)).fetchone()
-
-        if result is None:
-            raise KeyError("Could not find entry for datasetType {}".format(name))
-
-        storageClass = self.storageClasses.getStorageClass(result["storage_class"])
-        # Get Dimensions (if any) from DatasetTypeDimensions table
-        result = self._connection.execute(select([datasetTypeDimensionsTable.c.dimension_name]).where(
-            datasetTypeDimensionsTable.c.dataset_type_name == name)).fetchall()
-        dimensions = self.dimensions.extract((r[0] for r in result) if result else ())
-        datasetType = DatasetType(name=name,
-                                  storageClass=storageClass,
-                                  dimensions=dimensions)
+        datasetType = self._findCachedDatasetType(name)
+        if datasetType is None:
+            # Not in the cache; it may have been registered by another client
+            # (or the cache not yet populated).
+            self._refreshDatasetTypes()
+            datasetType = self._findCachedDatasetType(name)
+            if datasetType is None:
+                raise KeyError("Could not find entry for datasetType {}".format(name))
         return datasetType
 
     @transactional
@@ -466,15 +945,145 @@ class SqlRegistry(Registry):
                 self.attachComponent(component, datasetRef, compRef)
         return datasetRef
 
+    @transactional
+    def addDatasets(self, datasetType, dataIds, run, producer=None, recursive=True):
+        # Docstring inherited from Registry.addDatasets
+
+        if not isinstance(datasetType, DatasetType):
+            datasetType = self.getDatasetType(datasetType)
+
+        dataIds = [DataId(dataId, dimensions=datasetType.dimensions, universe=self.dimensions)
+                   for dataId in dataIds]
+        if not dataIds:
+            return []
+        if not self.limited:
+            self.expandDataIds(dataIds)
+        refs = [DatasetRef(datasetType=datasetType, dataId=dataId, run=run) for dataId in dataIds]
+
+        # Datasets are always initially associated with their Run collection,
+        # so any duplicate or pre-existing hash in that collection would make
+        # the association below fail; check for that up front so we can
+        # report all conflicts at once.
+        hashes = [ref.hash for ref in refs]
+        if len(set(hashes)) != len(hashes):
+            raise ConflictingDefinitionError(
+                f"Duplicate data IDs for dataset type {datasetType.name} in bulk insert."
+            )
+        datasetTable = self._schema.tables["dataset"]
+        datasetCollectionTable = self._schema.tables["dataset_collection"]
+        existing = []
+        for chunk in chunked(hashes, self._maxBindParams):
+            existing.extend(self._connection.execute(
+                select([datasetCollectionTable.c.dataset_ref_hash]).where(
+                    and_(datasetCollectionTable.c.collection == run.collection,
+                         datasetCollectionTable.c.dataset_ref_hash.in_(chunk))
+                )
+            ).fetchall())
+        if existing:
+            raise ConflictingDefinitionError(
+                f"{len(existing)} dataset(s) of type {datasetType.name} already exist in "
+                f"collection {run.collection}."
+            )
+
+        # Add the Dataset table entries themselves with a single executemany.
+        # TODO add producer
+        self._connection.execute(
+            datasetTable.insert(),
+            [dict(dataset_type_name=datasetType.name, run_id=run.id, dataset_ref_hash=ref.hash,
+                  quantum_id=None, **ref.dataId.implied())
+             for ref in refs]
+        )
+
+        # Executemany does not give us the autoincrement IDs, so read them
+        # back via the (run, hash) combination, which is unique for datasets
+        # in the Run collection.  We take the largest ID for each hash to
+        # guard against datasets that were previously removed from the Run
+        # collection but not deleted.
+        ids = {}
+        for chunk in chunked(hashes, self._maxBindParams):
+            for row in self._connection.execute(
+                select([datasetTable.c.dataset_ref_hash, func.max(datasetTable.c.dataset_id)]).where(
+                    and_(datasetTable.c.run_id == run.id,
+                         datasetTable.c.dataset_type_name == datasetType.name,
+                         datasetTable.c.dataset_ref_hash.in_(chunk))
+                ).group_by(datasetTable.c.dataset_ref_hash)
+            ):
+                ids[row[0]] = row[1]
+        for ref in refs:
+            ref._id = ids[ref.hash]
+
+        self._connection.execute(
+            datasetCollectionTable.insert(),
+            [{"dataset_id": ref.id, "dataset_ref_hash": ref.hash, "collection": run.collection}
+             for ref in refs]
+        )
+
+        if recursive:
+            datasetCompositionTable = self._schema.tables["dataset_composition"]
+            for component in datasetType.storageClass.components:
+                compTypeName = datasetType.componentTypeName(component)
+                compDatasetType = self.getDatasetType(compTypeName)
+                compRefs = self.addDatasets(compDatasetType, dataIds, run=run, producer=producer,
+                                            recursive=True)
+                self._connection.execute(
+                    datasetCompositionTable.insert(),
+                    [dict(component_name=component, parent_dataset_id=ref.id,
+                          component_dataset_id=compRef.id)
+                     for ref, compRef in zip(refs, compRefs)]
+                )
+                for ref, compRef in zip(refs, compRefs):
+                    ref._components[component] = compRef
+        return refs
+
     def getDataset(self, id, datasetType=None, dataId=None):
         # Docstring inherited from Registry.getDataset
         datasetTable = self._schema.tables["dataset"]
-        result = self._connection.execute(
+        result = self._executeRead(
             select([datasetTable]).where(datasetTable.c.dataset_id == id)).fetchone()
         if result is None:
             return None
         return self._makeDatasetRefFromRow(result, datasetType=datasetType, dataId=dataId)
 
+    def _getDatasets(self, ids, datasetTypes=None, dataIds=None):
+        """Retrieve many Dataset entries.
+
+        This is the bulk version of `getDataset`, used by query builders to
+        avoid per-row queries.
+
+        Parameters
+        ----------
+        ids : `list` of `int`
+            The unique identifiers for the Datasets.
+        datasetTypes : `list` of `DatasetType` or `None`, optional
+            The `DatasetType` of each dataset to retrieve; see `getDataset`.
+        dataIds : `list` of `DataId` or `None`, optional
+            The `DataId` of each dataset to retrieve; see `getDataset`.
+
+        Returns
+        -------
+        refs : `list` of `DatasetRef` or `None`
+            Refs to the Datasets, in the same order as ``ids``, with `None`
+            for any that were not found.
+        """
+        if datasetTypes is None:
+            datasetTypes = [None]*len(ids)
+        if dataIds is None:
+            dataIds = [None]*len(ids)
+        datasetTable = self._schema.tables["dataset"]
+        rowsById = {}
+        for chunk in chunked(set(ids), self._maxBindParams):
+            for row in self._executeRead(
+                select([datasetTable]).where(datasetTable.c.dataset_id.in_(chunk))
+            ):
+                rowsById[row["dataset_id"]] = row
+        found = [(row, datasetType, dataId)
+                 for row, datasetType, dataId in zip((rowsById.get(id) for id in ids), datasetTypes, dataIds)
+                 if row is not None]
+        refs = iter(self._makeDatasetRefsFromRows([row for row, _, _ in found],
+                                                  datasetTypes=[datasetType for _, datasetType, _ in found],
+                                                  dataIds=[dataId for _, _, dataId in found]))
+        return [next(refs) if id in rowsById else None for id in ids]
+
     @transactional
     def removeDataset(self, ref):
         # Docstring inherited from Registry.removeDataset.
@@ -542,42 +1151,133 @@ class SqlRegistry(Registry):
         self._connection.execute(datasetCompositionTable.insert().values(**values))
         parent._components[name] = component
 
+    def _insertOrIgnore(self, table, rows, keys):
+        """Insert rows into a table, silently skipping any that conflict with
+        an existing row.
+
+        This is a hook provided for customization by subclasses, which should
+        replace it with a single statement using the database's "UPSERT" or
+        "MERGE" syntax.  The default implementation inserts each row in its
+        own savepoint, and is only concurrency-safe for databases that
+        implement transactions with database- or table-wide locks (e.g.
+        SQLite).
+
+        Parameters
+        ----------
+        table : `sqlalchemy.schema.Table`
+            Table to insert into.
+        rows : `list` of `dict`
+            Rows to insert, as dictionaries mapping column name to value.
+            All rows must have the same keys.
+        keys : `tuple` of `str`
+            Names of the columns of the unique constraint that may cause a
+            conflict.
+        """
+        insertQuery = table.insert()
+        for row in rows:
+            # Use a bare savepoint rather than self.transaction(), so an
+            # expected conflict does not clear the registry's caches.
+            try:
+                with self._connection.begin_nested():
+                    self._connection.execute(insertQuery, row)
+            except IntegrityError:
+                pass
+
+    def _upsert(self, table, rows, keys):
+        """Insert rows into a table, replacing the non-key columns of any
+        that conflict with an existing row.
+
+        This is a hook provided for customization by subclasses, which should
+        replace it with a single statement using the database's "UPSERT" or
+        "MERGE" syntax.  The default implementation tries to insert each row
+        in its own savepoint and updates the existing row if that fails, and
+        is only concurrency-safe for databases that implement transactions
+        with database- or table-wide locks (e.g. SQLite).
+
+        Parameters
+        ----------
+        table : `sqlalchemy.schema.Table`
+            Table to insert into.
+        rows : `list` of `dict`
+            Rows to insert, as dictionaries mapping column name to value.
+            All rows must have the same keys.
+        keys : `tuple` of `str`
+            Names of the columns of the unique constraint that may cause a
+            conflict.
+        """
+        insertQuery = table.insert()
+        updateQuery = table.update().where(
+            and_(*[table.columns[k] == bindparam(f"_{k}") for k in keys]))
+        for row in rows:
+            # Use a bare savepoint rather than self.transaction(), so an
+            # expected conflict does not clear the registry's caches.
+            try:
+                with self._connection.begin_nested():
+                    self._connection.execute(insertQuery, row)
+                continue
+            except IntegrityError as err:
+                insertError = err
+            values = {k: v for k, v in row.items() if k not in keys}
+            values.update((f"_{k}", row[k]) for k in keys)
+            result = self._connection.execute(updateQuery, values)
+            if result.rowcount == 0:
+                # The insert failed for some reason other than a conflict.
+                raise insertError
+
     @transactional
     def associate(self, collection, refs):
         # Docstring inherited from Registry.associate.
 
-        # Most SqlRegistry subclass implementations should replace this
-        # implementation with special "UPSERT" or "MERGE" syntax.  This
-        # implementation is only concurrency-safe for databases that implement
-        # transactions with database- or table-wide locks (e.g. SQLite).
-
-        datasetCollectionTable = self._schema.tables["dataset_collection"]
-        insertQuery = datasetCollectionTable.insert()
-        checkQuery = select([datasetCollectionTable.c.dataset_id], whereclause=and_(
-            datasetCollectionTable.c.collection == collection,
-            datasetCollectionTable.c.dataset_ref_hash == bindparam("hash")))
-
-        for ref in refs:
+        # Gather the refs and all of their components, keyed by the hash of
+        # their DatasetType and DataId, which must be unique within a
+        # collection.
+        expected = {}
+        toVisit = list(refs)
+        while toVisit:
+            ref = toVisit.pop()
             if ref.id is None:
                 raise AmbiguousDatasetError(f"Cannot associate dataset {ref} without ID.")
+            existing = expected.setdefault(ref.hash, ref)
+            if existing.id != ref.id:
+                raise ConflictingDefinitionError(
+                    f"Datasets {existing} and {ref} with different IDs cannot both be associated "
+                    f"with collection {collection}."
+                )
+            toVisit.extend(ref.components.values())
+        if not expected:
+            return
 
-            try:
-                with self.transaction():
-                    self._connection.execute(insertQuery, {"dataset_id": ref.id, "dataset_ref_hash": ref.hash,
-                                                           "collection": collection})
-            except IntegrityError as exc:
-                # Did we clash with a completely duplicate entry (because this
-                # dataset is already in this collection)?  Or is there already
-                # a different dataset with the same DatasetType and data ID in
-                # this collection?  Only the latter is an error.
-                row = self._connection.execute(checkQuery, hash=ref.hash).fetchone()
+        # Insert all rows in bulk, ignoring any that clash with an existing
+        # entry; then check whether those clashes were complete duplicates
+        # (because the dataset is already in this collection, which is fine)
+        # or whether there is already a different dataset with the same
+        # DatasetType and data ID in this collection (which is an error).
+        datasetCollectionTable = self._schema.tables["dataset_collection"]
+        self._insertOrIgnore(
+            datasetCollectionTable,
+            [{"dataset_id": ref.id, "dataset_ref_hash": refHash, "collection": collection}
+             for refHash, ref in expected.items()],
+            keys=("dataset_ref_hash", "collection")
+        )
+        conflicts = []
+        for chunk in chunked(expected.keys(), self._maxBindParams):
+            for row in self._connection.execute(
+                select(
+                    [datasetCollectionTable.c.dataset_ref_hash, datasetCollectionTable.c.dataset_id]
+                ).where(
+                    and_(datasetCollectionTable.c.collection == collection,
+                         datasetCollectionTable.c.dataset_ref_hash.in_(chunk))
+                )
+            ):
+                ref = expected[row.dataset_ref_hash]
                 if row.dataset_id != ref.id:
-                    raise ConflictingDefinitionError(
-                        "A dataset of type {} with id: {} already exists in collection {}".format(
-                            ref.datasetType, ref.dataId, collection
-                        )
-                    ) from exc
-            self.associate(collection, ref.components.values())
+                    conflicts.append(ref)
+        if conflicts:
+            raise ConflictingDefinitionError(
+                "Datasets of type/id {} already exist in collection {}".format(
+                    ", ".join(f"{ref.datasetType.name}/{ref.dataId}" for ref in conflicts), collection
+                )
+            )
 
     @transactional
     def disassociate(self, collection, refs):
@@ -601,12 +1301,23 @@ class SqlRegistry(Registry):
                       datastore_name=datastoreName)
         self._connection.execute(datasetStorageTable.insert().values(**values))
 
+    @transactional
+    def addDatasetLocations(self, refs, datastoreName):
+        # Docstring inherited from Registry.addDatasetLocations.
+        rows = []
+        for ref in refs:
+            if ref.id is None:
+                raise AmbiguousDatasetError(f"Cannot add location for dataset {ref} without ID.")
+            rows.append(dict(dataset_id=ref.id, datastore_name=datastoreName))
+        if rows:
+            self._connection.execute(self._schema.tables["dataset_storage"].insert(), rows)
+
     def getDatasetLocations(self, ref):
         # Docstring inherited from Registry.getDatasetLocation.
         if ref.id is None:
             raise AmbiguousDatasetError(f"Cannot add location for dataset {ref} without ID.")
         datasetStorageTable = self._schema.tables["dataset_storage"]
-        result = self._connection.execute(
+        result = self._executeRead(
             select([datasetStorageTable.c.datastore_name]).where(
                 and_(datasetStorageTable.c.dataset_id == ref.id))).fetchall()
 
@@ -792,9 +1503,7 @@ class SqlRegistry(Registry):
         if skypixJoin is not None:
             for dataId in dataIdList:
                 if dataId.region is not None:
-                    for begin, end in self.pixelization.envelope(dataId.region).ranges():
-                        for skypix in range(begin, end):
-                            skypixParams.append(dict(dataId, skypix=skypix))
+                    skypixParams.extend(self._makeSkyPixJoinRows(dataId))
         try:
             self._connection.execute(table.insert(), *[dataId.fields(dimension, region=True) for dataId in
                                                        dataIdList])
@@ -802,8 +1511,8 @@ class SqlRegistry(Registry):
         except IntegrityError as exc:
             # TODO check for conflict, not just existence.
             raise ConflictingDefinitionError(f"Existing definition for {dimension.name} entry.") from exc
-        if skypixJoin is not None:
-            self._connection.execute(self._schema.tables[skypixJoin.name].insert(), *skypixParams)
+        if skypixParams:
+            self._connection.execute(self._getSkyPixJoinTable(skypixJoin).insert(), *skypixParams)
         return dataIdList
 
     @disableWhenLimited
@@ -812,7 +1521,7 @@ class SqlRegistry(Registry):
         if not isinstance(dimension, Dimension):
             dimension = self.dimensions[dimension]
         table = self._schema.tables[dimension.name]
-        result = self._connection.execute(select([table])).fetchall()
+        result = self._executeRead(select([table])).fetchall()
 
         if result is None:
             return []
@@ -828,7 +1537,7 @@ class SqlRegistry(Registry):
         # and this should ensure it's a true `Dimension`, not a `str` name.
         dimension, = dataId.dimensions().leaves
         table = self._schema.tables[dimension.name]
-        result = self._connection.execute(select([table]).where(
+        result = self._executeRead(select([table]).where(
             and_(table.c[name] == value for name, value in dataId.items()))).fetchone()
         if result is not None:
             return dict(result.items())
@@ -848,6 +1557,7 @@ class SqlRegistry(Registry):
                 f"Data ID contains superfluous keys: {dataId.dimensions().links() - holder.links()}"
             )
         table = self._schema.tables[holder.name]
+        self._invalidateDimensionEntry(holder, dataId)
         # Update the region for an existing entry
         if update:
             result = self._connection.execute(
@@ -873,48 +1583,201 @@ class SqlRegistry(Registry):
         )
         if join is None:
             return
+        joinTable = self._getSkyPixJoinTable(join)
         if update:
             # Delete any old skypix join entries for this Dimension
             self._connection.execute(
-                self._schema.tables[join.name].delete().where(
-                    and_((self._schema.tables[join.name].c[name] == dataId[name]
-                          for name in holder.links()))
+                joinTable.delete().where(
+                    and_((joinTable.c[name] == dataId[name] for name in holder.links()))
                 )
             )
-        parameters = []
-        for begin, end in self.pixelization.envelope(dataId.region).ranges():
-            for skypix in range(begin, end):
-                parameters.append(dict(dataId, skypix=skypix))
-        self._connection.execute(self._schema.tables[join.name].insert(), parameters)
+        self._connection.execute(joinTable.insert(), self._makeSkyPixJoinRows(dataId))
         return dataId
 
+    def _getSkyPixJoinTable(self, join):
+        """Return the table that stores the rows of a skypix join.
+
+        Parameters
+        ----------
+        join : `DimensionJoin`
+            A join between a dimension with a region and "skypix" that is
+            materialized as a table.
+
+        Returns
+        -------
+        table : `sqlalchemy.Table`
+            The ``*_skypix_join`` table for ``join``, or the corresponding
+            ``*_skypix_range`` table if the ``skypix.ranges`` configuration
+            option is set.
+        """
+        if self._skyPixRanges:
+            return self._schema.tables[getSkyPixRangeTableName(join)]
+        return self._schema.tables[join.name]
+
+    def _makeSkyPixJoinRows(self, dataId):
+        """Return the skypix join table rows for a data ID with a region.
+
+        Parameters
+        ----------
+        dataId : `DataId`
+            Data ID with a region, identifying a row of the region holder's
+            table.
+
+        Returns
+        -------
+        rows : `list` of `dict`
+            Rows for the table returned by `_getSkyPixJoinTable`.
+        """
+        if self._skyPixMinLevel is not None:
+            ranges = makeAdaptiveSkyPixRanges(dataId.region, self.pixelization, self.coarserPixelizations,
+                                              self._skyPixMaxFalsePositiveFraction)
+        else:
+            ranges = self.pixelization.envelope(dataId.region).ranges()
+        if self._skyPixRanges:
+            return [dict(dataId, skypix_begin=begin, skypix_end=end) for begin, end in ranges]
+        return [dict(dataId, skypix=skypix) for begin, end in ranges for skypix in range(begin, end)]
+
+    @property
+    def coarserPixelizations(self):
+        """Pixelizations at the levels coarser than `pixelization` that
+        regions may be stored at, from coarsest to finest (`tuple` of
+        `lsst.sphgeom.Pixelization`).
+
+        Empty unless the ``skypix.adaptive.minLevel`` configuration option
+        is set.
+        """
+        if self._coarserPixelizations is None:
+            if self._skyPixMinLevel is None:
+                self._coarserPixelizations = ()
+            else:
+                pixelizationCls = doImport(self.config["skypix", "cls"])
+                self._coarserPixelizations = tuple(
+                    pixelizationCls(level=level)
+                    for level in range(self._skyPixMinLevel, self.config["skypix", "level"])
+                )
+        return self._coarserPixelizations
+
+    @disableWhenLimited
+    @transactional
+    def migrateSkyPixJoins(self):
+        """Convert the contents of the skypix join tables to the
+        representation selected by the ``skypix.ranges`` configuration
+        option.
+
+        Rows are moved from the ``*_skypix_join`` tables (one row per skypix)
+        to the ``*_skypix_range`` tables (one row per range of consecutive
+        skypix IDs) if the option is set, and in the opposite direction if
+        it is not.  This is needed when changing the option for an existing
+        repository.
+
+        Returns
+        -------
+        count : `int`
+            Number of rows inserted into the destination tables.
+
+        Notes
+        -----
+        All rows of each source table are read into memory at once.
+        """
+        count = 0
+        for join in self.dimensions.joins():
+            if not isMaterializedSkyPixJoin(self, join):
+                continue
+            pixelTable = self._schema.tables[join.name]
+            rangeTable = self._schema.tables[getSkyPixRangeTableName(join)]
+            links = sorted(join.lhs.links())
+            if self._skyPixRanges:
+                source, destination = pixelTable, rangeTable
+                pixels = defaultdict(list)
+                for row in self._connection.execute(select([pixelTable])):
+                    pixels[tuple(row[link] for link in links)].append(row["skypix"])
+                rows = [dict(zip(links, key), skypix_begin=begin, skypix_end=end)
+                        for key, values in pixels.items()
+                        for begin, end in collapseSkyPixRanges(values)]
+            else:
+                source, destination = rangeTable, pixelTable
+                rows = [dict(zip(links, (row[link] for link in links)), skypix=skypix)
+                        for row in self._connection.execute(select([rangeTable]))
+                        for skypix in range(row["skypix_begin"], row["skypix_end"])]
+            if rows:
+                self._connection.execute(destination.insert(), rows)
+            self._connection.execute(source.delete())
+            count += len(rows)
+        return count
+
+    @property
+    def dimensionEntryCache(self):
+        """Cache of dimension table rows used to expand data IDs
+        (`DimensionEntryCache`).
+
+        Its ``hits`` and ``misses`` attributes and ``getStatistics`` method
+        may be used to monitor its effectiveness.
+        """
+        return self._dimensionEntryCache
+
     @disableWhenLimited
     def _queryMetadata(self, element, dataId, columns):
         # Docstring inherited from Registry._queryMetadata.
-        # TODO: Hard-coding of instrument and skymap as the dimensions to cache
-        # here is a bit ugly; should be fixed on DM-17023.
-        if element.name == "instrument":
-            result = self._cachedInstrumentEntries.get(dataId["instrument"])
-            if result is not None and frozenset(columns).issubset(result.keys()):
-                return result
-        elif element.name == "skymap":
-            result = self._cachedSkyMapEntries.get(dataId["skymap"])
-            if result is not None and frozenset(columns).issubset(result.keys()):
-                return result
-        table = self._schema.tables[element.name]
-        cols = [table.c[col] for col in columns]
-        row = self._connection.execute(
-            select(cols)
-            .where(
-                and_(table.c[name] == value for name, value in dataId.items()
-                     if name in element.links())
-            )
-        ).fetchone()
-        if row is None:
-            raise LookupError(f"{element.name} entry for {dataId} not found.")
-        result = {c.name: row[c.name] for c in cols}
-        if element.name == "instrument":
-            self._cachedInstrumentEntries.setdefault(dataId["instrument"], {}).update(result)
-        elif element.name == "skymap":
-            self._cachedSkyMapEntries.setdefault(dataId["skymap"], {}).update(result)
+        result, = self._queryMetadataMany(element, [dataId], columns)
         return result
+
+    @disableWhenLimited
+    def _queryMetadataMany(self, element, dataIds, columns):
+        # Docstring inherited from Registry._queryMetadataMany.
+        cache = self._dimensionEntryCache
+        table = self._schema.tables[element.name]
+        # Replicas may lag behind the primary, and nothing would ever evict a
+        # stale row read from one, so the cache is only filled from the
+        # primary.  Rows read inside a transaction may not be committed yet,
+        # so they are not cached either.
+        changesStack = self._getTransactionChanges()
+        cacheable = not changesStack
+        if cacheable and cache.needsPreload(element):
+            cache.putAll(element, (dict(r.items()) for r in self._connection.execute(select([table]))))
+        links = sorted(element.links())
+        # Entries modified by the current transaction must be read back from
+        # the database, even if another thread has cached the old rows.
+        modified = {tuple(dataId[link] for link in links)
+                    for changes in changesStack for modifiedElement, dataId in changes.invalidated
+                    if modifiedElement.name == element.name}
+        rows = [None if modified and tuple(dataId[link] for link in links) in modified
+                else cache.get(element, dataId)
+                for dataId in dataIds]
+        # Map primary key values to the indices of the data IDs that need them
+        # but were not in the cache.
+        missing = defaultdict(list)
+        for i, row in enumerate(rows):
+            if row is None:
+                missing[tuple(dataIds[i][link] for link in links)].append(i)
+        if len(links) == 1:
+            linkColumn = table.c[links[0]]
+        else:
+            linkColumn = tuple_(*[table.c[link] for link in links])
+        # Fetch (and cache) all columns, so later requests for different
+        # columns of the same rows can be served from the cache.
+        for chunk in chunked(missing.keys(), max(self._maxBindParams//len(links), 1)):
+            if len(links) == 1:
+                chunk = [key for key, in chunk]
+            index, results = self._executeReadRouted(select([table]).where(linkColumn.in_(chunk)))
+            for result in results:
+                row = dict(result.items())
+                if cacheable and index is None:
+                    cache.put(element, row)
+                for i in missing.get(tuple(row[link] for link in links), ()):
+                    rows[i] = row
+        for i, row in enumerate(rows):
+            if row is None:
+                # The batched lookup above compares key values in Python; let
+                # the database compare them (e.g. with type conversions)
+                # before giving up.
+                result = self._executeRead(
+                    select([table])
+                    .where(
+                        and_(table.c[name] == value for name, value in dataIds[i].items()
+                             if name in element.links())
+                    )
+                ).fetchone()
+                if result is None:
+                    raise LookupError(f"{element.name} entry for {dataIds[i]} not found.")
+                rows[i] = dict(result.items())
+        return [{column: row[column] for column in columns} for row in rows]
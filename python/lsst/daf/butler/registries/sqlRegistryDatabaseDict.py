@@ -21,6 +21,7 @@
 
 __all__ = ("SqlRegistryDatabaseDict",)
 
+from collections.abc import ItemsView, ValuesView
 from datetime import datetime
 
 from sqlalchemy import Table, Column, \
@@ -30,6 +31,26 @@ from sqlalchemy.sql import select, bindparam, func
 from sqlalchemy.exc import IntegrityError, StatementError
 
 from lsst.daf.butler import DatabaseDict
+from lsst.daf.butler.core.utils import chunked
+
+
+class _SqlRegistryDatabaseDictItemsView(ItemsView):
+    """An items view of a `SqlRegistryDatabaseDict` that reads all rows in a
+    single query.
+    """
+
+    def __iter__(self):
+        yield from self._mapping._iterRows()
+
+
+class _SqlRegistryDatabaseDictValuesView(ValuesView):
+    """A values view of a `SqlRegistryDatabaseDict` that reads all rows in a
+    single query.
+    """
+
+    def __iter__(self):
+        for _, value in self._mapping._iterRows():
+            yield value
 
 
 class SqlRegistryDatabaseDict(DatabaseDict):
@@ -99,7 +120,9 @@ class SqlRegistryDatabaseDict(DatabaseDict):
         valueColumns = [getattr(self._table.columns, name) for name in self._value.fields()]
         keyColumn = getattr(self._table.columns, key)
         self._getSql = select(valueColumns).where(keyColumn == bindparam("key"))
-        self._updateSql = self._table.update().where(keyColumn == bindparam("key"))
+        self._getManySql = select([keyColumn] + valueColumns).where(
+            keyColumn.in_(bindparam("keys", expanding=True)))
+        self._itemsSql = select([keyColumn] + valueColumns)
         self._delSql = self._table.delete().where(keyColumn == bindparam("key"))
         self._keysSql = select([keyColumn])
         self._lenSql = select([func.count(keyColumn)])
@@ -111,37 +134,7 @@ class SqlRegistryDatabaseDict(DatabaseDict):
         return self._value(*row)
 
     def __setitem__(self, key, value):
-        assert isinstance(value, self._value)
-        # Try insert first, as we expect that to be the most commmon usage
-        # pattern.
-        kwds = value._asdict()
-        kwds[self._key] = key
-        with self.registry._connection.begin_nested():
-            try:
-                self.registry._connection.execute(self._table.insert(), **kwds)
-                return
-            except IntegrityError as e:
-                # Swallow the expected IntegrityError (due to i.e. duplicate
-                # primary key values)
-                # TODO: would be better to explicitly inspect the error, but
-                # this is tricky.
-                if "CHECK constraint failed" in str(e):
-                    raise ValueError(f"{e}") from e
-            except StatementError as err:
-                raise TypeError("Bad data types in value: {}".format(err)) from err
-
-        # If we fail due to an IntegrityError (i.e. duplicate primary key
-        # values), try to do an update instead.
-        kwds.pop(self._key, None)
-        with self.registry._connection.begin_nested():
-            try:
-                self.registry._connection.execute(self._updateSql, key=key, **kwds)
-            except StatementError as err:
-                # n.b. we can't rely on a failure in the insert attempt above
-                # to have caught this case, because we trap for IntegrityError
-                # first.  And we have to do that because IntegrityError is a
-                # StatementError.
-                raise TypeError("Bad data types in value: {}".format(err)) from err
+        self.setMany({key: value})
 
     def __delitem__(self, key):
         with self.registry._connection.begin():
@@ -156,5 +149,54 @@ class SqlRegistryDatabaseDict(DatabaseDict):
     def __len__(self):
         return self.registry._connection.execute(self._lenSql).scalar()
 
-    # TODO: add custom view objects for at views() and items(), so we don't
-    # invoke a __getitem__ call for every key.
+    def _iterRows(self):
+        """Iterate over all ``(key, value)`` pairs using a single query."""
+        for row in self.registry._connection.execute(self._itemsSql):
+            yield row[0], self._value(*row[1:])
+
+    def items(self):
+        return _SqlRegistryDatabaseDictItemsView(self)
+
+    def values(self):
+        return _SqlRegistryDatabaseDictValuesView(self)
+
+    def getMany(self, keys):
+        # Docstring inherited from DatabaseDict.getMany.
+        result = {}
+        for chunk in chunked(set(keys), self.registry._maxBindParams):
+            for row in self.registry._connection.execute(self._getManySql, keys=chunk):
+                result[row[0]] = self._value(*row[1:])
+        return result
+
+    def setMany(self, mapping):
+        # Docstring inherited from DatabaseDict.setMany.
+        rows = []
+        for key, value in dict(mapping).items():
+            assert isinstance(value, self._value)
+            row = value._asdict()
+            row[self._key] = key
+            rows.append(row)
+        if not rows:
+            return
+        # Write everything with the registry's UPSERT statement, in a
+        # savepoint so a failure leaves the table unchanged.
+        with self.registry._connection.begin_nested():
+            try:
+                self.registry._upsert(self._table, rows, (self._key,))
+            except IntegrityError as err:
+                if "CHECK constraint failed" in str(err):
+                    raise ValueError(f"{err}") from err
+                if "datatype mismatch" in str(err):
+                    raise TypeError("Bad data types in key: {}".format(err)) from err
+                raise
+            except StatementError as err:
+                # IntegrityError is a StatementError, so this must come
+                # second.
+                raise TypeError("Bad data types in value: {}".format(err)) from err
+
+    def update(self, other=(), **kwds):
+        # Write all items with a few bulk statements instead of one
+        # __setitem__ call each.
+        mapping = dict(other)
+        mapping.update(kwds)
+        self.setMany(mapping)
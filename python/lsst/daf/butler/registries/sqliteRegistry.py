@@ -26,8 +26,9 @@ from contextlib import closing
 from sqlalchemy import event
 from sqlalchemy import create_engine
 from sqlalchemy.pool import NullPool
+from sqlalchemy.sql import text, bindparam
 
-from sqlite3 import Connection as SQLite3Connection
+from sqlite3 import Connection as SQLite3Connection, sqlite_version_info
 
 from lsst.daf.butler.core.config import Config
 from lsst.daf.butler.core.registryConfig import RegistryConfig
@@ -36,6 +37,11 @@ from lsst.daf.butler.core.repoRelocation import replaceRoot
 from .sqlRegistry import SqlRegistry, SqlRegistryConfig
 
 
+_PRAGMAS = frozenset(["journal_mode", "synchronous", "cache_size", "mmap_size", "temp_store", "busy_timeout"])
+"""Names of the SQLite pragmas that may be set by a performance profile.
+"""
+
+
 def _onSqlite3Connect(dbapiConnection, connectionRecord):
     assert isinstance(dbapiConnection, SQLite3Connection)
     # Prevent pysqlite from emitting BEGIN and COMMIT statements.
@@ -43,7 +49,50 @@ def _onSqlite3Connect(dbapiConnection, connectionRecord):
     # Enable foreign keys
     with closing(dbapiConnection.cursor()) as cursor:
         cursor.execute("PRAGMA foreign_keys=ON;")
-        cursor.execute("PRAGMA busy_timeout = 300000;")  # in ms, so 5min (way longer than should be needed)
+
+
+def _makePragmaStatements(pragmas):
+    """Validate a SQLite performance profile and return the statements that
+    apply it.
+
+    Parameters
+    ----------
+    pragmas : `dict`
+        Mapping from pragma name to value.  Names must be in `_PRAGMAS`, and
+        values must be integers or simple keywords (e.g. ``WAL``).
+
+    Returns
+    -------
+    statements : `list` of `str`
+        ``PRAGMA`` statements, in a deterministic order.
+
+    Raises
+    ------
+    ValueError
+        Raised if a pragma name or value is not valid.
+    """
+    statements = []
+    for name in sorted(pragmas):
+        value = pragmas[name]
+        if value is None:
+            continue
+        if name not in _PRAGMAS:
+            raise ValueError(f"Unsupported SQLite pragma '{name}'; expected one of {sorted(_PRAGMAS)}.")
+        if isinstance(value, bool) or not (isinstance(value, int) or str(value).isalpha()):
+            raise ValueError(f"Invalid value {value!r} for SQLite pragma '{name}'.")
+        statements.append(f"PRAGMA {name} = {value};")
+    return statements
+
+
+def _makeSqlite3PragmaListener(statements):
+    """Return a connect event listener that executes the given ``PRAGMA``
+    statements.
+    """
+    def onConnect(dbapiConnection, connectionRecord):
+        with closing(dbapiConnection.cursor()) as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+    return onConnect
 
 
 def _onSqlite3Begin(connection):
@@ -63,6 +112,15 @@ class SqliteRegistry(SqlRegistry):
     ----------
     config : `SqlRegistryConfig` or `str`
         Load configuration
+
+    Notes
+    -----
+    The ``sqlite.profile`` configuration option names one of the entries in
+    ``sqlite.profiles``, each of which is a mapping from SQLite pragma name
+    to the value set on every new connection.  The ``performance`` profile
+    uses a write-ahead log, so readers are not blocked while a dataset is
+    being ingested, and syncs to disk only at checkpoints rather than on
+    every commit; a database that has been opened in WAL mode stays in it.
     """
 
     @classmethod
@@ -102,13 +160,70 @@ class SqliteRegistry(SqlRegistry):
         registryConfig = SqlRegistryConfig(registryConfig)
         if "db" in registryConfig:
             registryConfig["db"] = replaceRoot(registryConfig["db"], butlerRoot)
+        if registryConfig.get("readOnlyDb"):
+            registryConfig["readOnlyDb"] = [replaceRoot(db, butlerRoot)
+                                            for db in registryConfig["readOnlyDb"]]
         if ":memory:" in registryConfig.get("db", ""):
             create = True
+            # Each connection to an in-memory database sees a different
+            # database, so they cannot be pooled.
+            registryConfig["pool", "enabled"] = False
         super().__init__(registryConfig, schemaConfig, dimensionConfig, create, butlerRoot=butlerRoot)
 
-    def _createEngine(self):
-        engine = create_engine(self.config.connectionString, poolclass=NullPool,
-                               connect_args={"check_same_thread": False})
+    def _createEngine(self, connectionString=None):
+        engine = create_engine(connectionString or self.config.connectionString,
+                               connect_args={"check_same_thread": False},
+                               **(self._getPoolOptions() or dict(poolclass=NullPool)))
         event.listen(engine, "connect", _onSqlite3Connect)
+        statements = self._getPragmaStatements()
+        if statements:
+            event.listen(engine, "connect", _makeSqlite3PragmaListener(statements))
         event.listen(engine, "begin", _onSqlite3Begin)
         return engine
+
+    def _getPragmaStatements(self):
+        """Return the ``PRAGMA`` statements for the configured SQLite
+        performance profile.
+
+        Returns
+        -------
+        statements : `list` of `str`
+            Statements to execute on each new connection; empty if no profile
+            is configured.
+
+        Raises
+        ------
+        ValueError
+            Raised if the profile does not exist or is not valid.
+        """
+        profile = self.config.get(("sqlite", "profile"))
+        if profile is None:
+            return []
+        pragmas = self.config.get(("sqlite", "profiles", profile))
+        if pragmas is None:
+            raise ValueError(f"Unknown SQLite performance profile '{profile}'.")
+        return _makePragmaStatements(pragmas)
+
+    def _insertOrIgnore(self, table, rows, keys):
+        # Docstring inherited from SqlRegistry._insertOrIgnore.
+        if rows:
+            self._connection.execute(table.insert().prefix_with("OR IGNORE"), rows)
+
+    def _upsert(self, table, rows, keys):
+        # Docstring inherited from SqlRegistry._upsert.
+        if sqlite_version_info < (3, 24, 0):
+            # UPSERT syntax is not supported.
+            return super()._upsert(table, rows, keys)
+        if not rows:
+            return
+        columns = list(rows[0].keys())
+        updates = [c for c in columns if c not in keys]
+        onConflict = (f"DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in updates)}"
+                      if updates else "DO NOTHING")
+        sql = (
+            f"INSERT INTO {table.name} ({', '.join(columns)}) "
+            f"VALUES ({', '.join(f':{c}' for c in columns)}) "
+            f"ON CONFLICT ({', '.join(keys)}) {onConflict}"
+        )
+        query = text(sql).bindparams(*[bindparam(c, type_=table.c[c].type) for c in columns])
+        self._connection.execute(query, rows)
@@ -26,8 +26,9 @@ from abc import ABC, abstractmethod
 from sqlalchemy.sql import and_, or_, not_, literal
 
 from ..core import DimensionJoin, DimensionSet
-from ..exprParser import ParserYacc, TreeVisitor
+from ..exprParser import parseExpression, TreeVisitor
 from .resultColumnsManager import ResultColumnsManager
+from .skyPixRanges import makeSkyPixRangeSelectable
 
 _LOG = logging.getLogger(__name__)
 
@@ -201,6 +202,11 @@ class QueryBuilder(ABC):
         Expression to use as the initial WHERE clause.
     """
 
+    conversionBatchSize = 1000
+    """Maximum number of result rows passed to each call to
+    `convertResultRows` by `execute` (`int`).
+    """
+
     def __init__(self, registry, *, fromClause=None, whereClause=None):
         self.registry = registry
         self._resultColumns = ResultColumnsManager(self.registry)
@@ -326,8 +332,7 @@ class QueryBuilder(ABC):
             Binary operator to use if a WHERE expression already exists.
         """
         try:
-            parser = ParserYacc()
-            expression = parser.parse(expression)
+            expression = parseExpression(expression)
         except Exception as exc:
             raise ValueError(f"Failed to parse user expression `{expression}'") from exc
         if expression:
@@ -424,7 +429,7 @@ class QueryBuilder(ABC):
             compiled = str(query)
         return compiled
 
-    def execute(self, whereSql=None, **kwds):
+    def execute(self, whereSql=None, *, stream=False, batchSize=None, **kwds):
         """Build and execute the query, iterating over result rows.
 
         Parameters
@@ -433,6 +438,14 @@ class QueryBuilder(ABC):
             An additional SQLAlchemy boolean column expression to include
             in the query.  Unlike the `whereSqlExpression` method, this
             does not modify the builder itself.
+        stream : `bool`, optional
+            If `True`, ask the database driver not to buffer the full result
+            set on the client (e.g. by using a server-side cursor with
+            PostgreSQL) and fetch rows ``batchSize`` at a time, keeping
+            memory use bounded for very large queries.
+        batchSize : `int`, optional
+            Number of rows fetched from the database at a time when
+            ``stream`` is `True`.  Defaults to `conversionBatchSize`.
         kwds
             Additional keyword arguments forwarded to `convertResultRow`.
 
@@ -445,20 +458,50 @@ class QueryBuilder(ABC):
         -----
         Query rows that include disjoint regions are automatically filtered
         out.
+
+        When streaming, the database cursor stays open until the returned
+        iterator is exhausted or closed.
         """
         query = self.build(whereSql=whereSql)
-        results = self.registry._connection.execute(query)
+        if stream:
+            if batchSize is None:
+                batchSize = self.conversionBatchSize
+            results = self.registry._executeRead(query, executionOptions=dict(stream_results=True))
+            rows = self._iterFetchMany(results, batchSize)
+        else:
+            results = self.registry._executeRead(query)
+            rows = results
         total = 0
         count = 0
-        for row in results:
-            total += 1
-            managed = self.resultColumns.manageRow(row=row)
-            if managed.areRegionsDisjoint():
-                continue
-            count += 1
-            yield self.convertResultRow(managed, **kwds)
+        batch = []
+        try:
+            for row in rows:
+                total += 1
+                batch.append(self.resultColumns.manageRow(row=row))
+                if len(batch) >= self.conversionBatchSize:
+                    batch = self.resultColumns.filterDisjoint(batch)
+                    count += len(batch)
+                    yield from self.convertResultRows(batch, **kwds)
+                    batch = []
+            if batch:
+                batch = self.resultColumns.filterDisjoint(batch)
+                count += len(batch)
+                yield from self.convertResultRows(batch, **kwds)
+        finally:
+            results.close()
         _LOG.debug("Total %d rows in result set, %d after region filtering", total, count)
 
+    @staticmethod
+    def _iterFetchMany(results, batchSize):
+        """Iterate over the rows of a result proxy, fetching ``batchSize``
+        rows at a time.
+        """
+        while True:
+            rows = results.fetchmany(batchSize)
+            if not rows:
+                break
+            yield from rows
+
     def executeOne(self, whereSql=None, **kwds):
         """Build and execute the query, returning a single result row.
 
@@ -483,7 +526,7 @@ class QueryBuilder(ABC):
         in `None` being returned.
         """
         query = self.build(whereSql=whereSql)
-        results = self.registry._connection.execute(query)
+        results = self.registry._executeRead(query)
         for row in results:
             managed = self.resultColumns.manageRow(row)
             if managed is None or managed.areRegionsDisjoint():
@@ -535,7 +578,14 @@ class QueryBuilder(ABC):
         table = self._selectablesForDimensionElements.get(element)
         if table is None:
             # Table isn't already in the output query, see if we can add it.
-            table = self.registry._schema.tables.get(element.name)
+            table = None
+            if self.registry._skyPixRanges:
+                # The skypix join tables hold ranges instead of individual
+                # skypix IDs, so the tables and views that depend on them
+                # have to be rewritten.
+                table = makeSkyPixRangeSelectable(self.registry, element)
+            if table is None:
+                table = self.registry._schema.tables.get(element.name)
             if table is None:
                 # This element doesn't have an associated table.
                 return None
@@ -637,3 +687,27 @@ class QueryBuilder(ABC):
             with type defined by the subclass implementation.
         """
         raise NotImplementedError("Must be implemented by subclasses.")
+
+    def convertResultRows(self, rows, **kwds):
+        """Convert many query result rows to the type appropriate for this
+        `QueryBuilder`.
+
+        This method is a customization point for `execute`, which calls it
+        on batches of up to `conversionBatchSize` rows.  The default
+        implementation calls `convertResultRow` on each row; subclasses
+        may override it to perform any additional `Registry` queries in bulk.
+
+        Parameters
+        ----------
+        rows : `list` of `ResultColumnsManager.ManagedRow`
+            Intermediate row objects to convert.
+        kwds :
+            Additional keyword arguments defined by subclasses.
+
+        Returns
+        -------
+        results : `list`
+            Objects that correspond to the given query result rows, with
+            type defined by the subclass implementation.
+        """
+        return [self.convertResultRow(managed, **kwds) for managed in rows]
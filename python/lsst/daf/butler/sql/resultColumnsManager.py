@@ -25,10 +25,12 @@ import logging
 import itertools
 from collections import defaultdict
 
-from sqlalchemy.sql import select
+from sqlalchemy import LargeBinary
+from sqlalchemy.sql import select, type_coerce
 
 from lsst.sphgeom import DISJOINT
 from .. import DatasetRef, DataId
+from ..core.schema import Base64Region
 
 
 _LOG = logging.getLogger(__name__)
@@ -115,7 +117,9 @@ class ResultColumnsManager:
             self._needskypixRegion = True
             return
         else:
-            column = selectable.columns.region
+            # Select the raw encoded region so it can be decoded (or looked
+            # up in the decoded-region cache) in decodeRegion.
+            column = type_coerce(selectable.columns.region, LargeBinary).label(f"{holder.name}_region")
             self._indicesForRegions[holder] = len(self._columns)
             self._columns.append(column)
 
@@ -156,6 +160,57 @@ class ResultColumnsManager:
             raise RuntimeError("skypix region added to query without associated link.")
         return select(self._columns).select_from(fromClause)
 
+    def decodeRegion(self, encoded):
+        """Return the region for a raw region column value.
+
+        Decoded regions are cached and shared (see `Base64Region.decode`), so
+        the same object is returned for all rows with the same region.
+
+        Parameters
+        ----------
+        encoded : `bytes` or `None`
+            Base64-encoded region, as stored in the database.
+
+        Returns
+        -------
+        region : `lsst.sphgeom.ConvexPolygon` or `None`
+            Decoded region, or `None` if ``encoded`` is `None`.
+        """
+        return Base64Region.decode(encoded)
+
+    def filterDisjoint(self, rows):
+        """Remove rows whose regions are disjoint from a batch of rows.
+
+        This is equivalent to testing `ManagedRow.areRegionsDisjoint` on each
+        row, but the relationships between a given combination of regions
+        are evaluated only once per batch.  Spatial joins usually repeat the
+        same few regions in many rows, so this is much faster.
+
+        Parameters
+        ----------
+        rows : iterable of `ManagedRow`
+            Result rows to filter.
+
+        Returns
+        -------
+        filtered : `list` of `ManagedRow`
+            Rows in which no two regions are disjoint, in their original
+            order.
+        """
+        if len(self._indicesForRegions) + (1 if "skypix" in self._indicesForDimensionLinks else 0) < 2:
+            return list(rows)
+        disjointByKeys = {}
+        result = []
+        for row in rows:
+            keys = row._regionKeys
+            disjoint = disjointByKeys.get(keys)
+            if disjoint is None:
+                disjoint = row.areRegionsDisjoint()
+                disjointByKeys[keys] = disjoint
+            if not disjoint:
+                result.append(row)
+        return result
+
     def manageRow(self, row):
         """Return an object that manages raw query result row.
 
@@ -175,6 +230,43 @@ class ResultColumnsManager:
         else:
             return self.ManagedRow(self, row)
 
+    def makeDatasetRefs(self, rows, datasetType, *, expandDataId=True, **kwds):
+        """Construct `DatasetRef` objects from many result rows.
+
+        This is equivalent to calling `ManagedRow.makeDatasetRef` on each
+        row, but retrieves all datasets (and their components) from the
+        `Registry` in bulk.
+
+        Parameters
+        ----------
+        rows : `list` of `ManagedRow`
+            Result rows to convert.
+        datasetType : `DatasetType`
+            The `DatasetType` the returned `DatasetRef` objects will
+            identify.
+        expandDataId : `bool`
+            If `True` (default), query the `Registry` to further expand
+            the data IDs to include additional information.
+        kwds
+            Additional keyword arguments passed to the `DataId`
+            constructor.
+
+        Returns
+        -------
+        refs : `list` of `DatasetRef`
+            New `DatasetRef` instances, in the same order as ``rows``.
+        """
+        dataIds = [row.makeDataId(datasetType=datasetType, expandDataId=expandDataId, **kwds)
+                   for row in rows]
+        datasetIds = [row._datasetIds.get(datasetType) for row in rows]
+        resolved = [(datasetId, dataId) for datasetId, dataId in zip(datasetIds, dataIds)
+                    if datasetId is not None]
+        resolvedRefs = iter(self.registry._getDatasets([datasetId for datasetId, _ in resolved],
+                                                       datasetTypes=[datasetType]*len(resolved),
+                                                       dataIds=[dataId for _, dataId in resolved]))
+        return [DatasetRef(datasetType, dataId) if datasetId is None else next(resolvedRefs)
+                for datasetId, dataId in zip(datasetIds, dataIds)]
+
     class ManagedRow:
         """An intermediate query result row class that understands the columns
         managed by a `ResultColumnsManager`.
@@ -188,7 +280,7 @@ class ResultColumnsManager:
         """
 
         __slots__ = ("registry", "_dimensionLinks", "_perDatasetTypeDimensionLinks", "_regions",
-                     "_datasetIds")
+                     "_regionKeys", "_datasetIds")
 
         def __init__(self, manager, row):
             self.registry = manager.registry
@@ -199,8 +291,10 @@ class ResultColumnsManager:
                 datasetType: {link: row[index] for link, index in indices.items()}
                 for datasetType, indices in manager._indicesForPerDatasetTypeDimensionLinks.items()
             }
+            encoded = [row[index] for index in manager._indicesForRegions.values()]
             self._regions = {
-                holder: row[index] for holder, index in manager._indicesForRegions.items()
+                holder: manager.decodeRegion(value)
+                for holder, value in zip(manager._indicesForRegions.keys(), encoded)
             }
             self._datasetIds = {
                 datasetType: row[index] for datasetType, index in manager._indicesForDatasetIds.items()
@@ -208,6 +302,10 @@ class ResultColumnsManager:
             skypix = self._dimensionLinks.get("skypix", None)
             if skypix is not None:
                 self._regions[self.registry.dimensions["skypix"]] = self.registry.pixelization.pixel(skypix)
+                encoded.append(skypix)
+            # Hashable identifier for the combination of regions in this row,
+            # used by ResultColumnsManager.filterDisjoint.
+            self._regionKeys = tuple(encoded)
 
         def areRegionsDisjoint(self):
             """Test whether the regions in this result row are disjoint.
@@ -415,3 +415,24 @@ class SingleDatasetQueryBuilder(QueryBuilder):
             Reference to a dataset identified by the query.
         """
         return managed.makeDatasetRef(self.datasetType, expandDataId=expandDataId)
+
+    def convertResultRows(self, rows, *, expandDataId=True):
+        """Convert many result rows for this query to `DatasetRef` objects.
+
+        Datasets and their components are retrieved from the `Registry` in
+        bulk, instead of with separate queries for each row.
+
+        Parameters
+        ----------
+        rows : `list` of `ResultsColumnsManager.ManagedRow`
+            Intermediate result row objects to convert.
+        expandDataId : `bool`
+            If `True` (default), query the registry again to fully populate
+            the `DataId` associated with the returned `DatasetRef`.
+
+        Returns
+        -------
+        refs : `list` of `DatasetRef`
+            References to datasets identified by the query.
+        """
+        return self.resultColumns.makeDatasetRefs(rows, self.datasetType, expandDataId=expandDataId)
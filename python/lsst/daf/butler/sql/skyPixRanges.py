@@ -0,0 +1,231 @@
+# This file is part of daf_butler.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Support for storing skypix join tables as ranges of skypix IDs.
+
+When the ``skypix.ranges`` registry option is set, each materialized
+``*_skypix_join`` table (one row per skypix that overlaps a region) is
+replaced by a ``*_skypix_range`` table with one row per contiguous range of
+skypix IDs.  The functions here build SQLAlchemy selectables from the range
+tables that can be used in place of the skypix join tables and the spatial
+join views defined on top of them.
+
+Because a range of skypix IDs at one level can represent any pixel at a
+coarser level of a hierarchical pixelization, the range tables can also hold
+regions whose envelopes were computed at different levels (see
+`makeAdaptiveSkyPixRanges`), without any change to the queries.
+"""
+
+__all__ = ("getSkyPixRangeTableName", "isMaterializedSkyPixJoin", "collapseSkyPixRanges",
+           "makeAdaptiveSkyPixRanges", "makeSkyPixRangeSelectable")
+
+from sqlalchemy.sql import select, and_
+
+from ..core.dimensions import DimensionJoin
+
+
+def getSkyPixRangeTableName(join):
+    """Return the name of the range-encoded table for a skypix join.
+
+    Parameters
+    ----------
+    join : `DimensionJoin`
+        A join whose right hand side is the "skypix" dimension, and which is
+        materialized as a table (not a view).
+
+    Returns
+    -------
+    name : `str`
+        Name of the corresponding ``*_skypix_range`` table.
+    """
+    assert join.name.endswith("_join")
+    return join.name[:-len("join")] + "range"
+
+
+def isMaterializedSkyPixJoin(registry, element):
+    """Test whether a dimension element is a skypix join stored as a table.
+
+    Parameters
+    ----------
+    registry : `SqlRegistry`
+        Registry whose schema defines the element's table or view.
+    element : `DimensionElement`
+        Element to test.
+
+    Returns
+    -------
+    result : `bool`
+        `True` if ``element`` is a `DimensionJoin` whose right hand side is
+        the "skypix" dimension and whose table is not a view.
+    """
+    return (isinstance(element, DimensionJoin) and element.rhs.names == {"skypix"} and
+            element.name not in registry._schema.views)
+
+
+def collapseSkyPixRanges(pixels):
+    """Collapse skypix IDs into ranges of consecutive IDs.
+
+    Parameters
+    ----------
+    pixels : iterable of `int`
+        Skypix IDs, in any order; duplicates are ignored.
+
+    Returns
+    -------
+    ranges : `list` of `tuple`
+        Sorted half-open ``(begin, end)`` ranges.
+    """
+    ranges = []
+    for pixel in sorted(set(pixels)):
+        if ranges and ranges[-1][1] == pixel:
+            ranges[-1][1] = pixel + 1
+        else:
+            ranges.append([pixel, pixel + 1])
+    return [tuple(r) for r in ranges]
+
+
+def makeAdaptiveSkyPixRanges(region, pixelization, coarser=(), maxFalsePositiveFraction=0.0):
+    """Compute the skypix ranges for a region at the coarsest acceptable
+    level of a hierarchical pixelization.
+
+    Parameters
+    ----------
+    region : `lsst.sphgeom.Region`
+        Region to pixelize.
+    pixelization : `lsst.sphgeom.Pixelization`
+        Pixelization at the level used for all stored skypix IDs (i.e.
+        `Registry.pixelization`).
+    coarser : sequence of `lsst.sphgeom.Pixelization`
+        Pixelizations of the same kind at coarser levels, ordered from
+        coarsest to finest.
+    maxFalsePositiveFraction : `float`
+        Maximum acceptable fraction of the pixels (at the level of
+        ``pixelization``) covered by a coarse envelope that are not in the
+        envelope computed at the level of ``pixelization`` itself.
+
+    Returns
+    -------
+    ranges : `list` of `tuple`
+        Half-open ``(begin, end)`` ranges of skypix IDs at the level of
+        ``pixelization``.
+
+    Notes
+    -----
+    The coarsest level whose envelope is acceptable is used if it needs
+    fewer ranges than the fine envelope.  The extra pixels are always a
+    superset of the exact envelope, so spatial joins may return more
+    candidate rows, but these are removed by the region filtering that
+    `QueryBuilder` already performs.  Pixel IDs at a coarse level are
+    converted by assuming that each pixel has four children at the next
+    level, with IDs ``4*i`` to ``4*i + 3``, as in HTM and Q3C.
+    """
+    fine = pixelization.envelope(region)
+    target = fine.cardinality()
+    for coarse in coarser:
+        ranges = coarse.envelope(region).scaled(4**(pixelization.getLevel() - coarse.getLevel()))
+        if 1.0 - target/ranges.cardinality() <= maxFalsePositiveFraction:
+            if ranges.size() < fine.size():
+                return ranges.ranges()
+            break
+    return fine.ranges()
+
+
+def _findRangeTable(registry, links):
+    """Return the most precise range table that can be used to find the
+    skypix ranges for dimensions with the given links.
+    """
+    best = None
+    for join in registry.dimensions.joins():
+        if not isMaterializedSkyPixJoin(registry, join):
+            continue
+        if links <= join.lhs.links() and (best is None or len(join.lhs.links()) < len(best.lhs.links())):
+            best = join
+    if best is None:
+        return None
+    return registry._schema.tables[getSkyPixRangeTableName(best)]
+
+
+def makeSkyPixRangeSelectable(registry, element):
+    """Return a selectable that reproduces the table or view for a spatial
+    join from the range-encoded skypix tables.
+
+    Parameters
+    ----------
+    registry : `SqlRegistry`
+        Registry the query is being run against.
+    element : `DimensionElement`
+        Element whose table or view is needed.
+
+    Returns
+    -------
+    selectable : `sqlalchemy.sql.FromClause` or `None`
+        A subquery with the same name and link columns as the table or view
+        for ``element``, or `None` if ``element`` is not a spatial join that
+        depends on the skypix join tables.
+
+    Notes
+    -----
+    Joins between two dimensions with regions (e.g. ``visit_patch_join``)
+    are computed by testing whether their skypix ranges overlap.  Joins with
+    the "skypix" dimension itself (e.g. ``visit_skypix_join``) need one row
+    for each skypix, so the ranges are expanded with a recursive common
+    table expression; queries that involve the "skypix" dimension are
+    therefore more expensive with range-encoded storage than without it.
+    """
+    if not isinstance(element, DimensionJoin):
+        return None
+    lhsLinks = element.lhs.links()
+    lhsTable = _findRangeTable(registry, lhsLinks)
+    if lhsTable is None:
+        return None
+    if element.rhs.names == {"skypix"}:
+        linkNames = sorted(lhsLinks)
+        columns = [lhsTable.columns[link] for link in linkNames]
+        columns.extend([lhsTable.columns.skypix_begin.label("skypix"), lhsTable.columns.skypix_end])
+        pixels = select(columns).cte(f"{element.name}_pixels", recursive=True)
+        columns = [pixels.columns[link] for link in linkNames]
+        columns.extend([(pixels.columns.skypix + 1).label("skypix"), pixels.columns.skypix_end])
+        pixels = pixels.union_all(
+            select(columns).where(pixels.columns.skypix + 1 < pixels.columns.skypix_end)
+        )
+        columns = [pixels.columns[link] for link in linkNames]
+        columns.append(pixels.columns.skypix)
+        query = select(columns)
+        if not isMaterializedSkyPixJoin(registry, element):
+            query = query.distinct()
+        return query.alias(element.name)
+    rhsLinks = element.rhs.links()
+    if "skypix" in element.lhs.names or "skypix" in element.rhs.names:
+        return None
+    if (registry.dimensions.extract(element.lhs).getRegionHolder() is None or
+            registry.dimensions.extract(element.rhs).getRegionHolder() is None):
+        return None
+    rhsTable = _findRangeTable(registry, rhsLinks)
+    if rhsTable is None:
+        return None
+    lhsTable = lhsTable.alias(f"{element.name}_lhs")
+    rhsTable = rhsTable.alias(f"{element.name}_rhs")
+    onClause = and_(lhsTable.columns.skypix_begin < rhsTable.columns.skypix_end,
+                    rhsTable.columns.skypix_begin < lhsTable.columns.skypix_end)
+    columns = [lhsTable.columns[link] for link in sorted(lhsLinks)]
+    columns.extend(rhsTable.columns[link] for link in sorted(rhsLinks))
+    query = select(columns).select_from(lhsTable.join(rhsTable, onClause)).distinct()
+    return query.alias(element.name)
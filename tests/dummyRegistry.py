@@ -47,6 +47,10 @@ class DummyRegistry:
         if incrementCounter:
             self._counter += 1
 
+    def addDatasetLocations(self, refs, datastoreName):
+        for ref in refs:
+            self.addDatasetLocation(ref, datastoreName)
+
     def getDatasetLocations(self, ref):
         return self._entries[ref.id].copy()
 
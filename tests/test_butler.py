@@ -22,6 +22,7 @@
 """Tests for Butler.
 """
 
+import asyncio
 import os
 import posixpath
 import unittest
@@ -44,10 +45,11 @@ except ImportError:
         return cls
 
 from lsst.daf.butler.core.safeFileIo import safeMakeDir
-from lsst.daf.butler import Butler, Config, ButlerConfig
+from lsst.daf.butler import Butler, AsyncButler, Config, ButlerConfig
 from lsst.daf.butler import StorageClassFactory
 from lsst.daf.butler import DatasetType, DatasetRef
 from lsst.daf.butler import FileTemplateValidationError, ValidationError
+from lsst.daf.butler import ConflictingDefinitionError
 from examplePythonTypes import MetricsExample
 from lsst.daf.butler.core.repoRelocation import BUTLER_ROOT_TAG
 from lsst.daf.butler.core.location import ButlerURI
@@ -369,6 +371,127 @@ class ButlerTests:
         with self.assertRaises(FileNotFoundError):
             butler.getDirect(ref)
 
+    def testGetMany(self):
+        butler = Butler(self.tmpConfigFile)
+        dimensions = butler.registry.dimensions.extract(["instrument", "visit"])
+        storageClass = self.storageClassFactory.getStorageClass("StructuredData")
+        datasetType = self.addDatasetType("test_metric", dimensions, storageClass, butler.registry)
+        compositeClass = self.storageClassFactory.getStorageClass("StructuredComposite")
+        compositeType = self.addDatasetType("test_metric_comp", dimensions, compositeClass, butler.registry)
+        butler.registry.addDimensionEntry("instrument", {"instrument": "DummyCam"})
+        butler.registry.addDimensionEntry("physical_filter", {"instrument": "DummyCam",
+                                                              "physical_filter": "d-r"})
+        dataIds = [{"instrument": "DummyCam", "visit": visit} for visit in range(12)]
+        metrics = []
+        refs = []
+        for dataId in dataIds:
+            butler.registry.addDimensionEntry("visit", dataId, physical_filter="d-r")
+            metric = makeExampleMetrics()
+            metric.data.append(dataId["visit"])
+            metrics.append(metric)
+            refs.append(butler.put(metric, datasetType, dataId))
+        compositeRef = butler.put(metrics[0], compositeType, dataIds[0])
+
+        results = list(butler.getMany(datasetType, dataIds))
+        self.assertEqual([ref.id for ref, _ in results], [ref.id for ref in refs])
+        self.assertEqual([metric for _, metric in results], metrics)
+        # Refs may have different dataset types, including virtual
+        # composites.
+        results = list(butler.getMany([refs[3], compositeRef, refs[1]]))
+        self.assertEqual([metric for _, metric in results], [metrics[3], metrics[0], metrics[1]])
+        results = dict((ref.id, metric) for ref, metric in butler.getMany(refs, ordered=False))
+        self.assertEqual(results, {ref.id: metric for ref, metric in zip(refs, metrics)})
+        # Parameters are applied to all datasets.
+        results = list(butler.getMany(datasetType, dataIds[:2], parameters={"slice": slice(2)}))
+        self.assertEqual([sliced.data for _, sliced in results], [metric.data[:2] for metric in metrics[:2]])
+        with self.assertRaises(LookupError):
+            list(butler.getMany(datasetType, [{"instrument": "DummyCam", "visit": 20}]))
+        self.assertEqual(list(butler.getMany(datasetType, [])), [])
+
+    def testPutMany(self):
+        butler = Butler(self.tmpConfigFile)
+        dimensions = butler.registry.dimensions.extract(["instrument", "visit"])
+        storageClass = self.storageClassFactory.getStorageClass("StructuredData")
+        datasetType = self.addDatasetType("test_metric", dimensions, storageClass, butler.registry)
+        compositeClass = self.storageClassFactory.getStorageClass("StructuredComposite")
+        self.addDatasetType("test_metric_comp", dimensions, compositeClass, butler.registry)
+        butler.registry.addDimensionEntry("instrument", {"instrument": "DummyCam"})
+        butler.registry.addDimensionEntry("physical_filter", {"instrument": "DummyCam",
+                                                              "physical_filter": "d-r"})
+        dataIds = [{"instrument": "DummyCam", "visit": visit} for visit in range(10)]
+        for dataId in dataIds:
+            butler.registry.addDimensionEntry("visit", dataId, physical_filter="d-r")
+        metrics = []
+        for dataId in dataIds:
+            metric = makeExampleMetrics()
+            metric.data.append(dataId["visit"])
+            metrics.append(metric)
+
+        # A failed transaction removes everything that was written.
+        with self.assertRaises(TransactionTestError):
+            with butler.transaction():
+                refs = butler.putMany([(metric, "test_metric", dataId)
+                                       for metric, dataId in zip(metrics[:5], dataIds[:5])])
+                uris = [butler.getUri(ref) for ref in refs]
+                raise TransactionTestError("This should roll back the entire transaction")
+        for ref, uri in zip(refs, uris):
+            self.assertIsNone(butler.registry.find(butler.collection, datasetType, ref.dataId))
+            if uri.startswith("file://"):
+                self.assertFalse(os.path.exists(uri[len("file://"):]))
+
+        items = [(metric, datasetType, dataId) for metric, dataId in zip(metrics, dataIds)]
+        items.insert(3, (metrics[0], "test_metric_comp", dataIds[0]))
+        refs = butler.putMany(items)
+        self.assertEqual(len(refs), len(items))
+        for (metric, _, dataId), ref in zip(items, refs):
+            self.assertEqual(ref.dataId, dataId)
+            self.assertEqual(butler.get(ref.datasetType, dataId), metric)
+            self.assertGetComponents(butler, ref, ("summary", "data", "output"), metric)
+        # Conflicting datasets are rejected without storing anything.
+        with self.assertRaises(ConflictingDefinitionError):
+            butler.putMany([(metrics[0], datasetType, {"instrument": "DummyCam", "visit": 0})])
+        self.assertEqual(butler.putMany([]), [])
+
+    def testAsyncButler(self):
+        # Concurrent workers need a thread-safe registry.
+        with self.assertRaises(ValueError):
+            AsyncButler(Butler(self.tmpConfigFile), datastoreWorkers=3)
+        config = ButlerConfig(self.tmpConfigFile)
+        config["registry", "pool", "enabled"] = True
+        butler = Butler(config)
+        datastoreWorkers = 3 if butler.registry.threadSafe else 1
+        datasetTypeName = "test_metric"
+        dimensions = butler.registry.dimensions.extract(["instrument", "visit"])
+        storageClass = self.storageClassFactory.getStorageClass("StructuredData")
+        self.addDatasetType(datasetTypeName, dimensions, storageClass, butler.registry)
+        butler.registry.addDimensionEntry("instrument", {"instrument": "DummyCam"})
+        butler.registry.addDimensionEntry("physical_filter", {"instrument": "DummyCam",
+                                                              "physical_filter": "d-r"})
+        dataIds = [{"instrument": "DummyCam", "visit": visit} for visit in range(5)]
+        for dataId in dataIds:
+            butler.registry.addDimensionEntry("visit", dataId, physical_filter="d-r")
+        metrics = [makeExampleMetrics() for _ in dataIds]
+        for metric, dataId in zip(metrics, dataIds):
+            metric.data.append(dataId["visit"])
+
+        async def run():
+            async with AsyncButler(butler, datastoreWorkers=datastoreWorkers) as asyncButler:
+                refs = await asyncio.gather(*[asyncButler.put(metric, datasetTypeName, dataId)
+                                              for metric, dataId in zip(metrics, dataIds)])
+                self.assertEqual([ref.dataId["visit"] for ref in refs], list(range(5)))
+                self.assertEqual(await asyncButler.getMany(datasetTypeName, dataIds), metrics)
+                self.assertEqual(await asyncButler.getMany(refs), metrics)
+                self.assertEqual(await asyncButler.get(datasetTypeName, dataIds[2]), metrics[2])
+                self.assertTrue(await asyncButler.exists(refs[3]))
+                with self.assertRaises(LookupError):
+                    await asyncButler.get(datasetTypeName, {"instrument": "DummyCam", "visit": 10})
+                # A failed put is rolled back.
+                with self.assertRaises(ConflictingDefinitionError):
+                    await asyncButler.put(metrics[0], datasetTypeName, dataIds[0])
+                self.assertEqual(await asyncButler.get(datasetTypeName, dataIds[0]), metrics[0])
+
+        asyncio.run(run())
+
     def testMakeRepo(self):
         """Test that we can write butler configuration to a new repository via
         the Butler.makeRepo interface and then instantiate a butler from the
@@ -19,15 +19,22 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import errno
+import hashlib
 import os
 import unittest
+import unittest.mock
 import shutil
 import yaml
 import tempfile
+import zlib
 import lsst.utils
+import lsst.utils.tests
 
 from lsst.daf.butler import StorageClassFactory, StorageClass, DimensionUniverse
 from lsst.daf.butler import DatastoreConfig, DatasetTypeNotSupportedError, DatastoreValidationError
+from lsst.daf.butler import ButlerURI
+from lsst.daf.butler.datastores.posixDatastore import PosixDatastore
 
 from lsst.utils import doImport
 
@@ -456,6 +463,171 @@ class PosixDatastoreTestCase(DatastoreTests, unittest.TestCase):
         self.root = tempfile.mkdtemp(dir=TESTDIR)
         super().setUp()
 
+    def testCheckSize(self):
+        metrics = makeExampleMetrics()
+        datastore = self.makeDatastore()
+        if not isinstance(datastore, PosixDatastore):
+            self.skipTest("Size checks are only tested for PosixDatastore.")
+        storageClass = self.storageClassFactory.getStorageClass("StructuredDataJson")
+        dimensions = self.universe.extract(("visit", "physical_filter"))
+        dataId = {"instrument": "dummy", "visit": 52, "physical_filter": "V"}
+        ref = self.makeDatasetRef("metric", dimensions, storageClass, dataId)
+        datastore.put(metrics, ref)
+        path = ButlerURI(datastore.getUri(ref)).ospath
+        # Trailing whitespace changes the size but not the content.
+        with open(path, "a") as fd:
+            fd.write("\n")
+        with self.assertRaises(RuntimeError):
+            datastore.get(ref)
+        self.assertEqual(datastore.get(ref, checkSize=False), metrics)
+        os.remove(path)
+        with self.assertRaises(FileNotFoundError):
+            datastore.get(ref, checkSize=False)
+
+    def testIngestMany(self):
+        if not issubclass(self.datastoreType, PosixDatastore):
+            self.skipTest("Concurrent ingest is only tested for PosixDatastore.")
+        storageClass = self.storageClassFactory.getStorageClass("StructuredData")
+        dimensions = self.universe.extract(("visit", "physical_filter"))
+        metrics = makeExampleMetrics()
+        for mode in ("copy", "move"):
+            with self.subTest(mode=mode):
+                datastore = self.makeDatastore(mode)
+                with tempfile.TemporaryDirectory(dir=TESTDIR) as sourceDir:
+                    paths = []
+                    refs = []
+                    for visit in range(6):
+                        path = os.path.join(sourceDir, f"metric_{visit}.yaml")
+                        with open(path, "w") as fd:
+                            yaml.dump(metrics._asdict(), stream=fd)
+                        dataId = {"instrument": "dummy", "visit": visit, "physical_filter": "V"}
+                        paths.append(path)
+                        refs.append(self.makeDatasetRef("metric", dimensions, storageClass, dataId))
+                    if mode == "move":
+                        # A move that fails partway leaves the source alone
+                        # and does not leave a partial file in the datastore.
+                        failPath = paths[1]
+
+                        def failingMove(source, destination, move=shutil.move):
+                            if source != failPath:
+                                return move(source, destination)
+                            with open(destination, "w") as fd:
+                                fd.write("partial")
+                            raise OSError(errno.ENOSPC, "No space left on device")
+
+                        with open(failPath) as fd:
+                            content = fd.read()
+                        with unittest.mock.patch("shutil.move", failingMove):
+                            with self.assertRaises(OSError):
+                                datastore.ingestMany(paths[:3], refs[:3], transfer=mode)
+                        with open(failPath) as fd:
+                            self.assertEqual(fd.read(), content)
+                        self.assertEqual([files for _, _, files in os.walk(datastore.root) if files], [])
+                        for path, ref in zip(paths[:3], refs[:3]):
+                            self.assertTrue(os.path.exists(path))
+                            with self.assertRaises(FileNotFoundError):
+                                datastore.get(ref)
+                    # Transfers are undone if the transaction is rolled back.
+                    with self.assertRaises(TransactionTestError):
+                        with datastore.transaction():
+                            datastore.ingestMany(paths[:3], refs[:3], transfer=mode)
+                            for ref in refs[:3]:
+                                self.assertTrue(datastore.exists(ref))
+                            raise TransactionTestError("This should roll back the ingest")
+                    for path, ref in zip(paths[:3], refs[:3]):
+                        self.assertTrue(os.path.exists(path))
+                        with self.assertRaises(FileNotFoundError):
+                            datastore.get(ref)
+                    refs = [self.makeDatasetRef("metric", dimensions, storageClass, ref.dataId)
+                            for ref in refs]
+                    with self.assertRaises(ValueError):
+                        datastore.ingestMany(paths, refs[:-1], transfer=mode)
+                    datastore.ingestMany(paths, refs, transfer=mode)
+                    for path, ref in zip(paths, refs):
+                        self.assertEqual(datastore.get(ref), metrics)
+                        self.assertEqual(os.path.exists(path), mode != "move")
+
+    def testChecksums(self):
+        datastore = self.makeDatastore()
+        if not isinstance(datastore, PosixDatastore):
+            self.skipTest("Checksums are only tested for PosixDatastore.")
+        data = os.urandom(10000)
+        with lsst.utils.tests.getTempFilePath(".bin") as path:
+            with open(path, "wb") as fd:
+                fd.write(data)
+            expected = {"blake2b": hashlib.blake2b(data).hexdigest(),
+                        "sha256": hashlib.sha256(data).hexdigest(),
+                        "adler32": f"{zlib.adler32(data):08x}",
+                        "crc32": f"{zlib.crc32(data):08x}"}
+            for algorithm, checksum in expected.items():
+                self.assertEqual(datastore.computeChecksum(path, algorithm, block_size=4096), checksum)
+            with self.assertRaises(NameError):
+                datastore.computeChecksum(path, "no-such-algorithm")
+            with lsst.utils.tests.getTempFilePath(".bin") as copyPath:
+                self.assertEqual(datastore.copyWithChecksum(path, copyPath, "crc32", block_size=4096),
+                                 expected["crc32"])
+                with open(copyPath, "rb") as fd:
+                    self.assertEqual(fd.read(), data)
+
+        # Checksums recorded on ingest, and deferred checksums filled in by
+        # verifyChecksums.
+        metrics = makeExampleMetrics()
+        storageClass = self.storageClassFactory.getStorageClass("StructuredDataJson")
+        dimensions = self.universe.extract(("visit", "physical_filter"))
+        refs = []
+        for visit, deferred in ((54, False), (55, True)):
+            datastore.deferChecksums = deferred
+            dataId = {"instrument": "dummy", "visit": visit, "physical_filter": "V"}
+            ref = self.makeDatasetRef("metric", dimensions, storageClass, dataId)
+            datastore.put(metrics, ref)
+            refs.append(ref)
+        paths = [ButlerURI(datastore.getUri(ref)).ospath for ref in refs]
+        self.assertEqual(datastore.getStoredItemInfo(refs[0]).checksum, datastore.computeChecksum(paths[0]))
+        self.assertIsNone(datastore.getStoredItemInfo(refs[1]).checksum)
+        self.assertEqual(datastore.verifyChecksums(refs), [])
+        self.assertEqual(datastore.getStoredItemInfo(refs[1]).checksum, datastore.computeChecksum(paths[1]))
+        # Changing the algorithm does not invalidate existing checksums.
+        datastore.checksumAlgorithm = "adler32"
+        datastore.deferChecksums = False
+        dataId = {"instrument": "dummy", "visit": 56, "physical_filter": "V"}
+        ref = self.makeDatasetRef("metric", dimensions, storageClass, dataId)
+        datastore.put(metrics, ref)
+        path = ButlerURI(datastore.getUri(ref)).ospath
+        self.assertEqual(datastore.getStoredItemInfo(ref).checksum,
+                         "adler32:" + datastore.computeChecksum(path, "adler32"))
+        self.assertEqual(datastore.verifyChecksums(refs + [ref]), [])
+        with open(paths[1], "a") as fd:
+            fd.write("\n")
+        self.assertEqual(datastore.verifyChecksums(refs + [ref]), [refs[1].id])
+
+    def testRecordCache(self):
+        metrics = makeExampleMetrics()
+        datastore = self.makeDatastore()
+        if not isinstance(datastore, PosixDatastore):
+            self.skipTest("Record caching is only tested for PosixDatastore.")
+        storageClass = self.storageClassFactory.getStorageClass("StructuredDataJson")
+        dimensions = self.universe.extract(("visit", "physical_filter"))
+        dataId = {"instrument": "dummy", "visit": 53, "physical_filter": "V"}
+        ref = self.makeDatasetRef("metric", dimensions, storageClass, dataId)
+        datastore.put(metrics, ref)
+        self.assertIn(ref.id, datastore._recordCache)
+        # Reads are served from the cache without consulting the records.
+        record = datastore.records[ref.id]
+        del datastore.records[ref.id]
+        self.assertEqual(datastore.get(ref), metrics)
+        datastore.records[ref.id] = record
+        datastore.remove(ref)
+        self.assertNotIn(ref.id, datastore._recordCache)
+        self.assertFalse(datastore.exists(ref))
+        # Entries added in a transaction that is rolled back are discarded.
+        ref = self.makeDatasetRef("metric", dimensions, storageClass, dataId)
+        with self.assertRaises(TransactionTestError):
+            with datastore.transaction():
+                datastore.put(metrics, ref)
+                raise TransactionTestError("This should roll back the put")
+        self.assertNotIn(ref.id, datastore._recordCache)
+        self.assertFalse(datastore.exists(ref))
+
 
 class InMemoryDatastoreTestCase(DatastoreTests, unittest.TestCase):
     """PosixDatastore specialization"""
@@ -0,0 +1,80 @@
+# This file is part of daf_butler.
+#
+# Developed for the LSST Data Management System.
+# This product includes software developed by the LSST Project
+# (http://www.lsst.org).
+# See the COPYRIGHT file at the top-level directory of this distribution
+# for details of code ownership.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import unittest
+
+from lsst.daf.butler import DimensionUniverse, Config
+from lsst.daf.butler.registries.dimensionEntryCache import DimensionEntryCache
+
+"""Tests for DimensionEntryCache.
+"""
+
+
+class DimensionEntryCacheTestCase(unittest.TestCase):
+    """Tests for DimensionEntryCache.
+    """
+
+    def setUp(self):
+        self.universe = DimensionUniverse.fromConfig()
+        self.detector = self.universe["detector"]
+        self.instrument = self.universe["instrument"]
+
+    def makeRow(self, detector):
+        return dict(instrument="DummyCam", detector=detector, name=f"d{detector}")
+
+    def testLeastRecentlyUsed(self):
+        cache = DimensionEntryCache(dict(size=2))
+        self.assertEqual(cache.getMaxSize(self.detector), 2)
+        cache.put(self.detector, self.makeRow(1))
+        cache.put(self.detector, self.makeRow(2))
+        # Using 1 makes 2 the least recently used.
+        self.assertEqual(cache.get(self.detector, dict(instrument="DummyCam", detector=1, visit=3)),
+                         self.makeRow(1))
+        cache.put(self.detector, self.makeRow(3))
+        self.assertIsNone(cache.get(self.detector, dict(instrument="DummyCam", detector=2)))
+        self.assertIsNotNone(cache.get(self.detector, dict(instrument="DummyCam", detector=1)))
+        self.assertIsNotNone(cache.get(self.detector, dict(instrument="DummyCam", detector=3)))
+        self.assertEqual(cache.hits["detector"], 3)
+        self.assertEqual(cache.misses["detector"], 1)
+        self.assertEqual(cache.getStatistics(), {"detector": dict(hits=3, misses=1, size=2)})
+        cache.invalidate(self.detector, dict(instrument="DummyCam", detector=3))
+        self.assertIsNone(cache.get(self.detector, dict(instrument="DummyCam", detector=3)))
+        cache.clear()
+        self.assertIsNone(cache.get(self.detector, dict(instrument="DummyCam", detector=1)))
+
+    def testConfig(self):
+        config = Config({"size": 5, "elements": {"detector": {"preload": True},
+                                                 "instrument": {"size": 0}}})
+        cache = DimensionEntryCache(config)
+        self.assertIsNone(cache.getMaxSize(self.detector))
+        self.assertEqual(cache.getMaxSize(self.universe["visit"]), 5)
+        self.assertTrue(cache.needsPreload(self.detector))
+        self.assertFalse(cache.needsPreload(self.instrument))
+        cache.putAll(self.detector, [self.makeRow(n) for n in range(10)])
+        self.assertFalse(cache.needsPreload(self.detector))
+        self.assertEqual(cache.getStatistics()["detector"]["size"], 10)
+        # Caching is disabled for instrument.
+        cache.put(self.instrument, dict(instrument="DummyCam"))
+        self.assertIsNone(cache.get(self.instrument, dict(instrument="DummyCam")))
+
+
+if __name__ == "__main__":
+    unittest.main()
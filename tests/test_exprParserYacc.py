@@ -22,9 +22,11 @@
 """Simple unit test for expr_parser/parserYacc module.
 """
 
+import threading
 import unittest
 
-from lsst.daf.butler.exprParser import exprTree, TreeVisitor, ParserYacc, ParseError
+from lsst.daf.butler.exprParser import (exprTree, TreeVisitor, ParserYacc, ParseError,
+                                        getParser, parseExpression)
 
 
 class _Visitor(TreeVisitor):
@@ -366,6 +368,38 @@ class ParserLexTestCase(unittest.TestCase):
         result = tree.visit(visitor)
         self.assertEqual(result, "B(IN(ID(x) (N(1), N(2), R(5..15))) AND !IN(ID(y) (R(-100..100:10))))")
 
+    def testSharedParser(self):
+        """Test for cached parser and parsed trees"""
+
+        self.assertIs(getParser(), getParser())
+
+        # parsed trees are cached by expression string
+        tree = parseExpression("(A or B) and x > 1")
+        self.assertEqual(str(tree), "(A OR B) AND x > 1")
+        self.assertIs(parseExpression("(A or B) and x > 1"), tree)
+        self.assertIsNone(parseExpression(""))
+
+        # errors are raised every time and do not break the shared parser
+        for _ in range(2):
+            with self.assertRaises(ParseError) as catcher:
+                parseExpression("a = 1\nb = (1, 2)")
+            self.assertEqual(catcher.exception.lineno, 2)
+        self.assertEqual(str(parseExpression("a = 1")), "a = 1")
+
+        # each thread gets its own parser
+        results = {}
+
+        def target(index):
+            results[index] = (getParser(), str(parseExpression(f"x{index} = {index}")))
+
+        threads = [threading.Thread(target=target, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([results[i][1] for i in range(4)], [f"x{i} = {i}" for i in range(4)])
+        self.assertEqual(len(set(id(parser) for parser, _ in results.values()) | {id(getParser())}), 5)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -20,12 +20,17 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import tempfile
 import unittest
+import unittest.mock
 
 from lsst.daf.butler import (ButlerConfig, DatasetType, Registry, DataId,
                              DatasetOriginInfoDef, StorageClass)
+from lsst.daf.butler.core.schema import Base64Region
 from lsst.daf.butler.sql import DataIdQueryBuilder, SingleDatasetQueryBuilder
-from lsst.sphgeom import Angle, Box, LonLat, NormalizedAngle
+from lsst.daf.butler.sql.skyPixRanges import makeAdaptiveSkyPixRanges
+from lsst.sphgeom import (Angle, Box, Circle, ConvexPolygon, DISJOINT, HtmPixelization, LonLat,
+                          NormalizedAngle, UnitVector3d)
 
 
 class QueryBuilderTestCase(unittest.TestCase):
@@ -343,6 +348,163 @@ class QueryBuilderTestCase(unittest.TestCase):
         rows = list(builder.execute())
         self.assertEqual(len(rows), 0)
 
+    def addSpatialEntries(self, registry):
+        """Add visits and patches with regions to a registry.
+
+        Returns
+        -------
+        visitRegions : `dict`
+            Regions of the added visits, keyed by visit ID.
+        patchRegions : `dict`
+            Regions of the added patches, keyed by patch ID.
+        expected : `list` of `tuple`
+            Sorted (visit, patch) pairs whose regions overlap.
+        """
+        def makeRegion(lon, lat, size):
+            return ConvexPolygon([UnitVector3d(LonLat.fromDegrees(lon + dx, lat + dy))
+                                  for dx, dy in ((0, 0), (size, 0), (size, size), (0, size))])
+
+        registry.addDimensionEntry("instrument", dict(instrument="DummyCam"))
+        registry.addDimensionEntry("physical_filter", dict(instrument="DummyCam", physical_filter="dummy_r",
+                                                           abstract_filter="r"))
+        registry.addDimensionEntry("detector", dict(instrument="DummyCam", detector=1))
+        visitRegions = {0: makeRegion(10, 10, 1), 1: makeRegion(12, 10, 1)}
+        for visit, region in visitRegions.items():
+            registry.addDimensionEntry("visit", dict(instrument="DummyCam", visit=visit,
+                                                     physical_filter="dummy_r", region=region))
+            registry.setDimensionRegion(dict(instrument="DummyCam", visit=visit, detector=1),
+                                        dimensions=["visit", "detector"], region=region, update=False)
+        registry.addDimensionEntry("skymap", dict(skymap="DummySkyMap", hash=bytes()))
+        registry.addDimensionEntry("tract", dict(skymap="DummySkyMap", tract=0, region=makeRegion(9, 9, 5)))
+        patchRegions = {patch: makeRegion(9.5 + patch, 10.2, 0.6) for patch in range(4)}
+        registry.addDimensionEntryList("patch", [dict(skymap="DummySkyMap", tract=0, patch=patch,
+                                                      cell_x=patch, cell_y=0, region=region)
+                                                 for patch, region in patchRegions.items()])
+        expected = sorted((visit, patch)
+                          for visit, visitRegion in visitRegions.items()
+                          for patch, patchRegion in patchRegions.items()
+                          if visitRegion.relate(patchRegion) != DISJOINT)
+        return visitRegions, patchRegions, expected
+
+    def testSpatialFilter(self):
+        """Test that rows with disjoint regions are filtered out, decoding
+        each region only once.
+        """
+        registry = self.registry
+        visitRegions, patchRegions, expected = self.addSpatialEntries(registry)
+
+        builder = DataIdQueryBuilder.fromDimensions(registry, registry.dimensions.extract(["visit", "patch"]))
+        Base64Region.clearCache()
+        misses = Base64Region.misses
+        rows = sorted((dataId["visit"], dataId["patch"]) for dataId in builder.execute())
+        self.assertEqual(rows, expected)
+        self.assertLessEqual(Base64Region.misses - misses, len(visitRegions) + len(patchRegions))
+
+        # relations are evaluated once per distinct combination of regions
+        manager = builder.resultColumns
+        managed = [manager.manageRow(row) for row in registry._connection.execute(builder.build())]
+        self.assertGreater(len(managed), len(expected))
+        with unittest.mock.patch.object(manager.ManagedRow, "areRegionsDisjoint", autospec=True,
+                                        side_effect=manager.ManagedRow.areRegionsDisjoint) as mock:
+            filtered = manager.filterDisjoint(managed*3)
+        self.assertEqual(mock.call_count, len(managed))
+        self.assertEqual(len(filtered), 3*len(expected))
+
+    def testSkyPixRanges(self):
+        """Test storing skypix join tables as ranges of skypix IDs.
+        """
+        queries = (["visit", "patch"], ["visit", "detector", "patch"], ["visit", "tract"],
+                   ["visit", "skypix"], ["patch", "skypix"])
+
+        def runQueries(registry):
+            results = []
+            for dimensions in queries:
+                builder = DataIdQueryBuilder.fromDimensions(registry, registry.dimensions.extract(dimensions))
+                results.append(sorted(tuple(sorted(dataId.items())) for dataId in builder.execute()))
+            return results
+
+        def countRows(registry, suffix):
+            return sum(registry._connection.execute(
+                f"SELECT COUNT(*) FROM {name}_{suffix}").scalar()
+                for name in ("visit_detector_skypix", "patch_skypix"))
+
+        with tempfile.TemporaryDirectory() as root:
+            config = ButlerConfig(self.configFile)
+            config["registry", "db"] = f"sqlite:///{root}/gen3.sqlite3"
+            registry = Registry.fromConfig(config, create=True)
+            _, _, expected = self.addSpatialEntries(registry)
+            results = runQueries(registry)
+            self.assertEqual([(dict(row)["visit"], dict(row)["patch"]) for row in results[0]], expected)
+            self.assertTrue(all(results))
+            pixelCount = countRows(registry, "join")
+            self.assertEqual(countRows(registry, "range"), 0)
+
+            # Convert the existing tables and run the same queries.
+            config["registry", "skypix", "ranges"] = True
+            rangeRegistry = Registry.fromConfig(config)
+            rangeCount = rangeRegistry.migrateSkyPixJoins()
+            self.assertEqual(countRows(rangeRegistry, "join"), 0)
+            self.assertEqual(countRows(rangeRegistry, "range"), rangeCount)
+            self.assertLess(rangeCount, pixelCount)
+            self.assertEqual(runQueries(rangeRegistry), results)
+
+            # New regions are written as ranges.
+            rangeRegistry.setDimensionRegion(dict(skymap="DummySkyMap", tract=0, patch=0),
+                                             region=rangeRegistry.expandDataId(
+                                                 dict(skymap="DummySkyMap", tract=0, patch=1),
+                                                 region=True).region)
+            self.assertEqual(countRows(rangeRegistry, "join"), 0)
+            results = runQueries(rangeRegistry)
+            del registry
+
+            # And converting back gives the original rows.
+            config["registry", "skypix", "ranges"] = False
+            pixelRegistry = Registry.fromConfig(config)
+            self.assertEqual(pixelRegistry.migrateSkyPixJoins(), countRows(pixelRegistry, "join"))
+            self.assertEqual(countRows(pixelRegistry, "range"), 0)
+            self.assertEqual(runQueries(pixelRegistry), results)
+
+    def testAdaptiveSkyPixLevels(self):
+        """Test storing regions at adaptive skypix levels.
+        """
+        dimensions = ["visit", "patch"]
+        results = {}
+        counts = {}
+        for fraction in (0.0, 1.0):
+            config = ButlerConfig(self.configFile)
+            config["registry", "skypix", "ranges"] = True
+            config["registry", "skypix", "adaptive", "minLevel"] = 3
+            config["registry", "skypix", "adaptive", "maxFalsePositiveFraction"] = fraction
+            registry = Registry.fromConfig(config)
+            self.assertEqual([p.getLevel() for p in registry.coarserPixelizations], [3, 4, 5, 6])
+            _, _, expected = self.addSpatialEntries(registry)
+            builder = DataIdQueryBuilder.fromDimensions(registry, registry.dimensions.extract(dimensions))
+            results[fraction] = sorted((dataId["visit"], dataId["patch"]) for dataId in builder.execute())
+            counts[fraction] = sum(registry._connection.execute(f"SELECT COUNT(*) FROM {name}").scalar()
+                                   for name in ("visit_detector_skypix_range", "patch_skypix_range"))
+            self.assertEqual(results[fraction], expected)
+        self.assertLess(counts[1.0], counts[0.0])
+
+        config = ButlerConfig(self.configFile)
+        config["registry", "skypix", "adaptive", "minLevel"] = 3
+        with self.assertRaises(ValueError):
+            Registry.fromConfig(config)
+
+    def testMakeAdaptiveSkyPixRanges(self):
+        """Test choosing the skypix level for a region.
+        """
+        region = Circle(UnitVector3d(1, 0, 0), Angle.fromDegrees(0.5))
+        pixelization = HtmPixelization(7)
+        coarser = [HtmPixelization(level) for level in range(3, 7)]
+        fine = pixelization.envelope(region).ranges()
+        self.assertEqual(makeAdaptiveSkyPixRanges(region, pixelization), fine)
+        self.assertEqual(makeAdaptiveSkyPixRanges(region, pixelization, coarser, 0.0), fine)
+        coarse = makeAdaptiveSkyPixRanges(region, pixelization, coarser, 1.0)
+        self.assertLess(len(coarse), len(fine))
+        # the coarse ranges cover every pixel of the fine envelope
+        for begin, end in fine:
+            self.assertTrue(any(b <= begin and end <= e for b, e in coarse))
+
     def testCalibrationLabelIndirection(self):
         """Test that SingleDatasetQueryBuilder can look up datasets with
         calibration_label dimensions from a data ID with exposure dimensions.
@@ -387,6 +549,61 @@ class QueryBuilderTestCase(unittest.TestCase):
                                                universe=self.registry.dimensions))
         self.assertEqual(usedLinks, set(["instrument", "visit", "detector"]))
 
+    def testCompositeDatasets(self):
+        """Test that SingleDatasetQueryBuilder returns composite datasets with
+        their components attached.
+        """
+        registry = self.registry
+        childStorageClass = StorageClass("testQueryChild")
+        registry.storageClasses.registerStorageClass(childStorageClass)
+        parentStorageClass = StorageClass("testQueryParent",
+                                          components={"child1": childStorageClass,
+                                                      "child2": childStorageClass})
+        registry.storageClasses.registerStorageClass(parentStorageClass)
+        datasetType = DatasetType("parent", registry.dimensions.extract(["instrument", "detector"]),
+                                  parentStorageClass)
+        registry.registerDatasetType(datasetType)
+        registry.addDimensionEntry("instrument", dict(instrument="DummyCam"))
+        dataIds = [dict(instrument="DummyCam", detector=n) for n in range(5)]
+        registry.addDimensionEntryList("detector", dataIds)
+        run = registry.makeRun(collection="test")
+        refs = registry.addDatasets(datasetType, dataIds, run=run)
+
+        builder = SingleDatasetQueryBuilder.fromSingleCollection(registry, datasetType, collection="test")
+        builder.conversionBatchSize = 2
+        results = sorted(builder.execute(), key=lambda ref: ref.dataId["detector"])
+        self.assertEqual(len(results), len(refs))
+        for result, ref in zip(results, refs):
+            self.assertEqual(result.id, ref.id)
+            self.assertEqual(result.dataId, ref.dataId)
+            self.assertEqual(result.components, ref.components)
+            # component DatasetTypes are shared between refs
+            self.assertIs(result.components["child1"].datasetType,
+                          results[0].components["child1"].datasetType)
+
+    def testStreaming(self):
+        """Test streaming query results in batches.
+        """
+        registry = self.registry
+        registry.addDimensionEntry("instrument", dict(instrument="DummyCam"))
+        registry.addDimensionEntryList("detector", [dict(instrument="DummyCam", detector=n)
+                                                    for n in range(7)])
+        dimensions = registry.dimensions.extract(["instrument", "detector"])
+
+        builder = DataIdQueryBuilder.fromDimensions(registry, dimensions)
+        expected = sorted(dataId["detector"] for dataId in builder.execute())
+        self.assertEqual(expected, list(range(7)))
+        for batchSize in (1, 3, 7, 100):
+            with self.subTest(batchSize=batchSize):
+                rows = builder.execute(stream=True, batchSize=batchSize)
+                self.assertEqual(sorted(dataId["detector"] for dataId in rows), expected)
+
+        # closing a partially-consumed iterator releases the cursor
+        rows = builder.execute(stream=True, batchSize=2)
+        next(rows)
+        rows.close()
+        self.assertEqual(len(list(builder.execute(stream=True))), 7)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -21,15 +21,18 @@
 
 import os
 import unittest
+import unittest.mock
 import warnings
 from sqlalchemy.exc import SADeprecationWarning
 
 from sqlalchemy import create_engine, MetaData
 
 from lsst.daf.butler.core.utils import iterable
-from lsst.daf.butler.core.schema import SchemaConfig, Schema, Table, Column, SchemaBuilder
+from lsst.daf.butler.core.schema import SchemaConfig, Schema, Table, Column, SchemaBuilder, Base64Region
 from sqlalchemy.sql.expression import TableClause
 
+from lsst.sphgeom import ConvexPolygon, UnitVector3d
+
 """Tests for Schema.
 """
 
@@ -126,5 +129,53 @@ class SchemaTestCase(unittest.TestCase):
             self.assertEqual(tableConstraints[src], tgt)
 
 
+class Base64RegionTestCase(unittest.TestCase):
+    """Tests for the decoded-region cache of Base64Region.
+    """
+
+    def setUp(self):
+        self.region = ConvexPolygon((UnitVector3d(1, 0, 0), UnitVector3d(0, 1, 0), UnitVector3d(0, 0, 1)))
+        self.encoded = Base64Region().process_bind_param(self.region, None)
+        Base64Region.clearCache()
+
+    def tearDown(self):
+        Base64Region.clearCache()
+
+    def testDecode(self):
+        misses = Base64Region.misses
+        hits = Base64Region.hits
+        decoded = Base64Region().process_result_value(self.encoded, None)
+        self.assertEqual(decoded, self.region)
+        self.assertIs(Base64Region.decode(self.encoded), decoded)
+        self.assertEqual(Base64Region.misses - misses, 1)
+        self.assertEqual(Base64Region.hits - hits, 1)
+        self.assertIsNone(Base64Region.decode(None))
+
+    def testBindPopulatesCache(self):
+        encoded = Base64Region().process_bind_param(self.region, None)
+        self.assertEqual(encoded, self.encoded)
+        self.assertIs(Base64Region.decode(encoded), self.region)
+
+    def testBounded(self):
+        regions = [ConvexPolygon((UnitVector3d(1, 0, 0), UnitVector3d(0, 1, 0), UnitVector3d(i, 1, 1)))
+                   for i in range(1, 5)]
+        encoded = [Base64Region().process_bind_param(region, None) for region in regions]
+        with unittest.mock.patch.object(Base64Region, "cacheSize", 2):
+            Base64Region.clearCache()
+            for e in encoded:
+                Base64Region.decode(e)
+            self.assertEqual(len(Base64Region._cache), 2)
+            # most recently used regions are kept
+            misses = Base64Region.misses
+            Base64Region.decode(encoded[-1])
+            self.assertEqual(Base64Region.misses, misses)
+            Base64Region.decode(encoded[0])
+            self.assertEqual(Base64Region.misses, misses + 1)
+        with unittest.mock.patch.object(Base64Region, "cacheSize", 0):
+            Base64Region.clearCache()
+            self.assertEqual(Base64Region.decode(encoded[0]), regions[0])
+            self.assertEqual(len(Base64Region._cache), 0)
+
+
 if __name__ == "__main__":
     unittest.main()
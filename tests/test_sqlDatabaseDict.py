@@ -19,11 +19,13 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
+import types
 import unittest
 from dataclasses import make_dataclass
 
 from lsst.daf.butler.core import Registry, DatabaseDictRecordBase
 from lsst.daf.butler.core.registryConfig import RegistryConfig
+from lsst.daf.butler.registries.sqlRegistry import SqlRegistry
 
 """Tests for SqlDatabaseDict.
 """
@@ -127,7 +129,9 @@ class SqlDatabaseDictTestCase(unittest.TestCase):
             0: value(y="zero", z=0.0),
         }
         d = self.registry.makeDatabaseDict(table="test_table", key=self.key, value=value)
-        d["zero"] = data[0]
+        with self.assertRaises(TypeError):
+            d["zero"] = data[0]
+        self.assertNotIn("zero", d)
 
     def testExtraFieldsInTable(self):
         """Test when there are fields in the table that not in the value or
@@ -144,6 +148,53 @@ class SqlDatabaseDictTestCase(unittest.TestCase):
         d = self.registry.makeDatabaseDict(table="test_table", key=self.key, value=value)
         self.checkDatabaseDict(d, data)
 
+    def testBulkOperations(self):
+        """Test getMany, setMany and update, with enough keys to need more
+        than one query."""
+        value = self.makeRecord("TestValue", ["y", "z"], lengths={"y": 6})
+        d = self.registry.makeDatabaseDict(table="test_table", key=self.key, value=value)
+        self.registry._maxBindParams = 3
+        data = {i: value(y=str(i), z=0.1*i) for i in range(10)}
+        d.setMany({i: data[i] for i in range(5)})
+        self.assertEqual(len(d), 5)
+        # A mixture of new and existing keys.
+        data[2] = value(y="two", z=2.0)
+        d.update((i, data[i]) for i in range(2, 10))
+        self.assertEqual(len(d), 10)
+        self.assertEqual(d.getMany([1, 2, 20]), {1: data[1], 2: data[2]})
+        self.assertEqual(d.getMany(range(10)), data)
+        self.assertEqual(dict(d.items()), data)
+        self.assertCountEqual(d.values(), data.values())
+        self.assertEqual(d.getMany([]), {})
+        # Failed bulk writes change nothing.
+        with self.assertRaises(ValueError):
+            d.setMany({1: value(y="long string", z=0.0), 11: value(y="eleven", z=0.0)})
+        with self.assertRaises(TypeError):
+            d.setMany({1: value(y="one", z=1.0), 12: value(y=0, z="zero")})
+        self.assertEqual(dict(d.items()), data)
+
+    def testGenericUpsert(self):
+        """Test the insert-then-update implementation used for databases
+        without native UPSERT support."""
+        self.registry._upsert = types.MethodType(SqlRegistry._upsert, self.registry)
+        value = self.makeRecord("TestValue", ["y", "z"], lengths={"y": 6})
+        data = {
+            0: value(y="zero", z=0.0),
+            1: value(y="one", z=0.1),
+        }
+        d = self.registry.makeDatabaseDict(table="test_table", key=self.key, value=value)
+        # Conflicts are expected here, and must not clear registry caches.
+        self.registry._datasetTypes["sentinel"] = None
+        self.checkDatabaseDict(d, data)
+        d.setMany(data)
+        d.setMany(data)
+        self.assertIn("sentinel", self.registry._datasetTypes)
+        with self.assertRaises(ValueError):
+            d[0] = value(y="too long", z=0.0)
+        with self.assertRaises(ValueError):
+            d[2] = value(y="too long", z=0.0)
+        self.assertEqual(dict(d.items()), data)
+
     def testExtraFieldsInValue(self):
         """Test that we don't permit the value tuple to have ._fields entries
         that are not classes (all the data class definitions have types).
@@ -20,18 +20,24 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import os
+import shutil
+import tempfile
+import threading
 import unittest
 from abc import ABCMeta, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from itertools import combinations
 
 import lsst.sphgeom
 
+from sqlalchemy import event
 from sqlalchemy.exc import OperationalError
 from lsst.daf.butler import (Execution, Run, DatasetType, Registry,
                              StorageClass, ButlerConfig, DataId,
                              ConflictingDefinitionError, OrphanedRecordError)
 from lsst.daf.butler.registries.sqlRegistry import SqlRegistry
+from lsst.daf.butler.registries.dimensionEntryCache import DimensionEntryCache
 
 """Tests for SqlRegistry.
 """
@@ -88,6 +94,18 @@ class RegistryTests(metaclass=ABCMeta):
         allTypes = registry.getAllDatasetTypes()
         self.assertEqual(allTypes, {outDatasetType1, outDatasetType2})
 
+        # A DatasetType registered in a transaction that is rolled back must
+        # not be remembered.
+        rolledBackDatasetType = DatasetType("testRolledBack", dimensions, storageClass)
+        with self.assertRaises(RuntimeError):
+            with registry.transaction():
+                registry.registerDatasetType(rolledBackDatasetType)
+                self.assertEqual(registry.getDatasetType("testRolledBack"), rolledBackDatasetType)
+                raise RuntimeError("rollback")
+        with self.assertRaises(KeyError):
+            registry.getDatasetType("testRolledBack")
+        self.assertEqual(registry.getAllDatasetTypes(), {outDatasetType1, outDatasetType2})
+
     def testDataset(self):
         registry = self.makeRegistry()
         run = registry.makeRun(collection="test")
@@ -146,6 +164,80 @@ class RegistryTests(metaclass=ABCMeta):
         self.assertIsNone(registry.find(run.collection, childDatasetType1, dataId))
         self.assertIsNone(registry.find(run.collection, childDatasetType2, dataId))
 
+    def testAddDatasets(self):
+        registry = self.makeRegistry()
+        childStorageClass = StorageClass("testAddDatasetsChild")
+        registry.storageClasses.registerStorageClass(childStorageClass)
+        parentStorageClass = StorageClass("testAddDatasetsParent",
+                                          components={"child1": childStorageClass,
+                                                      "child2": childStorageClass})
+        registry.storageClasses.registerStorageClass(parentStorageClass)
+        dimensions = registry.dimensions.extract(("instrument", "detector"))
+        parentDatasetType = DatasetType(name="parent", dimensions=dimensions,
+                                        storageClass=parentStorageClass)
+        registry.registerDatasetType(parentDatasetType)
+        dataIds = [{"instrument": "DummyCam", "detector": n} for n in range(5)]
+        if not registry.limited:
+            registry.addDimensionEntry("instrument", instrument="DummyCam")
+            registry.addDimensionEntryList("detector", dataIds)
+        run = registry.makeRun(collection="test")
+        refs = registry.addDatasets(parentDatasetType, dataIds, run=run)
+        self.assertEqual(len(refs), len(dataIds))
+        self.assertEqual(len({ref.id for ref in refs}), len(dataIds))
+        for ref, dataId in zip(refs, dataIds):
+            self.assertEqual(ref.dataId, dataId)
+            self.assertEqual(ref.components.keys(), {"child1", "child2"})
+            found = registry.find(run.collection, parentDatasetType, dataId)
+            self.assertEqual(found, ref)
+            self.assertEqual(found.components, ref.components)
+            for name, compRef in ref.components.items():
+                self.assertEqual(registry.find(run.collection, parentDatasetType.componentTypeName(name),
+                                               dataId), compRef)
+        self.assertRowCount(registry, "dataset", 15)
+        self.assertRowCount(registry, "dataset_collection", 15)
+        self.assertRowCount(registry, "dataset_composition", 10)
+        # Conflicts with existing datasets or within the input should fail
+        # without adding anything.
+        with self.assertRaises(ConflictingDefinitionError):
+            registry.addDatasets(parentDatasetType, dataIds[:1], run=run)
+        with self.assertRaises(ConflictingDefinitionError):
+            registry.addDatasets(parentDatasetType, dataIds[:1] * 2, run=registry.makeRun("other"))
+        self.assertRowCount(registry, "dataset", 15)
+        self.assertEqual(registry.addDatasets(parentDatasetType, [], run=run), [])
+
+    def testFindMany(self):
+        registry = self.makeRegistry()
+        childStorageClass = StorageClass("testFindManyChild")
+        registry.storageClasses.registerStorageClass(childStorageClass)
+        parentStorageClass = StorageClass("testFindManyParent",
+                                          components={"child": childStorageClass})
+        registry.storageClasses.registerStorageClass(parentStorageClass)
+        dimensions = registry.dimensions.extract(("instrument", "detector"))
+        datasetType = DatasetType(name="parent", dimensions=dimensions, storageClass=parentStorageClass)
+        registry.registerDatasetType(datasetType)
+        dataIds = [{"instrument": "DummyCam", "detector": n} for n in range(4)]
+        if not registry.limited:
+            registry.addDimensionEntry("instrument", instrument="DummyCam")
+            registry.addDimensionEntryList("detector", dataIds)
+        run1 = registry.makeRun(collection="run1")
+        run2 = registry.makeRun(collection="run2")
+        refs1 = registry.addDatasets(datasetType, dataIds[:3], run=run1)
+        refs2 = registry.addDatasets(datasetType, dataIds[1:2], run=run2)
+        # Search order determines which dataset is found.
+        found = registry.findMany(["run2", "run1"], datasetType.name, dataIds)
+        self.assertEqual(found.keys(), {DataId(dataId, universe=registry.dimensions)
+                                        for dataId in dataIds[:3]})
+        expected = [refs1[0], refs2[0], refs1[2]]
+        for dataId, ref in zip(dataIds, expected):
+            foundRef = found[DataId(dataId, universe=registry.dimensions)]
+            self.assertEqual(foundRef, ref)
+            self.assertEqual(foundRef.id, ref.id)
+            self.assertEqual(foundRef.components, ref.components)
+            self.assertEqual(foundRef, registry.find(ref.run.collection, datasetType, dataId))
+        found = registry.findMany("run1", datasetType, dataIds)
+        self.assertEqual([found[ref.dataId].id for ref in refs1], [ref.id for ref in refs1])
+        self.assertEqual(registry.findMany("run2", datasetType, []), {})
+
     def testRun(self):
         registry = self.makeRegistry()
         # Check insertion and retrieval with two different collections
@@ -398,6 +490,17 @@ class RegistryTests(metaclass=ABCMeta):
             registry.associate(newCollection, [ref1_run3])
         with self.assertRaises(ConflictingDefinitionError):
             registry.associate(newCollection, [ref1_run3, ref2_run3])
+        # a conflict anywhere in the input must roll back the whole
+        # association, and all conflicts are reported together
+        with self.assertRaises(ConflictingDefinitionError) as cm:
+            registry.associate(newCollection, [ref1_run1, ref1_run3, ref2_run3])
+        self.assertIn(str(ref1_run3.dataId), str(cm.exception))
+        self.assertIn(str(ref2_run3.dataId), str(cm.exception))
+        self.assertRowCount(registry, "dataset_collection", 10)
+        # conflicting refs within the input are also an error
+        with self.assertRaises(ConflictingDefinitionError):
+            registry.associate("another", [ref1_run2, ref1_run3])
+        self.assertRowCount(registry, "dataset_collection", 10)
 
     def testDatasetUnit(self):
         registry = self.makeRegistry()
@@ -654,6 +757,266 @@ class SqlRegistryTestCase(unittest.TestCase, RegistryTests):
         self.assertIsNotNone(registry.findDimensionEntry(dimension, dataId1))
         self.assertIsNone(registry.findDimensionEntry(dimension, dataId2))
 
+    def testDimensionEntryCache(self):
+        registry = self.makeRegistry()
+        cache = registry.dimensionEntryCache
+        registry.addDimensionEntry("instrument", {"instrument": "DummyCam"})
+        registry.addDimensionEntry("physical_filter", {"instrument": "DummyCam", "physical_filter": "d-r",
+                                                       "abstract_filter": "r"})
+        registry.addDimensionEntry("visit", {"instrument": "DummyCam", "visit": 0,
+                                             "physical_filter": "d-r"})
+        dataId = registry.expandDataId(instrument="DummyCam", visit=0)
+        self.assertEqual(dataId.entries[registry.dimensions["physical_filter"]]["abstract_filter"], "r")
+        misses = cache.misses["visit"]
+        # Expanding the same data ID again is served from the cache.
+        dataId = registry.expandDataId(instrument="DummyCam", visit=0)
+        self.assertEqual(dataId.entries[registry.dimensions["visit"]]["physical_filter"], "d-r")
+        self.assertEqual(cache.misses["visit"], misses)
+        self.assertGreater(cache.hits["visit"], 0)
+        # Setting a region must invalidate the cached row.
+        region = lsst.sphgeom.ConvexPolygon((lsst.sphgeom.UnitVector3d(1, 0, 0),
+                                             lsst.sphgeom.UnitVector3d(0, 1, 0),
+                                             lsst.sphgeom.UnitVector3d(0, 0, 1)))
+        registry.setDimensionRegion(instrument="DummyCam", visit=0, region=region)
+        dataId = registry.expandDataId(instrument="DummyCam", visit=0, region=True)
+        self.assertEqual(dataId.region, region)
+
+    def testExpandDataIds(self):
+        registry = self.makeRegistry()
+        registry.addDimensionEntry("instrument", {"instrument": "DummyCam"})
+        registry.addDimensionEntry("physical_filter", {"instrument": "DummyCam", "physical_filter": "d-r",
+                                                       "abstract_filter": "r"})
+        registry.addDimensionEntryList("visit", [{"instrument": "DummyCam", "visit": n} for n in range(20)],
+                                       entry={"physical_filter": "d-r"})
+        registry.addDimensionEntryList("detector", [{"instrument": "DummyCam", "detector": n}
+                                                    for n in range(3)])
+        dataIds = [{"instrument": "DummyCam", "visit": v, "detector": d} for v in range(20) for d in range(3)]
+        statements = []
+
+        def countStatement(*args):
+            statements.append(args)
+
+        event.listen(registry._engine, "before_cursor_execute", countStatement)
+        expanded = registry.expandDataIds(dataIds)
+        event.remove(registry._engine, "before_cursor_execute", countStatement)
+        # One query per element (instrument, physical_filter and detector are
+        # preloaded tables), not one per data ID.
+        self.assertLessEqual(len(statements), 5)
+        self.assertEqual(len(expanded), len(dataIds))
+        physicalFilter = registry.dimensions["physical_filter"]
+        for dataId, expandedDataId in zip(dataIds, expanded):
+            self.assertEqual(expandedDataId, dataId)
+            self.assertEqual(expandedDataId.entries[physicalFilter]["abstract_filter"], "r")
+            self.assertEqual(registry.expandDataId(dataId).implied(), expandedDataId.implied())
+        with self.assertRaises(LookupError):
+            registry.expandDataIds([{"instrument": "DummyCam", "visit": 100}])
+
+    def testDatasetTypeCacheMultipleClients(self):
+        """Test that DatasetTypes registered through one Registry are visible
+        to another Registry connected to the same database.
+        """
+        testDir = os.path.dirname(__file__)
+        with tempfile.TemporaryDirectory(dir=testDir) as root:
+            butlerConfig = ButlerConfig(os.path.join(testDir, "config/basic/butler.yaml"))
+            butlerConfig["registry", "db"] = f"sqlite:///{root}/gen3.sqlite3"
+            registry1 = Registry.fromConfig(butlerConfig, create=True)
+            registry2 = Registry.fromConfig(butlerConfig)
+            storageClass = StorageClass("testDatasetTypeCache")
+            registry1.storageClasses.registerStorageClass(storageClass)
+            dimensions = registry1.dimensions.extract(("instrument", "visit"))
+            datasetType1 = DatasetType("test1", dimensions, storageClass)
+            datasetType2 = DatasetType("test2", dimensions, storageClass)
+            registry1.registerDatasetType(datasetType1)
+            self.assertEqual(registry2.getAllDatasetTypes(), {datasetType1})
+            registry1.registerDatasetType(datasetType2)
+            self.assertEqual(registry2.getDatasetType("test2"), datasetType2)
+            self.assertEqual(registry2.getAllDatasetTypes(), {datasetType1, datasetType2})
+            self.assertFalse(registry2.registerDatasetType(datasetType1))
+
+    def testPooledConnections(self):
+        """Test using a Registry with a connection pool from many threads.
+        """
+        testDir = os.path.dirname(__file__)
+        with tempfile.TemporaryDirectory(dir=testDir) as root:
+            butlerConfig = ButlerConfig(os.path.join(testDir, "config/basic/butler.yaml"))
+            butlerConfig["registry", "db"] = f"sqlite:///{root}/gen3.sqlite3"
+            butlerConfig["registry", "pool", "enabled"] = True
+            butlerConfig["registry", "pool", "size"] = 2
+            butlerConfig["registry", "pool", "maxOverflow"] = 2
+            registry = Registry.fromConfig(butlerConfig, create=True)
+            self.assertEqual(registry._engine.pool.size(), 2)
+            registry.addDimensionEntry("instrument", {"instrument": "DummyCam"})
+            connection = registry._connection
+            self.assertIs(registry._connection, connection)
+
+            def work(detector):
+                with registry.transaction():
+                    registry.addDimensionEntry("detector", {"instrument": "DummyCam", "detector": detector})
+                result = registry.findDimensionEntry("detector", {"instrument": "DummyCam",
+                                                                  "detector": detector})
+                threadConnection = registry._connection
+                registry.releaseConnection()
+                return result["detector"], threadConnection
+
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                results = list(executor.map(work, range(20)))
+            self.assertEqual([detector for detector, _ in results], list(range(20)))
+            self.assertTrue(all(c is not connection for _, c in results))
+            self.assertEqual(len(registry.findDimensionEntries("detector")), 20)
+
+            # A failed transaction in one thread does not affect others.
+            def fail():
+                with registry.transaction():
+                    registry.addDimensionEntry("detector", {"instrument": "DummyCam", "detector": 100})
+                    raise RuntimeError("rollback")
+
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                with self.assertRaises(RuntimeError):
+                    executor.submit(fail).result()
+            self.assertIsNone(registry.findDimensionEntry("detector", {"instrument": "DummyCam",
+                                                                       "detector": 100}))
+
+            # DatasetTypes registered in a transaction are only visible to
+            # other threads once it commits, and rolling it back leaves the
+            # shared caches alone.
+            storageClass = StorageClass("testPooledConnections")
+            registry.storageClasses.registerStorageClass(storageClass)
+            dimensions = registry.dimensions.extract(("instrument", ))
+            committed = DatasetType("committed", dimensions, storageClass)
+            registry.registerDatasetType(committed)
+            instrument = registry.dimensions["instrument"]
+            registry._queryMetadata(instrument, {"instrument": "DummyCam"}, ["instrument"])
+            registered = threading.Event()
+            finish = threading.Event()
+
+            def register(name, commit):
+                with registry.transaction():
+                    registry.registerDatasetType(DatasetType(name, dimensions, storageClass))
+                    self.assertEqual(registry.getDatasetType(name).name, name)
+                    registered.set()
+                    finish.wait(timeout=60)
+                    if not commit:
+                        raise RuntimeError("rollback")
+
+            for name, commit in (("rolledBack", False), ("pending", True)):
+                registered.clear()
+                finish.clear()
+                with ThreadPoolExecutor(max_workers=1) as executor:
+                    future = executor.submit(register, name, commit)
+                    try:
+                        registered.wait(timeout=60)
+                        self.assertNotIn(name, registry._datasetTypes)
+                        with self.assertRaises(KeyError):
+                            registry.getDatasetType(name)
+                    finally:
+                        finish.set()
+                    if not commit:
+                        with self.assertRaises(RuntimeError):
+                            future.result()
+                    else:
+                        future.result()
+                self.assertIn("committed", registry._datasetTypes)
+                self.assertIsNotNone(registry._dimensionEntryCache.get(instrument,
+                                                                       {"instrument": "DummyCam"}))
+            self.assertNotIn("rolledBack", registry._datasetTypes)
+            self.assertEqual(registry.getDatasetType("pending").name, "pending")
+
+            # A connection may not be released inside a transaction.
+            with registry.transaction():
+                with self.assertRaises(RuntimeError):
+                    registry.releaseConnection()
+            registry.releaseConnection()
+            self.assertIsNot(registry._connection, connection)
+
+    def testReadOnlyReplicas(self):
+        """Test routing read-only queries to replicas listed in readOnlyDb.
+        """
+        testDir = os.path.dirname(__file__)
+        with tempfile.TemporaryDirectory(dir=testDir) as root:
+            butlerConfig = ButlerConfig(os.path.join(testDir, "config/basic/butler.yaml"))
+            butlerConfig["registry", "db"] = f"sqlite:///{root}/primary.sqlite3"
+            primary = Registry.fromConfig(butlerConfig, create=True)
+            primary.addDimensionEntry("instrument", {"instrument": "DummyCam"})
+            primary.addDimensionEntry("detector", {"instrument": "DummyCam", "detector": 1})
+            shutil.copy(os.path.join(root, "primary.sqlite3"), os.path.join(root, "replica.sqlite3"))
+            primary.addDimensionEntry("detector", {"instrument": "DummyCam", "detector": 2})
+            # The second replica cannot be opened, so it is always skipped.
+            butlerConfig["registry", "readOnlyDb"] = [f"sqlite:///{root}/replica.sqlite3",
+                                                      f"sqlite:///{root}/missing/replica.sqlite3"]
+            registry = Registry.fromConfig(butlerConfig)
+            self.assertEqual(len(registry._replicaRouter), 2)
+            for _ in range(3):
+                self.assertEqual(len(registry.findDimensionEntries("detector")), 1)
+            self.assertFalse(registry._replicaRouter.isHealthy(1))
+            self.assertTrue(registry._replicaRouter.isHealthy(0))
+            # Queries inside a transaction go to the primary.
+            with registry.transaction():
+                self.assertEqual(len(registry.findDimensionEntries("detector")), 2)
+            # Writes go to the primary.
+            registry.addDimensionEntry("detector", {"instrument": "DummyCam", "detector": 3})
+            self.assertIsNone(registry.findDimensionEntry("detector", {"instrument": "DummyCam",
+                                                                       "detector": 3}))
+            with registry.transaction():
+                self.assertIsNotNone(registry.findDimensionEntry("detector", {"instrument": "DummyCam",
+                                                                              "detector": 3}))
+            # The dimension entry cache is only filled from the primary, so
+            # it never serves rows a lagging replica has not caught up on.
+            detector = registry.dimensions["detector"]
+            dataId = {"instrument": "DummyCam", "detector": 3}
+            self.assertEqual(registry._queryMetadata(detector, dataId, ["detector"]), {"detector": 3})
+            registry._dimensionEntryCache = DimensionEntryCache({"elements": {}})
+            dataId = {"instrument": "DummyCam", "detector": 1}
+            self.assertEqual(registry._queryMetadata(detector, dataId, ["detector"]), {"detector": 1})
+            self.assertIsNone(registry._dimensionEntryCache.get(detector, dataId))
+            # Errors in the query itself do not make a replica unhealthy.
+            with self.assertRaises(OperationalError):
+                registry._executeRead("SELECT no_such_column FROM instrument")
+            self.assertTrue(registry._replicaRouter.isHealthy(0))
+            # A replica that fails between health checks is marked unhealthy
+            # and the query is run again on the primary.
+            index, connection = registry._replicaRouter.getConnection()
+            self.assertEqual(index, 0)
+            connection.connection.connection.close()
+            self.assertEqual(len(registry.findDimensionEntries("detector")), 3)
+            self.assertFalse(registry._replicaRouter.isHealthy(0))
+            # Queries go to the primary when no replica is healthy.
+            registry._replicaRouter.markUnhealthy(0)
+            self.assertEqual(len(registry.findDimensionEntries("detector")), 3)
+
+    def testSqlitePerformanceProfile(self):
+        """Test setting SQLite pragmas from a performance profile.
+        """
+        testDir = os.path.dirname(__file__)
+        with tempfile.TemporaryDirectory(dir=testDir) as root:
+            butlerConfig = ButlerConfig(os.path.join(testDir, "config/basic/butler.yaml"))
+            butlerConfig["registry", "db"] = f"sqlite:///{root}/gen3.sqlite3"
+            butlerConfig["registry", "sqlite", "profile"] = "performance"
+            registry = Registry.fromConfig(butlerConfig, create=True)
+
+            def pragma(name):
+                return registry._connection.execute(f"PRAGMA {name}").scalar()
+
+            self.assertEqual(pragma("journal_mode").lower(), "wal")
+            self.assertEqual(pragma("synchronous"), 1)  # NORMAL
+            self.assertEqual(pragma("temp_store"), 2)  # MEMORY
+            self.assertEqual(pragma("cache_size"), -65536)
+            self.assertEqual(pragma("foreign_keys"), 1)
+            self.assertEqual(pragma("busy_timeout"), 300000)
+            registry.addDimensionEntry("instrument", {"instrument": "DummyCam"})
+            self.assertIsNotNone(registry.findDimensionEntry("instrument", {"instrument": "DummyCam"}))
+            # Without a profile the driver's own defaults are used.
+            butlerConfig["registry", "sqlite", "profile"] = None
+            registry = Registry.fromConfig(butlerConfig)
+            self.assertNotEqual(pragma("busy_timeout"), 300000)
+            self.assertEqual(pragma("foreign_keys"), 1)
+            butlerConfig["registry", "sqlite", "profile"] = "unknown"
+            with self.assertRaises(ValueError):
+                Registry.fromConfig(butlerConfig)
+            butlerConfig["registry", "sqlite", "profile"] = "bad"
+            butlerConfig["registry", "sqlite", "profiles", "bad"] = {"journal_mode": "WAL; DROP TABLE x"}
+            with self.assertRaises(ValueError):
+                Registry.fromConfig(butlerConfig)
+
 
 class LimitedSqlRegistryTestCase(unittest.TestCase, RegistryTests):
     """Test for SqlRegistry with limited=True.
@@ -22,7 +22,7 @@
 import unittest
 from collections import namedtuple
 
-from lsst.daf.butler.core.utils import iterable, getFullTypeName, Singleton, NamedKeyDict
+from lsst.daf.butler.core.utils import iterable, getFullTypeName, Singleton, NamedKeyDict, chunked
 from lsst.daf.butler.core.formatter import Formatter
 from lsst.daf.butler import StorageClass
 
@@ -42,6 +42,18 @@ class IterableTestCase(unittest.TestCase):
         self.assertEqual(list(iterable(["hello", "world"])), ["hello", "world"])
 
 
+class ChunkedTestCase(unittest.TestCase):
+    """Tests for `chunked` helper.
+    """
+
+    def testChunked(self):
+        self.assertEqual(list(chunked(range(5), 2)), [[0, 1], [2, 3], [4]])
+        self.assertEqual(list(chunked(range(4), 2)), [[0, 1], [2, 3]])
+        self.assertEqual(list(chunked([], 3)), [])
+        with self.assertRaises(ValueError):
+            list(chunked(range(3), 0))
+
+
 class SingletonTestCase(unittest.TestCase):
     """Tests of the Singleton metaclass"""
 